@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+from core.candles import COLUNAS
+
+# Vocabulário das manchetes sintéticas: palavras neutras, léxico crypto e ativos
+_NEUTRAS = (
+    'market', 'price', 'traders', 'exchange', 'week', 'analysts', 'network', 'token', 'update',
+    'volume', 'investors', 'report', 'today', 'launch', 'protocol', 'fund', 'chain', 'wallet',
+)
+_POLARES = (
+    'bullish', 'rally', 'surge', 'growth', 'adoption', 'breakout', 'profit', 'great', 'strong',
+    'bearish', 'crash', 'dump', 'fud', 'regulation', 'ban', 'warning', 'loss', 'weak', 'fear',
+)
+_ATIVOS = ('XRP', 'Ripple', 'ADA', 'Cardano', 'MATIC', 'Polygon', 'DOGE', 'Dogecoin', 'SHIB', 'Shiba Inu')
+
+
+def nomes_pares(n):
+    """XRP/USDT, ADA/USDT... e pares fictícios P005/USDT em diante"""
+    base = ['XRP/USDT', 'ADA/USDT', 'MATIC/USDT', 'DOGE/USDT', 'SHIB/USDT']
+    return (base + [f'P{i:03d}/USDT' for i in range(len(base), n)])[:n]
+
+
+def gerar_ohlcv(n_pares, n_candles=50, semente=42):
+    """Tensor (pares, candles, 6) de candles de 15m em passeio aleatório log-normal"""
+    rng = np.random.default_rng(semente)
+    retornos = rng.normal(0, 0.01, (n_pares, n_candles))
+    base = rng.uniform(0.01, 5.0, (n_pares, 1))
+    close = base * np.exp(np.cumsum(retornos, axis=1))
+    abertura = np.concatenate([base, close[:, :-1]], axis=1)
+    amplitude = np.abs(rng.normal(0, 0.005, (n_pares, n_candles)))
+    high = np.maximum(abertura, close) * (1 + amplitude)
+    low = np.minimum(abertura, close) * (1 - amplitude)
+    volume = rng.uniform(1e4, 1e5, (n_pares, n_candles))
+    timestamp = np.broadcast_to(1_699_999_200_000 + np.arange(n_candles) * 900_000, (n_pares, n_candles))
+    return np.stack([timestamp, abertura, high, low, close, volume], axis=-1)
+
+
+def gerar_dados_mercado(n_pares, n_candles=50, semente=42):
+    """{par: {'15m': DataFrame}} no formato que o bot entrega ao cérebro"""
+    tensor = gerar_ohlcv(n_pares, n_candles, semente)
+    return {
+        par: {'15m': pd.DataFrame(tensor[i], columns=COLUNAS)}
+        for i, par in enumerate(nomes_pares(n_pares))
+    }
+
+
+def gerar_corpus(n_textos, semente=42, palavras=(12, 40)):
+    """Manchetes + resumos sintéticos, todos distintos, com ativos e palavras polarizadas"""
+    rng = np.random.default_rng(semente)
+    textos = []
+    for i in range(n_textos):
+        n = int(rng.integers(*palavras))
+        escolhas = rng.choice(len(_NEUTRAS), n).tolist()
+        texto = [_NEUTRAS[j] for j in escolhas]
+        for _ in range(int(rng.integers(1, 4))):
+            texto[int(rng.integers(n))] = _POLARES[int(rng.integers(len(_POLARES)))]
+        texto[int(rng.integers(n))] = _ATIVOS[int(rng.integers(len(_ATIVOS)))]
+        textos.append(f"{' '.join(texto).capitalize()} #{i}.")
+    return textos
@@ -0,0 +1,260 @@
+"""Benchmarks reprodutíveis do cérebro, do sentimento e da coleta de dados
+
+    python -m benchmarks.executar                        # 5, 50 e 500 pares
+    python -m benchmarks.executar --salvar base.json     # gravar a linha de base desta máquina
+    python -m benchmarks.executar --comparar base.json   # falha (código 1) se algo regrediu
+
+Dados e textos são sintéticos com semente fixa. O tempo de cada caso é o
+melhor de `--repeticoes` rodadas; memória é o pico do tracemalloc numa
+chamada. Linhas de base dependem da máquina: não versionar.
+"""
+import argparse
+import gc
+import json
+import logging
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from benchmarks.dados import gerar_ohlcv, gerar_dados_mercado, gerar_corpus, nomes_pares
+
+ESCALAS_PADRAO = (5, 50, 500)
+TEXTOS_POR_PAR = 4
+TEMPO_MINIMO_RODADA = 0.05  # Segundos; chamadas rápidas são repetidas em laço até isso
+
+
+# Cada caso: preparar(n_pares, semente) -> (executar, unidades). `executar` é
+# chamado sem argumentos; se devolver um callable novo a cada rodada (`frio`),
+# o preparo fica fora do tempo medido.
+CASOS = {}
+
+
+def caso(nome, unidade='pares', frio=False):
+    def registrar(preparar):
+        CASOS[nome] = {'preparar': preparar, 'unidade': unidade, 'frio': frio}
+        return preparar
+    return registrar
+
+
+def _cerebro():
+    from cerebro.rede_neural_simples import CerebroNeuralSimples
+    return CerebroNeuralSimples()
+
+
+@caso('extrair_features_simples')
+def _features(n, semente):
+    cerebro, dados = _cerebro(), gerar_dados_mercado(n, semente=semente)
+    return (lambda: cerebro.extrair_features_simples(dados)), n
+
+
+@caso('prever')
+def _prever(n, semente):
+    cerebro, dados = _cerebro(), gerar_dados_mercado(n, semente=semente)
+    por_par = [{par: timeframes} for par, timeframes in dados.items()]
+    return (lambda: [cerebro.prever(dados_par) for dados_par in por_par]), n
+
+
+@caso('prever_pares')
+def _prever_pares(n, semente):
+    cerebro, dados = _cerebro(), gerar_dados_mercado(n, semente=semente)
+    pares = list(dados)
+    return (lambda: cerebro.prever_pares(dados, pares)), n
+
+
+@caso('calcular_rsi_manual')
+def _rsi(n, semente):
+    cerebro = _cerebro()
+    closes = [df['15m']['close'] for df in gerar_dados_mercado(n, semente=semente).values()]
+    return (lambda: [cerebro._calcular_rsi_manual(close, 14) for close in closes]), n
+
+
+@caso('calcular_tendencia_simples')
+def _tendencia(n, semente):
+    cerebro = _cerebro()
+    closes = [df['15m']['close'] for df in gerar_dados_mercado(n, semente=semente).values()]
+    return (lambda: [cerebro._calcular_tendencia_simples(close, 10) for close in closes]), n
+
+
+def _analisador():
+    from cerebro.analise_sentimentos import AnalisadorSentimentos
+    from cerebro.cache_sentimentos import CacheSentimentos
+    return AnalisadorSentimentos(cache=CacheSentimentos('benchmark', capacidade=10 ** 6, caminho=''))
+
+
+@caso('analisar_sentimento_texto', unidade='textos', frio=True)
+def _sentimento_frio(n, semente):
+    from cerebro.cache_sentimentos import CacheSentimentos
+    analisador, textos = _analisador(), gerar_corpus(n * TEXTOS_POR_PAR, semente)
+
+    def rodada():
+        # Cache vazio a cada rodada: mede a pontuação de verdade
+        analisador.cache = CacheSentimentos('benchmark', capacidade=10 ** 6, caminho='')
+        return lambda: [analisador.analisar_sentimento_texto(texto) for texto in textos]
+    return rodada, len(textos)
+
+
+@caso('analisar_sentimento_texto_cache', unidade='textos')
+def _sentimento_cache(n, semente):
+    analisador, textos = _analisador(), gerar_corpus(n * TEXTOS_POR_PAR, semente)
+    for texto in textos:
+        analisador.analisar_sentimento_texto(texto)
+    return (lambda: [analisador.analisar_sentimento_texto(texto) for texto in textos]), len(textos)
+
+
+@caso('coletar_dataframes')
+def _coletar_dataframes(n, semente):
+    # Mesma montagem de `_coletar_dados_reais` a partir do armazém de candles
+    from core.candles import ArmazemCandles
+    from core.config import config
+    armazem = ArmazemCandles(None, timeframe_base='15m', derivados=())
+    pares = nomes_pares(n)
+    for par, ohlcv in zip(pares, gerar_ohlcv(n, config.CAPACIDADE_CANDLES, semente)):
+        armazem.buffer(par, '15m').mesclar(ohlcv)
+    limite = config.CANDLES_ANALISE
+    return (lambda: {par: {'15m': armazem.buffer(par, '15m').dataframe(limite)} for par in pares}), n
+
+
+@caso('features_incrementais')
+def _features_incrementais(n, semente):
+    # Caminho ao vivo: um candle novo por par e as features dos indicadores do armazém
+    from core.candles import ArmazemCandles
+    from core.config import config
+    armazem = ArmazemCandles(None, timeframe_base='15m', derivados=())
+    pares = nomes_pares(n)
+    proximos = []
+    for par, ohlcv in zip(pares, gerar_ohlcv(n, config.CAPACIDADE_CANDLES + 1, semente)):
+        armazem.buffer(par, '15m').mesclar(ohlcv[:-1])
+        armazem.features([par])
+        proximos.append(ohlcv[-1:])
+
+    def rodada():
+        for par, candle in zip(pares, proximos):
+            candle[0, 0] += 900_000
+            armazem.buffer(par, '15m').mesclar(candle)
+        return armazem.features(pares)
+    return rodada, n
+
+
+@caso('agregar_ohlcv')
+def _agregar_ohlcv(n, semente):
+    # Reagregação completa de 15m em 1h e 4h (o pior caso; no ciclo é só a barra parcial)
+    from core.candles import agregar_ohlcv
+    from core.config import config
+    series = list(gerar_ohlcv(n, config.CAPACIDADE_CANDLES, semente))
+    return (lambda: [agregar_ohlcv(ohlcv, tf) for ohlcv in series for tf in ('1h', '4h')]), n
+
+
+@caso('dados_fallback')
+def _dados_fallback(n, semente):
+    from core.exchange_manager import BybitManager
+    from core.config import config
+    bybit, pares = BybitManager(), nomes_pares(n)
+    np.random.seed(semente)  # O fallback usa o gerador global
+    return (lambda: [bybit._dados_fallback(par, config.CANDLES_ANALISE) for par in pares]), n
+
+
+def medir(info, n, semente, repeticoes):
+    """{'segundos', 'por_segundo', 'memoria_pico', 'unidades'} de um caso numa escala"""
+    preparado, unidades = info['preparar'](n, semente)
+    obter = preparado if info['frio'] else (lambda: preparado)
+
+    # Aquecimento (imports preguiçosos, caches de pandas) fora da medição
+    obter()()
+
+    tempos = []
+    for _ in range(repeticoes):
+        voltas, decorrido = 0, 0.0
+        while decorrido < TEMPO_MINIMO_RODADA or voltas == 0:
+            executar = obter()
+            gc.disable()
+            inicio = time.perf_counter()
+            executar()
+            decorrido += time.perf_counter() - inicio
+            gc.enable()
+            voltas += 1
+        tempos.append(decorrido / voltas)
+
+    executar = obter()
+    tracemalloc.start()
+    executar()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    segundos = min(tempos)
+    return {
+        'segundos': segundos,
+        'por_segundo': unidades / segundos,
+        'memoria_pico': pico,
+        'unidades': unidades,
+    }
+
+
+def executar(casos=None, escalas=ESCALAS_PADRAO, semente=42, repeticoes=5):
+    resultados = {}
+    for nome in casos or CASOS:
+        for n in escalas:
+            resultado = medir(CASOS[nome], n, semente, repeticoes)
+            resultados[f'{nome}@{n}'] = resultado
+            print(f"{nome:<34} {n:>4} pares  {resultado['segundos'] * 1000:>10.3f} ms  "
+                  f"{resultado['por_segundo']:>12,.0f} {CASOS[nome]['unidade']}/s  "
+                  f"{resultado['memoria_pico'] / 1024:>9,.0f} KiB", flush=True)
+    return resultados
+
+
+def comparar(resultados, base, tolerancia):
+    """Casos mais lentos que a linha de base além da tolerância: [(chave, atual, base)]"""
+    regressoes = []
+    for chave, atual in resultados.items():
+        anterior = base.get(chave)
+        if anterior and atual['segundos'] > anterior['segundos'] * (1 + tolerancia):
+            regressoes.append((chave, atual['segundos'], anterior['segundos']))
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks do TAVARES')
+    parser.add_argument('--casos', nargs='+', choices=sorted(CASOS), help='Padrão: todos')
+    parser.add_argument('--pares', nargs='+', type=int, default=list(ESCALAS_PADRAO))
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--salvar', help='Gravar resultados como linha de base (JSON)')
+    parser.add_argument('--comparar', help='Linha de base (JSON) para detectar regressões')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='Regressão = mais lento que base × (1 + tolerância)')
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)  # Logs de inicialização poluem a tabela
+    resultados = executar(args.casos, args.pares, args.semente, args.repeticoes)
+
+    if args.salvar:
+        with open(args.salvar, 'w', encoding='utf-8') as arquivo:
+            json.dump({
+                'criado': datetime.now().isoformat(),
+                'maquina': platform.platform(),
+                'processador': platform.processor(),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'pandas': pd.__version__,
+                'semente': args.semente,
+                'resultados': resultados,
+            }, arquivo, indent=2)
+        print(f"💾 Linha de base salva em {args.salvar}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            base = json.load(arquivo)['resultados']
+        regressoes = comparar(resultados, base, args.tolerancia)
+        for chave, atual, anterior in regressoes:
+            print(f"❌ REGRESSÃO {chave}: {atual * 1000:.3f} ms (base {anterior * 1000:.3f} ms, "
+                  f"+{(atual / anterior - 1) * 100:.0f}%)")
+        if regressoes:
+            return 1
+        print(f"✅ Nenhuma regressão acima de {args.tolerancia * 100:.0f}%")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Teste de carga do loop completo do TavaresTelegramBot sobre a ExchangeSimulada
+
+    python -m benchmarks.soak --ciclos 2000
+    python -m benchmarks.soak --ciclos 5000 --taxa-erros 0.02 --latencia 0.001 --confianca 50
+
+Cada ciclo adianta o relógio do mercado simulado em `--passo` segundos, então
+os candles avançam e os sinais mudam sem esperar o tempo real; depois do ciclo
+roda a checagem de stop loss/take profit. Pares sem candle novo desde o ciclo
+anterior não são analisados, como no loop real. Telegram e
+serviço de sentimento não são iniciados: as mensagens só vão para a fila.
+Diário, caches e histórico ficam num diretório temporário.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from core.config import config
+from core.metricas import metricas
+
+
+def _configurar(args, diretorio):
+    config.MODO_SIMULADO = True
+    config.TELEGRAM_BOT_TOKEN = config.TELEGRAM_BOT_TOKEN or '0:soak'
+    config.SALDO_SIMULADO = {'USDT': args.saldo}
+    config.LATENCIA_SIMULADA = args.latencia
+    config.TAXA_ERROS_SIMULADA = args.taxa_erros
+    config.ARQUIVO_DIARIO = os.path.join(diretorio, 'diario.sqlite')
+    config.ARQUIVO_CACHE_SENTIMENTOS = ''
+    config.DIRETORIO_HISTORICO = os.path.join(diretorio, 'historico')
+    if not args.baldes_reais:
+        # A simulada não tem limite de taxa; com os baldes da Bybit o soak mede o agendador
+        config.BALDES_REQUISICOES = {categoria: (1e6, 1e6) for categoria in config.BALDES_REQUISICOES}
+        config.BALDE_GLOBAL = (1e6, 1e6)
+    if args.confianca is not None:
+        config.CONFIANCA_MINIMA = args.confianca
+    if args.pares:
+        config.PARES_MONITORADOS = args.pares
+
+
+async def executar(args, diretorio):
+    _configurar(args, diretorio)
+    from core.tavares_telegram_bot import TavaresTelegramBot
+
+    tavares = TavaresTelegramBot()
+    exchange = tavares.bybit.exchange
+    await tavares.inicializar()
+
+    inicio = time.perf_counter()
+    saldos_negativos = 0
+    try:
+        for ciclo in range(args.ciclos):
+            exchange.avancar(args.passo)
+            await tavares.executar_ciclo_trading()
+            await tavares.verificar_protecao()
+            saldos_negativos += any(valor < -1e-9 for valor in exchange.saldos.values())
+            if args.relatorio and (ciclo + 1) % args.relatorio == 0:
+                decorrido = time.perf_counter() - inicio
+                print(f"🔄 {ciclo + 1} ciclos em {decorrido:.1f}s "
+                      f"({(ciclo + 1) / decorrido * 60:,.0f}/min), patrimônio {exchange.patrimonio():.2f} USDT",
+                      flush=True)
+    finally:
+        decorrido = time.perf_counter() - inicio
+        await asyncio.to_thread(tavares.diario.fechar)
+        await tavares.bybit.fechar()
+
+    return tavares, decorrido, saldos_negativos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Teste de carga do TAVARES com a exchange simulada')
+    parser.add_argument('--ciclos', type=int, default=1000)
+    parser.add_argument('--passo', type=float, default=60, help='Segundos de mercado por ciclo')
+    parser.add_argument('--saldo', type=float, default=100.0, help='USDT inicial')
+    parser.add_argument('--latencia', type=float, default=0.0, help='Segundos por chamada à exchange (média)')
+    parser.add_argument('--taxa-erros', type=float, default=0.0, help='Fração de chamadas com falha de rede')
+    parser.add_argument('--baldes-reais', action='store_true', help='Manter os limites de taxa de BALDES_REQUISICOES')
+    parser.add_argument('--confianca', type=float, help='Sobrescrever CONFIANCA_MINIMA')
+    parser.add_argument('--pares', nargs='+', help='Padrão: PARES_MONITORADOS')
+    parser.add_argument('--relatorio', type=int, default=500, help='Progresso a cada N ciclos (0 = nunca)')
+    parser.add_argument('--verboso', action='store_true')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verboso else logging.CRITICAL,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    with tempfile.TemporaryDirectory(prefix='tavares_soak_') as diretorio:
+        tavares, decorrido, saldos_negativos = asyncio.run(executar(args, diretorio))
+        with sqlite3.connect(config.ARQUIVO_DIARIO) as banco:
+            operacoes_diario = banco.execute('SELECT COUNT(*) FROM operacoes').fetchone()[0]
+            ciclos_diario = banco.execute('SELECT COUNT(*) FROM ciclos').fetchone()[0]
+
+    exchange = tavares.bybit.exchange
+    stats = exchange.estatisticas()
+    perf = tavares.estado['performance']
+    _, ciclos = metricas.histogramas('tavares_ciclo_segundos')[0]
+
+    print(f"\n🧪 SOAK: {args.ciclos} ciclos em {decorrido:.1f}s ({args.ciclos / decorrido * 60:,.0f} ciclos/min)")
+    print(f"⏱️ Ciclo: p50 {ciclos.quantil(0.5) * 1000:.1f}ms | p95 {ciclos.quantil(0.95) * 1000:.1f}ms | "
+          f"p99 {ciclos.quantil(0.99) * 1000:.1f}ms")
+    print(f"💰 Ordens: {stats['ordens_executadas']} executadas, {stats['ordens_rejeitadas']} rejeitadas | "
+          f"volume {stats['volume']:.2f} USDT | taxas {stats['taxas_pagas']:.4f} | "
+          f"slippage médio {stats['slippage_medio'] * 1e4:.1f} bps")
+    print(f"🌐 Chamadas: {stats['chamadas']}")
+    print(f"💥 Erros injetados: {stats['erros_injetados']}")
+    print(f"📈 Patrimônio: {exchange.patrimonio():.2f} USDT (inicial {args.saldo:.2f}) | saldos {exchange.saldos}")
+
+    # ✅ Invariantes
+    falhas = []
+    if saldos_negativos:
+        falhas.append(f"saldo negativo em {saldos_negativos} ciclos")
+    if operacoes_diario != perf['operacoes_executadas']:
+        falhas.append(f"diário com {operacoes_diario} operações, estado com {perf['operacoes_executadas']}")
+    if ciclos_diario != args.ciclos:
+        falhas.append(f"diário com {ciclos_diario} ciclos de {args.ciclos}")
+    if perf['operacoes_executadas'] != stats['ordens_executadas']:
+        falhas.append(f"{perf['operacoes_executadas']} operações registradas, {stats['ordens_executadas']} na exchange")
+    # O saldo local é mantido pelas execuções; tem que bater com o da exchange
+    local = tavares.bybit.saldo.saldos
+    divergentes = {moeda: (local.get(moeda, 0.0), valor) for moeda, valor in exchange.saldos.items()
+                   if abs(local.get(moeda, 0.0) - valor) > 1e-6}
+    if divergentes:
+        falhas.append(f"saldo local divergente: {divergentes}")
+
+    for falha in falhas:
+        print(f"❌ {falha}")
+    if falhas:
+        return 1
+    print("✅ Invariantes OK")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
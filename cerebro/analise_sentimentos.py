@@ -1,38 +1,97 @@
-import requests
 from textblob import TextBlob
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+import asyncio
+import hashlib
+import json
 import logging
+import time
 from datetime import datetime
-from bs4 import BeautifulSoup
+from cerebro.noticias import ColetorNoticias
+from cerebro.cache_sentimentos import CacheSentimentos, normalizar_texto
+from cerebro.indice_palavras import IndicePalavras
+from core.config import config
+from core.metricas import metricas
 
 logger = logging.getLogger('AnaliseSentimentos')
 
+# Mudou pesos, léxico crypto ou a combinação VADER/TextBlob? Incrementar:
+# as pontuações em cache da versão anterior deixam de ser usadas
+VERSAO_LEXICO = 2
+
+# Léxico crypto por palavra inteira, com as flexões mais comuns nas manchetes
+PALAVRAS_POSITIVAS = [
+    'bullish', 'moon', 'mooning', 'rally', 'rallies', 'rallied', 'surge', 'surges', 'surged',
+    'green', 'growth', 'adoption', 'breakout', 'breakouts', 'profit', 'profits',
+]
+PALAVRAS_NEGATIVAS = [
+    'bearish', 'crash', 'crashes', 'crashed', 'dump', 'dumps', 'dumped', 'red', 'fud',
+    'regulation', 'regulations', 'ban', 'bans', 'banned', 'warning', 'warnings', 'loss', 'losses',
+]
+
+
+def pontuar_lote(pontuador, textos):
+    """[(análise, segundos gastos)] para textos já normalizados"""
+    resultados = []
+    for texto in textos:
+        inicio = time.perf_counter()
+        analise = pontuador.pontuar(texto)
+        resultados.append((analise, time.perf_counter() - inicio))
+    return resultados
+
+
+# Cada processo do pool de pontuação carrega o seu próprio VADER
+_PONTUADOR = None
+
+
+def _iniciar_processo():
+    global _PONTUADOR
+    _PONTUADOR = PontuadorSentimentos()
+
+
+def _pontuar_no_processo(textos):
+    return pontuar_lote(_PONTUADOR, textos)
+
+
 class AnalisadorSentimentos:
     """Analisador de sentimentos para TAVARES"""
     
-    def __init__(self):
-        self.analyzer = SentimentIntensityAnalyzer()
+    def __init__(self, coletor=None, cache=None):
+        self.pontuador = PontuadorSentimentos()
+        self.coletor = coletor or ColetorNoticias()
+        self.cache = cache or CacheSentimentos(self.pontuador.versao)
         self.sentiment_history = []
         logger.info("📰 ANALISADOR DE SENTIMENTOS INICIALIZADO")
     
-    def analisar_sentimento_mercado(self):
-        """Analisar sentimento geral do mercado"""
+    async def analisar_sentimento_mercado(self, executor=None):
+        """Analisar sentimento geral do mercado
+        
+        A pontuação roda no `executor` (pool de processos iniciado com
+        `_iniciar_processo`) ou, sem ele, numa thread; o event loop nunca
+        fica parado no VADER/TextBlob.
+        """
         try:
-            noticias = self._coletar_noticias_sincrono()
+            with metricas.medir('tavares_sentimento_segundos', etapa='coleta'):
+                await self.coletor.coletar()
+            noticias = self.coletor.recentes(config.NOTICIAS_ANALISADAS)
             
             if not noticias:
                 return self._analise_simulada()
             
-            sentimentos = []
-            for noticia in noticias:
-                analise = self.analisar_sentimento_texto(
-                    f"{noticia['titulo']} {noticia['texto']}"
+            with metricas.medir('tavares_sentimento_segundos', etapa='pontuacao'):
+                sentimentos = await self.analisar_textos(
+                    [f"{noticia['titulo']} {noticia['texto']}" for noticia in noticias],
+                    executor
                 )
-                sentimentos.append(analise)
             
             scores = [s['score'] for s in sentimentos]
             score_medio = sum(scores) / len(scores) if scores else 0
             
+            # Sentimento por ativo: média das notícias que citam o ativo
+            scores_ativo = {}
+            for analise in sentimentos:
+                for ativo in analise.get('ativos', ()):
+                    scores_ativo.setdefault(ativo, []).append(analise['score'])
+            
             # Determinar sentimento geral
             if score_medio >= 0.1:
                 sentimento_geral = "MUITO_POSITIVO"
@@ -50,6 +109,10 @@ class AnalisadorSentimentos:
                 'score_medio': score_medio,
                 'intensidade': abs(score_medio),
                 'total_noticias': len(noticias),
+                'por_ativo': {
+                    ativo: {'score': sum(valores) / len(valores), 'noticias': len(valores)}
+                    for ativo, valores in scores_ativo.items()
+                },
                 'timestamp': datetime.now().isoformat()
             }
             
@@ -64,31 +127,9 @@ class AnalisadorSentimentos:
             logger.error(f"❌ Erro na análise de sentimento: {e}")
             return self._analise_simulada()
     
-    def _coletar_noticias_sincrono(self):
-        """Coletar notícias de forma síncrona"""
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = requests.get('https://cointelegraph.com/rss', headers=headers, timeout=10)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'xml')
-                items = soup.find_all('item')[:3]
-                
-                noticias = []
-                for item in items:
-                    titulo = item.find('title')
-                    if titulo:
-                        noticias.append({
-                            'titulo': titulo.get_text(),
-                            'texto': item.find('description').get_text() if item.find('description') else '',
-                            'fonte': 'cointelegraph'
-                        })
-                return noticias
-        except Exception as e:
-            logger.debug(f"❌ Erro ao coletar notícias: {e}")
-        
-        return []
+    async def fechar(self):
+        await self.coletor.fechar()
+        self.cache.fechar()
     
     def _analise_simulada(self):
         """Análise simulada baseada no horário"""
@@ -115,69 +156,107 @@ class AnalisadorSentimentos:
             'score_medio': score,
             'intensidade': abs(score),
             'total_noticias': 0,
+            'por_ativo': {},
             'timestamp': datetime.now().isoformat(),
             'simulado': True
         }
     
-    def analisar_sentimento_texto(self, texto):
-        """Analisar sentimento do texto"""
-        try:
-            texto = texto[:500]
-            
-            # Análise com VADER
-            vader_score = self.analyzer.polarity_scores(texto)
-            
-            # Análise com TextBlob
-            blob = TextBlob(texto)
-            blob_score = blob.sentiment.polarity
-            
-            # Análise crypto
-            crypto_score = self._analisar_sentimento_crypto(texto)
-            
-            # Score combinado
-            score_final = (
-                vader_score['compound'] * 0.6 +
-                blob_score * 0.3 +
-                crypto_score * 0.1
-            )
-            
-            if score_final >= 0.05:
-                sentimento = "POSITIVO"
-            elif score_final <= -0.05:
-                sentimento = "NEGATIVO"
+    async def analisar_textos(self, textos, executor=None):
+        """Análises na ordem de `textos`; só os inéditos saem do cache para pontuação"""
+        normalizados = [normalizar_texto(texto) for texto in textos]
+        analises = {}
+        for normalizado in normalizados:
+            if normalizado not in analises:
+                analises[normalizado] = self.cache.consultar(normalizado)
+        
+        faltando = [normalizado for normalizado, analise in analises.items() if analise is None]
+        if faltando:
+            if executor is not None:
+                loop = asyncio.get_running_loop()
+                resultados = await loop.run_in_executor(executor, _pontuar_no_processo, faltando)
             else:
-                sentimento = "NEUTRO"
-            
-            return {
-                'sentimento': sentimento,
-                'score': score_final,
-                'intensidade': abs(score_final)
-            }
+                resultados = await asyncio.to_thread(pontuar_lote, self.pontuador, faltando)
             
+            for normalizado, (analise, custo) in zip(faltando, resultados):
+                self.cache.guardar(normalizado, analise, custo)
+                analises[normalizado] = analise
+        
+        return [analises[normalizado] for normalizado in normalizados]
+    
+    def analisar_sentimento_texto(self, texto):
+        """Analisar sentimento do texto (só textos inéditos são pontuados)"""
+        try:
+            return self.cache.obter(texto, self.pontuador.pontuar)
         except Exception as e:
             logger.error(f"❌ Erro na análise de sentimento: {e}")
-            return {'sentimento': 'NEUTRO', 'score': 0, 'intensidade': 0}
+            return {'sentimento': 'NEUTRO', 'score': 0, 'intensidade': 0, 'ativos': []}
+
+
+class PontuadorSentimentos:
+    """VADER + TextBlob + léxico crypto, sem estado além dos modelos
+    
+    Separado do analisador para poder ser recriado em cada processo do pool.
+    Ativos citados e palavras do léxico saem de uma única varredura do texto.
+    """
     
-    def _analisar_sentimento_crypto(self, texto):
-        """Análise de sentimento para criptomoedas"""
-        texto_lower = texto.lower()
-        score = 0
-        keyword_count = 0
+    def __init__(self, aliases=None):
+        self.analyzer = SentimentIntensityAnalyzer()
         
-        positive_words = ['bullish', 'moon', 'rally', 'surge', 'green', 'growth', 'adoption', 'breakout', 'profit']
-        negative_words = ['bearish', 'crash', 'dump', 'red', 'fud', 'regulation', 'ban', 'warning', 'loss']
+        aliases = config.ALIASES_ATIVOS if aliases is None else aliases
+        ativos = {par.split('/')[0]: [] for par in config.PARES_MONITORADOS}
+        for ativo, nomes in aliases.items():
+            ativos.setdefault(ativo.upper(), []).extend(nomes)
+        
+        rotulos = {palavra: +1 for palavra in PALAVRAS_POSITIVAS}
+        rotulos.update({palavra: -1 for palavra in PALAVRAS_NEGATIVAS})
+        for ativo, nomes in ativos.items():
+            for nome in [ativo, *nomes]:
+                rotulos[nome.lower()] = ativo
+        self.indice = IndicePalavras(rotulos)
+        
+        # Trocar apelidos muda as marcações, então também invalida o cache
+        assinatura = json.dumps(sorted((k, sorted(v)) for k, v in ativos.items()))
+        self.versao = f"{VERSAO_LEXICO}-{hashlib.sha1(assinatura.encode('utf-8')).hexdigest()[:8]}"
+    
+    def pontuar(self, texto):
+        """VADER + TextBlob + léxico crypto sobre o texto já normalizado"""
+        # Análise com VADER
+        vader_score = self.analyzer.polarity_scores(texto)
         
-        for word in positive_words:
-            if word in texto_lower:
-                score += 0.1
-                keyword_count += 1
+        # Análise com TextBlob
+        blob = TextBlob(texto)
+        blob_score = blob.sentiment.polarity
         
-        for word in negative_words:
-            if word in texto_lower:
-                score -= 0.1
-                keyword_count += 1
+        # Análise crypto + ativos citados
+        contagem = self.indice.contar(texto)
+        crypto_score = self._analisar_sentimento_crypto(contagem)
         
-        if keyword_count > 0:
-            score = score / keyword_count
+        # Score combinado
+        score_final = (
+            vader_score['compound'] * 0.6 +
+            blob_score * 0.3 +
+            crypto_score * 0.1
+        )
         
+        if score_final >= 0.05:
+            sentimento = "POSITIVO"
+        elif score_final <= -0.05:
+            sentimento = "NEGATIVO"
+        else:
+            sentimento = "NEUTRO"
+        
+        return {
+            'sentimento': sentimento,
+            'score': score_final,
+            'intensidade': abs(score_final),
+            'ativos': sorted(rotulo for rotulo in contagem if isinstance(rotulo, str))
+        }
+    
+    def _analisar_sentimento_crypto(self, contagem):
+        """Análise de sentimento para criptomoedas (palavras distintas por polaridade)"""
+        positivas = contagem.get(+1, 0)
+        negativas = contagem.get(-1, 0)
+        if positivas + negativas == 0:
+            return 0
+        score = 0.1 * (positivas - negativas) / (positivas + negativas)
         return max(min(score, 1), -1)
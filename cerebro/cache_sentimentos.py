@@ -0,0 +1,139 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from core.config import config
+
+logger = logging.getLogger('CacheSentimentos')
+
+
+def normalizar_texto(texto, limite=500):
+    """Texto que de fato é pontuado: cortado e com espaços colapsados
+
+    Caixa e pontuação ficam como estão, pois o VADER usa as duas.
+    """
+    return ' '.join(texto[:limite].split())
+
+
+class CacheSentimentos:
+    """Cache de pontuações de sentimento endereçado pelo conteúdo
+
+    A chave é o hash do texto normalizado junto com a versão do léxico, então
+    mudar pesos ou palavras invalida tudo sem apagar nada. Uma camada LRU em
+    memória atende o ciclo; a camada SQLite opcional sobrevive a restarts.
+    """
+
+    def __init__(self, versao, capacidade=None, caminho=None):
+        self.versao = versao
+        self.capacidade = capacidade or config.CACHE_SENTIMENTOS_TAMANHO
+        self._memoria = OrderedDict()
+        self._trava = threading.Lock()  # A pontuação pode rodar fora da thread principal
+        self._banco = None
+
+        caminho = config.ARQUIVO_CACHE_SENTIMENTOS if caminho is None else caminho
+        if caminho:
+            try:
+                pasta = os.path.dirname(caminho)
+                if pasta:
+                    os.makedirs(pasta, exist_ok=True)
+                self._banco = sqlite3.connect(caminho, check_same_thread=False)
+                self._banco.execute(
+                    'CREATE TABLE IF NOT EXISTS sentimentos ('
+                    'chave TEXT PRIMARY KEY, sentimento TEXT, score REAL, intensidade REAL, '
+                    'custo REAL, criado REAL, ativos TEXT)'
+                )
+                colunas = {linha[1] for linha in self._banco.execute('PRAGMA table_info(sentimentos)')}
+                if 'ativos' not in colunas:  # Arquivo de antes da marcação por ativo
+                    self._banco.execute('ALTER TABLE sentimentos ADD COLUMN ativos TEXT')
+                self._banco.commit()
+            except Exception as e:
+                logger.warning(f"⚠️ Cache de sentimentos em disco indisponível: {e}")
+                self._banco = None
+
+        # 📊 Contadores
+        self.acertos_memoria = 0
+        self.acertos_disco = 0
+        self.falhas = 0
+        self.tempo_economizado = 0.0  # Segundos de cálculo evitados pelos acertos
+
+    def chave(self, texto_normalizado):
+        return hashlib.sha1(f'{self.versao}\x00{texto_normalizado}'.encode('utf-8')).hexdigest()
+
+    def _lembrar(self, chave, analise, custo):
+        self._memoria[chave] = (analise, custo)
+        self._memoria.move_to_end(chave)
+        while len(self._memoria) > self.capacidade:
+            self._memoria.popitem(last=False)
+
+    def consultar(self, normalizado):
+        """Análise em cache para um texto já normalizado, ou None"""
+        chave = self.chave(normalizado)
+        with self._trava:
+            registro = self._memoria.get(chave)
+            if registro is not None:
+                self._memoria.move_to_end(chave)
+                self.acertos_memoria += 1
+                self.tempo_economizado += registro[1]
+                return registro[0]
+
+            if self._banco is not None:
+                linha = self._banco.execute(
+                    'SELECT sentimento, score, intensidade, custo, ativos FROM sentimentos WHERE chave = ?',
+                    (chave,)
+                ).fetchone()
+                if linha is not None:
+                    analise = {'sentimento': linha[0], 'score': linha[1], 'intensidade': linha[2],
+                               'ativos': linha[4].split(',') if linha[4] else []}
+                    self._lembrar(chave, analise, linha[3])
+                    self.acertos_disco += 1
+                    self.tempo_economizado += linha[3]
+                    return analise
+        return None
+
+    def guardar(self, normalizado, analise, custo):
+        """Registrar a análise recém-calculada (conta como falha de cache)"""
+        chave = self.chave(normalizado)
+        with self._trava:
+            self.falhas += 1
+            self._lembrar(chave, analise, custo)
+            if self._banco is not None:
+                try:
+                    self._banco.execute(
+                        'INSERT OR REPLACE INTO sentimentos VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        (chave, analise['sentimento'], analise['score'], analise['intensidade'],
+                         custo, time.time(), ','.join(analise.get('ativos', ())))
+                    )
+                    self._banco.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"⚠️ Erro ao gravar sentimento em disco: {e}")
+
+    def obter(self, texto, calcular):
+        """Análise do texto, chamando `calcular(texto_normalizado)` só em caso de falha"""
+        normalizado = normalizar_texto(texto)
+        analise = self.consultar(normalizado)
+        if analise is not None:
+            return analise
+
+        inicio = time.perf_counter()
+        analise = calcular(normalizado)
+        self.guardar(normalizado, analise, time.perf_counter() - inicio)
+        return analise
+
+    def fechar(self):
+        if self._banco is not None:
+            self._banco.close()
+            self._banco = None
+
+    def estatisticas(self):
+        acertos = self.acertos_memoria + self.acertos_disco
+        total = acertos + self.falhas
+        return {
+            'acertos_memoria': self.acertos_memoria,
+            'acertos_disco': self.acertos_disco,
+            'falhas': self.falhas,
+            'taxa_acerto': acertos / total if total else 0.0,
+            'tempo_economizado': self.tempo_economizado,
+        }
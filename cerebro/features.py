@@ -0,0 +1,334 @@
+import numpy as np
+import pandas as pd
+import logging
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger('MotorFeatures')
+
+# Esquema fixo de colunas (mesma ordem de extrair_features_simples)
+COLUNAS_FEATURES = (
+    'ret_1', 'ret_5', 'ret_15',
+    'sma_10', 'sma_20', 'price_vs_sma_10',
+    'vol_10', 'rsi', 'volume_ratio',
+    'high_10', 'low_10', 'dist_high', 'dist_low',
+    'trend',
+)
+INDICE_FEATURE = {nome: i for i, nome in enumerate(COLUNAS_FEATURES)}
+
+# Coluna opcional no fim: sentimento das notícias do ativo (NaN sem notícias)
+COLUNA_SENTIMENTO = 'sentimento'
+COLUNAS_COM_SENTIMENTO = COLUNAS_FEATURES + (COLUNA_SENTIMENTO,)
+
+MINIMO_CANDLES = 10
+PERIODO_RSI = 14
+PERIODO_TENDENCIA = 10
+
+# Médias móveis calculadas juntas: (série, janela)
+_MEDIAS = (('close', 10), ('close', 20), ('volume', 20), ('ganho', PERIODO_RSI), ('perda', PERIODO_RSI))
+
+
+def anexar_sentimento(matriz, sentimento):
+    """Matriz (pares, COLUNAS_COM_SENTIMENTO) a partir das features e do vetor por par"""
+    sentimento = np.asarray(sentimento, dtype=np.float64).reshape(-1, 1)
+    return np.concatenate([np.asarray(matriz, dtype=np.float64), sentimento], axis=1)
+
+
+class _MediasMoveis:
+    """Médias móveis de janela fixa com o mesmo algoritmo do pandas 2.x
+
+    Reproduz roll_mean (soma de Kahan com adições/remoções e contagem de
+    valores repetidos) vetorizado no eixo dos pares, para que o último valor
+    seja idêntico bit a bit a `serie.rolling(janela).mean().iloc[-1]`.
+    """
+
+    def __init__(self, forma):
+        self.nobs = np.zeros(forma)
+        self.soma = np.zeros(forma)
+        self.negativos = np.zeros(forma)
+        self.comp_add = np.zeros(forma)
+        self.comp_rem = np.zeros(forma)
+        self.repetidos = np.zeros(forma)
+        self.anterior = np.full(forma, np.nan)
+
+    def adicionar(self, val):
+        ok = val == val
+        if not ok.any():
+            return
+        if not ok.all():
+            return self._adicionar_parcial(val, ok)
+        y = val - self.comp_add
+        t = self.soma + y
+        self.comp_add = t - self.soma - y
+        self.soma = t
+        self.nobs += 1
+        self.negativos += np.signbit(val)
+        self.repetidos = np.where(val == self.anterior, self.repetidos + 1, 1)
+        self.anterior = val
+
+    def _adicionar_parcial(self, val, ok):
+        y = val - self.comp_add
+        t = self.soma + y
+        self.comp_add = np.where(ok, t - self.soma - y, self.comp_add)
+        self.soma = np.where(ok, t, self.soma)
+        self.nobs += ok
+        self.negativos += ok & np.signbit(val)
+        igual = val == self.anterior
+        self.repetidos = np.where(ok, np.where(igual, self.repetidos + 1, 1), self.repetidos)
+        self.anterior = np.where(ok, val, self.anterior)
+
+    def remover(self, val):
+        ok = val == val
+        if not ok.any():
+            return
+        y = -val - self.comp_rem
+        t = self.soma + y
+        if ok.all():
+            self.comp_rem = t - self.soma - y
+            self.soma = t
+            self.nobs -= 1
+            self.negativos -= np.signbit(val)
+            return
+        self.comp_rem = np.where(ok, t - self.soma - y, self.comp_rem)
+        self.soma = np.where(ok, t, self.soma)
+        self.nobs -= ok
+        self.negativos -= ok & np.signbit(val)
+
+    def resultado(self, minimo):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media = self.soma / self.nobs
+        media = np.where(self.repetidos >= self.nobs, self.anterior, media)
+        media = np.where((self.negativos == 0) & (media < 0), 0.0, media)
+        media = np.where((self.negativos == self.nobs) & (media > 0), 0.0, media)
+        return np.where((self.nobs >= minimo) & (self.nobs > 0), media, np.nan)
+
+
+class _Variancia:
+    """Variância móvel (Welford com Kahan) idêntica ao roll_var do pandas 2.x"""
+
+    def __init__(self, forma):
+        self.nobs = np.zeros(forma)
+        self.media = np.zeros(forma)
+        self.ssqdm = np.zeros(forma)
+        self.comp_add = np.zeros(forma)
+        self.comp_rem = np.zeros(forma)
+        self.repetidos = np.zeros(forma)
+        self.anterior = np.full(forma, np.nan)
+
+    def adicionar(self, val):
+        ok = val == val
+        if not ok.any():
+            return
+        nobs = self.nobs + ok
+        media_anterior = self.media - self.comp_add
+        y = val - self.comp_add
+        t = y - self.media
+        comp = t + self.media - y
+        media = self.media + t / nobs
+        ssqdm = self.ssqdm + (val - media_anterior) * (val - media)
+        repetidos = np.where(val == self.anterior, self.repetidos + 1, 1)
+
+        if ok.all():
+            self.comp_add, self.media, self.ssqdm = comp, media, ssqdm
+            self.repetidos, self.anterior = repetidos, val
+        else:
+            self.comp_add = np.where(ok, comp, self.comp_add)
+            self.media = np.where(ok, media, self.media)
+            self.ssqdm = np.where(ok, ssqdm, self.ssqdm)
+            self.repetidos = np.where(ok, repetidos, self.repetidos)
+            self.anterior = np.where(ok, val, self.anterior)
+        self.nobs = nobs
+
+    def remover(self, val):
+        ok = val == val
+        if not ok.any():
+            return
+        nobs = self.nobs - ok
+        media_anterior = self.media - self.comp_rem
+        y = val - self.comp_rem
+        t = y - self.media
+        comp = t + self.media - y
+        media = self.media - t / nobs
+        ssqdm = self.ssqdm - (val - media_anterior) * (val - media)
+
+        restam = ok & (nobs != 0)
+        if restam.all():
+            self.comp_rem, self.media, self.ssqdm = comp, media, ssqdm
+        else:
+            zerou = ok & (nobs == 0)
+            self.comp_rem = np.where(restam, comp, self.comp_rem)
+            self.media = np.where(restam, media, np.where(zerou, 0.0, self.media))
+            self.ssqdm = np.where(restam, ssqdm, np.where(zerou, 0.0, self.ssqdm))
+        self.nobs = nobs
+
+    def desvio(self, minimo, ddof=1):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            var = self.ssqdm / (self.nobs - ddof)
+        var = np.where((self.nobs == 1) | (self.repetidos >= self.nobs), 0.0, var)
+        var = np.where((self.nobs >= max(minimo, 1)) & (self.nobs > ddof), var, np.nan)
+        with np.errstate(invalid='ignore'):
+            desvio = np.sqrt(var)
+        return np.where(var < 0, 0.0, desvio)
+
+
+class MotorFeatures:
+    """Features de todos os pares numa única passada vetorizada
+
+    Recebe um tensor (pares, candles, OHLCV) — aceita também as 6 colunas do
+    BufferCandles, com timestamp na frente — e devolve uma matriz
+    (pares, len(COLUNAS_FEATURES)). Os valores são idênticos bit a bit aos de
+    `CerebroNeuralSimples.extrair_features_simples` par a par.
+
+    Pares com menos candles que os demais devem vir com NaN à esquerda e o
+    tamanho real em `comprimentos`; pares com menos de 10 candles ficam com a
+    linha toda NaN (o cálculo por par os ignora).
+    """
+
+    def __init__(self, tendencia_exata=True):
+        # polyfit par a par é o único passo não vetorizado; a forma fechada é
+        # vetorizada mas difere do polyfit na ordem de 1e-12 relativo
+        self.tendencia_exata = tendencia_exata
+
+        x = np.arange(PERIODO_TENDENCIA) + 0.0
+        lhs = np.vander(x, 2)
+        self._escala = np.sqrt((lhs * lhs).sum(axis=0))
+        self._lhs = lhs / self._escala
+        self._rcond = len(x) * np.finfo(x.dtype).eps
+        self._pesos_ols = (x - x.mean()) / ((x - x.mean()) ** 2).sum()
+
+    def calcular(self, candles, comprimentos=None):
+        candles = np.asarray(candles, dtype=np.float64)
+        n_pares, n_candles = candles.shape[:2]
+        ohlcv = candles[..., -5:]
+        high, low, close, volume = (ohlcv[..., k] for k in range(1, 5))
+
+        if comprimentos is None:
+            comprimentos = np.full(n_pares, n_candles)
+        comprimentos = np.asarray(comprimentos)
+
+        matriz = np.full((n_pares, len(COLUNAS_FEATURES)), np.nan)
+        if n_candles < MINIMO_CANDLES:
+            return matriz
+
+        ultimo = close[:, -1]
+
+        # Retornos (pct_change: x / x.shift(n) - 1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            retornos = np.full_like(close, np.nan)
+            retornos[:, 1:] = close[:, 1:] / close[:, :-1] - 1
+            for coluna, n in (('ret_1', 1), ('ret_5', 5), ('ret_15', 15)):
+                if n_candles > n:
+                    matriz[:, INDICE_FEATURE[coluna]] = ultimo / close[:, -1 - n] - 1
+
+        # Ganhos/perdas do RSI (delta.where(...).fillna(0), inclusive o -0.0)
+        delta = np.full_like(close, np.nan)
+        delta[:, 1:] = close[:, 1:] - close[:, :-1]
+        ganho = np.where(delta > 0, delta, 0.0)
+        perda = -np.where(delta < 0, delta, 0.0)
+
+        # Médias móveis e variância numa única varredura dos candles
+        series = np.stack([close, close, volume, ganho, perda], axis=-1)
+        janelas = np.array([janela for _, janela in _MEDIAS])
+        maior = janelas.max()
+        preenchido = np.concatenate([np.full((n_pares, maior, len(_MEDIAS)), np.nan), series], axis=1)
+        colunas = np.arange(len(_MEDIAS))
+
+        medias = _MediasMoveis((n_pares, len(_MEDIAS)))
+        variancia = _Variancia(n_pares)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for i in range(n_candles):
+                medias.remover(preenchido[:, maior + i - janelas, colunas])
+                medias.adicionar(series[:, i])
+                if i >= 10:
+                    variancia.remover(retornos[:, i - 10])
+                variancia.adicionar(retornos[:, i])
+
+        valores = medias.resultado(janelas)
+        sma_10, sma_20, volume_media, ganho_medio, perda_media = valores.T
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            matriz[:, INDICE_FEATURE['sma_10']] = sma_10
+            matriz[:, INDICE_FEATURE['sma_20']] = sma_20
+            matriz[:, INDICE_FEATURE['price_vs_sma_10']] = ultimo / sma_10 - 1
+            matriz[:, INDICE_FEATURE['vol_10']] = variancia.desvio(10)
+            matriz[:, INDICE_FEATURE['volume_ratio']] = volume[:, -1] / volume_media
+
+            rsi = 100 - (100 / (1 + ganho_medio / perda_media))
+            rsi = np.where(rsi < 0, 0.0, np.where(rsi > 100, 100.0, rsi))
+            rsi = np.where(perda_media == 0, 100.0, rsi)
+            matriz[:, INDICE_FEATURE['rsi']] = np.where(comprimentos < PERIODO_RSI, 50.0, rsi)
+
+            high_10 = high[:, -10:].max(axis=1)
+            low_10 = low[:, -10:].min(axis=1)
+            matriz[:, INDICE_FEATURE['high_10']] = high_10
+            matriz[:, INDICE_FEATURE['low_10']] = low_10
+            matriz[:, INDICE_FEATURE['dist_high']] = (high_10 - ultimo) / ultimo
+            matriz[:, INDICE_FEATURE['dist_low']] = (ultimo - low_10) / ultimo
+
+            matriz[:, INDICE_FEATURE['trend']] = self._tendencia(close[:, -PERIODO_TENDENCIA:]) / ultimo
+
+        matriz[comprimentos < MINIMO_CANDLES] = np.nan
+        return matriz
+
+    def _tendencia(self, janela):
+        """Inclinação da regressão linear dos últimos candles (por par)"""
+        if not self.tendencia_exata:
+            return janela @ self._pesos_ols
+
+        inclinacoes = np.zeros(len(janela))
+        for i, y in enumerate(janela):
+            try:
+                coef = np.linalg.lstsq(self._lhs, y, self._rcond)[0]
+                inclinacoes[i] = coef[0] / self._escala[0]
+            except Exception:
+                inclinacoes[i] = 0
+        return inclinacoes
+
+    def calcular_serie(self, ohlcv):
+        """Features de todas as barras de uma série (barras, OHLCV) em O(barras)
+
+        Cada linha usa só os candles até aquela barra, como o bot ao vivo; os
+        rolling do pandas correm sobre a série inteira em vez de reiniciar a
+        cada janela, então os valores diferem de `calcular` apenas no
+        arredondamento. As primeiras MINIMO_CANDLES - 1 linhas ficam NaN.
+        """
+        ohlcv = np.asarray(ohlcv, dtype=np.float64)[:, -5:]
+        matriz = np.full((len(ohlcv), len(COLUNAS_FEATURES)), np.nan)
+        if len(ohlcv) < MINIMO_CANDLES:
+            return matriz
+
+        high, low, close, volume = (pd.Series(ohlcv[:, k]) for k in range(1, 5))
+        ultimo = close.to_numpy()
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for coluna, n in (('ret_1', 1), ('ret_5', 5), ('ret_15', 15)):
+                matriz[:, INDICE_FEATURE[coluna]] = (close / close.shift(n) - 1).to_numpy()
+
+            sma_10 = close.rolling(10).mean().to_numpy()
+            matriz[:, INDICE_FEATURE['sma_10']] = sma_10
+            matriz[:, INDICE_FEATURE['sma_20']] = close.rolling(20).mean().to_numpy()
+            matriz[:, INDICE_FEATURE['price_vs_sma_10']] = ultimo / sma_10 - 1
+            matriz[:, INDICE_FEATURE['vol_10']] = (close / close.shift(1) - 1).rolling(10).std().to_numpy()
+            matriz[:, INDICE_FEATURE['volume_ratio']] = (volume / volume.rolling(20).mean()).to_numpy()
+
+            delta = close.diff()
+            ganho = delta.where(delta > 0, 0).fillna(0).rolling(PERIODO_RSI).mean().to_numpy()
+            perda = (-delta.where(delta < 0, 0)).fillna(0).rolling(PERIODO_RSI).mean().to_numpy()
+            rsi = np.clip(100 - (100 / (1 + ganho / perda)), 0, 100)
+            rsi = np.where(perda == 0, 100.0, rsi)
+            rsi[:PERIODO_RSI - 1] = 50.0
+            matriz[:, INDICE_FEATURE['rsi']] = rsi
+
+            high_10 = high.rolling(10).max().to_numpy()
+            low_10 = low.rolling(10).min().to_numpy()
+            matriz[:, INDICE_FEATURE['high_10']] = high_10
+            matriz[:, INDICE_FEATURE['low_10']] = low_10
+            matriz[:, INDICE_FEATURE['dist_high']] = (high_10 - ultimo) / ultimo
+            matriz[:, INDICE_FEATURE['dist_low']] = (ultimo - low_10) / ultimo
+
+            janelas = sliding_window_view(ultimo, PERIODO_TENDENCIA)
+            matriz[PERIODO_TENDENCIA - 1:, INDICE_FEATURE['trend']] = (
+                janelas @ self._pesos_ols / ultimo[PERIODO_TENDENCIA - 1:]
+            )
+
+        matriz[:MINIMO_CANDLES - 1] = np.nan
+        return matriz
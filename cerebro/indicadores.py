@@ -0,0 +1,387 @@
+import math
+import logging
+from collections import deque
+import numpy as np
+from cerebro.features import COLUNAS_FEATURES, MINIMO_CANDLES, PERIODO_RSI, PERIODO_TENDENCIA
+
+logger = logging.getLogger('Indicadores')
+
+NAN = float('nan')
+
+# Somas corridas acumulam erro de arredondamento; recalcular a cada N barras
+_RECALCULO = 1000
+
+
+class _Janela:
+    """Base dos indicadores incrementais
+
+    A janela é formada pelas barras fechadas mais a barra atual, que ainda
+    pode mudar. `adicionar(v)` abre uma barra nova (a atual é confirmada) e
+    `substituir(v)` troca o valor da barra atual; os dois são O(1).
+    """
+
+    def __init__(self, periodo):
+        self.periodo = periodo
+        self.atual = None
+        self._fechados = deque(maxlen=max(periodo - 1, 0))
+        self._confirmacoes = 0
+
+    @property
+    def pronto(self):
+        return self.atual is not None and len(self._fechados) == self._fechados.maxlen
+
+    def adicionar(self, valor):
+        if self.atual is not None:
+            self._confirmar(self.atual)
+        self.atual = valor
+
+    def substituir(self, valor):
+        self.atual = valor
+
+    def _confirmar(self, valor):
+        cheio = self._fechados.maxlen and len(self._fechados) == self._fechados.maxlen
+        saindo = self._fechados[0] if cheio else None
+        if self._fechados.maxlen:
+            self._fechados.append(valor)
+        self._entrou(valor, saindo)
+        self._confirmacoes += 1
+        if self._confirmacoes % _RECALCULO == 0:
+            self._recalcular()
+
+    def _entrou(self, valor, saindo):
+        pass
+
+    def _recalcular(self):
+        pass
+
+
+class SMAIncremental(_Janela):
+    """Média móvel simples por soma corrida"""
+
+    def __init__(self, periodo):
+        super().__init__(periodo)
+        self._soma = 0.0
+
+    def _entrou(self, valor, saindo):
+        self._soma += valor
+        if saindo is not None:
+            self._soma -= saindo
+
+    def _recalcular(self):
+        self._soma = math.fsum(self._fechados)
+
+    @property
+    def valor(self):
+        if not self.pronto:
+            return NAN
+        return (self._soma + self.atual) / self.periodo
+
+
+class DesvioPadraoIncremental(_Janela):
+    """Desvio padrão amostral móvel (somas deslocadas de x e x²)"""
+
+    def __init__(self, periodo, ddof=1):
+        super().__init__(periodo)
+        self.ddof = ddof
+        self._referencia = None  # Deslocamento contra cancelamento catastrófico
+        self._soma = 0.0
+        self._soma_quadrados = 0.0
+
+    def _entrou(self, valor, saindo):
+        if self._referencia is None:
+            self._referencia = valor
+        d = valor - self._referencia
+        self._soma += d
+        self._soma_quadrados += d * d
+        if saindo is not None:
+            d = saindo - self._referencia
+            self._soma -= d
+            self._soma_quadrados -= d * d
+
+    def _recalcular(self):
+        if not self._fechados:
+            return
+        self._referencia = math.fsum(self._fechados) / len(self._fechados)
+        desvios = [v - self._referencia for v in self._fechados]
+        self._soma = math.fsum(desvios)
+        self._soma_quadrados = math.fsum(d * d for d in desvios)
+
+    @property
+    def valor(self):
+        if not self.pronto or self.periodo <= self.ddof:
+            return NAN
+        referencia = self._referencia if self._referencia is not None else self.atual
+        d = self.atual - referencia
+        soma = self._soma + d
+        soma_quadrados = self._soma_quadrados + d * d
+        variancia = (soma_quadrados - soma * soma / self.periodo) / (self.periodo - self.ddof)
+        return math.sqrt(variancia) if variancia > 0 else 0.0
+
+
+class ExtremoIncremental(_Janela):
+    """Máxima (ou mínima) móvel com deque monotônico"""
+
+    def __init__(self, periodo, maximo=True):
+        super().__init__(periodo)
+        self.maximo = maximo
+        self._monotonico = deque()  # (índice, valor)
+        self._indice = 0
+
+    def _domina(self, a, b):
+        return a >= b if self.maximo else a <= b
+
+    def _entrou(self, valor, saindo):
+        while self._monotonico and self._domina(valor, self._monotonico[-1][1]):
+            self._monotonico.pop()
+        self._monotonico.append((self._indice, valor))
+        self._indice += 1
+        limite = self._indice - self._fechados.maxlen
+        while self._monotonico and self._monotonico[0][0] < limite:
+            self._monotonico.popleft()
+
+    @property
+    def valor(self):
+        if not self.pronto:
+            return NAN
+        if not self._monotonico:
+            return self.atual
+        fechado = self._monotonico[0][1]
+        return max(fechado, self.atual) if self.maximo else min(fechado, self.atual)
+
+
+class InclinacaoIncremental(_Janela):
+    """Inclinação OLS em forma fechada sobre x = 0..periodo-1"""
+
+    def __init__(self, periodo):
+        super().__init__(periodo)
+        n = periodo
+        self._soma_x = n * (n - 1) / 2
+        self._denominador = n * ((n - 1) * n * (2 * n - 1) / 6) - self._soma_x ** 2
+        self._soma_y = 0.0
+        self._soma_xy = 0.0
+
+    def _entrou(self, valor, saindo):
+        if saindo is None:
+            # Janela ainda enchendo: o novo valor fica em x = len - 1
+            self._soma_xy += (len(self._fechados) - 1) * valor
+            self._soma_y += valor
+        else:
+            # Desliza: todos os x caem 1 e o novo entra em x = periodo - 2
+            self._soma_xy += -(self._soma_y - saindo) + (self.periodo - 2) * valor
+            self._soma_y += valor - saindo
+
+    def _recalcular(self):
+        self._soma_y = math.fsum(self._fechados)
+        self._soma_xy = math.fsum(i * v for i, v in enumerate(self._fechados))
+
+    @property
+    def valor(self):
+        if not self.pronto:
+            return NAN
+        n = self.periodo
+        soma_y = self._soma_y + self.atual
+        soma_xy = self._soma_xy + (n - 1) * self.atual
+        return (n * soma_xy - self._soma_x * soma_y) / self._denominador
+
+
+class RSIIncremental:
+    """RSI incremental: 'sma' (igual a _calcular_rsi_manual) ou 'wilder'"""
+
+    def __init__(self, periodo=PERIODO_RSI, modo='sma'):
+        if modo not in ('sma', 'wilder'):
+            raise ValueError(f"Modo de RSI desconhecido: {modo}")
+        self.periodo = periodo
+        self.modo = modo
+        self.precos = 0
+        self._anterior = None  # Último preço fechado
+        self._atual = None
+        if modo == 'sma':
+            self._ganhos = SMAIncremental(periodo)
+            self._perdas = SMAIncremental(periodo)
+        else:
+            self._ganhos_semente = []
+            self._perdas_semente = []
+            self._ganho_medio = None
+            self._perda_medio = None
+            self._ganho_atual = self._perda_atual = 0.0
+
+    def _delta(self, preco):
+        if self._anterior is None:
+            return 0.0  # Primeiro preço: diff() é NaN e o original faz fillna(0)
+        return preco - self._anterior
+
+    def adicionar(self, preco):
+        if self._atual is not None:
+            if self.modo == 'wilder' and self._anterior is not None:
+                self._confirmar_wilder()
+            self._anterior = self._atual
+        self._atual = preco
+        self.precos += 1
+        delta = self._delta(preco)
+        if self.modo == 'sma':
+            self._ganhos.adicionar(max(delta, 0.0))
+            self._perdas.adicionar(max(-delta, 0.0))
+        else:
+            self._ganho_atual, self._perda_atual = max(delta, 0.0), max(-delta, 0.0)
+
+    def substituir(self, preco):
+        if self._atual is None:
+            return self.adicionar(preco)
+        self._atual = preco
+        delta = self._delta(preco)
+        if self.modo == 'sma':
+            self._ganhos.substituir(max(delta, 0.0))
+            self._perdas.substituir(max(-delta, 0.0))
+        else:
+            self._ganho_atual, self._perda_atual = max(delta, 0.0), max(-delta, 0.0)
+
+    def _confirmar_wilder(self):
+        n = self.periodo
+        if self._ganho_medio is None:
+            self._ganhos_semente.append(self._ganho_atual)
+            self._perdas_semente.append(self._perda_atual)
+            if len(self._ganhos_semente) == n:
+                self._ganho_medio = math.fsum(self._ganhos_semente) / n
+                self._perda_medio = math.fsum(self._perdas_semente) / n
+        else:
+            self._ganho_medio = (self._ganho_medio * (n - 1) + self._ganho_atual) / n
+            self._perda_medio = (self._perda_medio * (n - 1) + self._perda_atual) / n
+
+    def _medias(self):
+        n = self.periodo
+        if self.modo == 'sma':
+            return self._ganhos.valor, self._perdas.valor
+        if self._ganho_medio is not None:
+            return ((self._ganho_medio * (n - 1) + self._ganho_atual) / n,
+                    (self._perda_medio * (n - 1) + self._perda_atual) / n)
+        if self._anterior is not None and len(self._ganhos_semente) == n - 1:
+            return ((math.fsum(self._ganhos_semente) + self._ganho_atual) / n,
+                    (math.fsum(self._perdas_semente) + self._perda_atual) / n)
+        return NAN, NAN
+
+    @property
+    def valor(self):
+        ganho, perda = self._medias()
+        if math.isnan(ganho) or math.isnan(perda):
+            return NAN
+        if perda == 0:
+            return 100.0
+        rsi = 100 - (100 / (1 + ganho / perda))
+        return min(max(rsi, 0.0), 100.0)
+
+
+class ConjuntoIndicadores:
+    """As 14 features de um par mantidas incrementalmente, candle a candle
+
+    Serve tanto ao vivo (`sincronizar` com o BufferCandles) quanto em replay
+    (`atualizar` candle por candle). `features()` segue COLUNAS_FEATURES e as
+    mesmas regras de NaN/50 de extrair_features_simples; os valores batem com
+    o pandas até erro de arredondamento (somas corridas, não Kahan).
+    """
+
+    def __init__(self):
+        self.ultimo_timestamp = None
+        self.candles = 0
+        self._fechamentos = deque(maxlen=15)  # Fechamentos confirmados p/ retornos
+        self._close_atual = None
+
+        self.sma_10 = SMAIncremental(10)
+        self.sma_20 = SMAIncremental(20)
+        self.volume_20 = SMAIncremental(20)
+        self.vol_10 = DesvioPadraoIncremental(10)
+        self.rsi = RSIIncremental(PERIODO_RSI, 'sma')
+        self.high_10 = ExtremoIncremental(10, maximo=True)
+        self.low_10 = ExtremoIncremental(10, maximo=False)
+        self.tendencia = InclinacaoIncremental(PERIODO_TENDENCIA)
+        self._volume_atual = None
+
+    def _retorno(self, close):
+        if not self._fechamentos:
+            return None
+        return close / self._fechamentos[-1] - 1
+
+    def atualizar(self, candle):
+        """Aplicar um candle [timestamp, open, high, low, close, volume]"""
+        timestamp, _, high, low, close, volume = candle[:6]
+
+        if self.ultimo_timestamp is not None and timestamp < self.ultimo_timestamp:
+            return
+        nova_barra = self.ultimo_timestamp is None or timestamp > self.ultimo_timestamp
+
+        if nova_barra:
+            if self._close_atual is not None:
+                self._fechamentos.append(self._close_atual)
+            self.candles += 1
+            self.ultimo_timestamp = timestamp
+            operacao = 'adicionar'
+        else:
+            operacao = 'substituir'
+
+        self._close_atual = close
+        self._volume_atual = volume
+        for indicador, valor in (
+            (self.sma_10, close), (self.sma_20, close), (self.volume_20, volume),
+            (self.rsi, close), (self.high_10, high), (self.low_10, low),
+            (self.tendencia, close),
+        ):
+            getattr(indicador, operacao)(valor)
+
+        retorno = self._retorno(close)
+        if retorno is not None:
+            if nova_barra:
+                self.vol_10.adicionar(retorno)
+            else:
+                self.vol_10.substituir(retorno)
+
+    def aquecer(self, ohlcv):
+        """Alimentar com histórico (ex.: ArmazemHistorico) antes de operar"""
+        for candle in ohlcv:
+            self.atualizar(candle)
+
+    def sincronizar(self, buffer):
+        """Aplicar do BufferCandles só o que mudou desde a última chamada
+
+        Se o buffer não tem mais o último candle aplicado (foi limpo ou deu a
+        volta mais de uma vez), faltariam candles no meio: recomeça do buffer.
+        """
+        janela = buffer.janela()
+        if self.ultimo_timestamp is not None and (not len(janela) or janela[0, 0] > self.ultimo_timestamp):
+            self.__init__()
+        if self.ultimo_timestamp is not None:
+            inicio = np.searchsorted(janela[:, 0], self.ultimo_timestamp)
+            janela = janela[inicio:]
+        for candle in janela:
+            self.atualizar(candle)
+
+    def features(self):
+        """Vetor das 14 features na ordem de COLUNAS_FEATURES"""
+        if self.candles < MINIMO_CANDLES:
+            return np.full(len(COLUNAS_FEATURES), np.nan)
+
+        close = self._close_atual
+        fechamentos = self._fechamentos
+
+        def retorno(n):
+            if len(fechamentos) < n:
+                return NAN
+            return close / fechamentos[-n] - 1
+
+        sma_10 = self.sma_10.valor
+        high_10, low_10 = self.high_10.valor, self.low_10.valor
+        valores = {
+            'ret_1': retorno(1),
+            'ret_5': retorno(5),
+            'ret_15': retorno(15),
+            'sma_10': sma_10,
+            'sma_20': self.sma_20.valor,
+            'price_vs_sma_10': close / sma_10 - 1,
+            'vol_10': self.vol_10.valor,
+            'rsi': self.rsi.valor if self.candles >= PERIODO_RSI else 50.0,
+            'volume_ratio': self._volume_atual / self.volume_20.valor,
+            'high_10': high_10,
+            'low_10': low_10,
+            'dist_high': (high_10 - close) / close,
+            'dist_low': (close - low_10) / close,
+            'trend': self.tendencia.valor / close,
+        }
+        return np.array([valores[coluna] for coluna in COLUNAS_FEATURES])
@@ -0,0 +1,46 @@
+import re
+
+
+def _padrao_trie(trie):
+    """Regex de uma trie {caractere: subtrie, '': fim de palavra}, prefixos comuns fatorados"""
+    ramos = [re.escape(c) + _padrao_trie(filho) for c, filho in sorted(trie.items()) if c]
+    if not ramos:
+        return ''
+    padrao = ramos[0] if len(ramos) == 1 else '(?:' + '|'.join(ramos) + ')'
+    if '' in trie:
+        padrao = f'(?:{padrao})?'
+    return padrao
+
+
+class IndicePalavras:
+    """Casamento de muitas palavras-chave numa única varredura do texto
+
+    As palavras viram uma trie compilada num só regex (prefixos comuns
+    fatorados, então o custo por posição depende do tamanho da palavra e não
+    de quantas existem) e só casam como palavras inteiras. Cada palavra aponta
+    para um rótulo: um ativo ou uma polaridade.
+    """
+
+    def __init__(self, rotulos):
+        self.rotulos = {palavra.lower(): rotulo for palavra, rotulo in rotulos.items()}
+        trie = {}
+        for palavra in self.rotulos:
+            no = trie
+            for caractere in palavra:
+                no = no.setdefault(caractere, {})
+            no[''] = True
+        self._regex = re.compile(rf'(?<!\w){_padrao_trie(trie)}(?!\w)') if trie else None
+
+    def encontrar(self, texto):
+        """Palavras distintas do índice presentes no texto (sem diferenciar caixa)"""
+        if self._regex is None:
+            return set()
+        return set(self._regex.findall(texto.lower()))
+
+    def contar(self, texto):
+        """{rótulo: quantas palavras distintas daquele rótulo aparecem}"""
+        contagem = {}
+        for palavra in self.encontrar(texto):
+            rotulo = self.rotulos[palavra]
+            contagem[rotulo] = contagem.get(rotulo, 0) + 1
+        return contagem
@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import time
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import aiohttp
+from bs4 import BeautifulSoup
+from core.config import config
+
+logger = logging.getLogger('Noticias')
+
+_ATOM = '{http://www.w3.org/2005/Atom}'
+
+# Parâmetros de rastreamento: não mudam o artigo, só quem compartilhou
+_PREFIXOS_RASTREIO = ('utm_', 'mc_', '_hs')
+_PARAMETROS_RASTREIO = {'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', '_ga', 'ref', 'ref_src', 'cmpid', 'ocid'}
+
+
+def normalizar_url(url):
+    """URL canônica para deduplicação
+
+    Host minúsculo, sem / final, sem fragmento e sem parâmetros de
+    rastreamento; os demais parâmetros ficam (em ordem) porque podem
+    identificar o artigo (ex.: ?id=123).
+    """
+    partes = urlsplit(url.strip())
+    caminho = partes.path.rstrip('/') or '/'
+    parametros = sorted(
+        (nome, valor) for nome, valor in parse_qsl(partes.query, keep_blank_values=True)
+        if nome.lower() not in _PARAMETROS_RASTREIO and not nome.lower().startswith(_PREFIXOS_RASTREIO)
+    )
+    return urlunsplit((partes.scheme.lower(), partes.netloc.lower(), caminho, urlencode(parametros), ''))
+
+
+def _texto_html(html):
+    if not html:
+        return ''
+    if '<' not in html:
+        return html.strip()
+    return BeautifulSoup(html, 'html.parser').get_text(' ', strip=True)
+
+
+def _data(texto):
+    """Timestamp (s) de datas RSS (RFC 822) ou Atom (ISO 8601)"""
+    if not texto:
+        return None
+    texto = texto.strip()
+    try:
+        return parsedate_to_datetime(texto).timestamp()
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(texto.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def _filho(elemento, *nomes):
+    for nome in nomes:
+        encontrado = elemento.find(nome)
+        if encontrado is not None:
+            return encontrado
+    return None
+
+
+def _conteudo(elemento, *nomes):
+    encontrado = _filho(elemento, *nomes)
+    return (encontrado.text or '').strip() if encontrado is not None else ''
+
+
+def interpretar_feed(conteudo, fonte):
+    """Artigos de um feed RSS 2.0 ou Atom"""
+    raiz = ET.fromstring(conteudo)
+    artigos = []
+
+    for item in raiz.iter('item'):
+        artigos.append({
+            'guid': _conteudo(item, 'guid'),
+            'link': _conteudo(item, 'link'),
+            'titulo': _texto_html(_conteudo(item, 'title')),
+            'texto': _texto_html(_conteudo(item, 'description')),
+            'publicado': _data(_conteudo(item, 'pubDate')),
+            'fonte': fonte,
+        })
+
+    for entrada in raiz.iter(f'{_ATOM}entry'):
+        link = _filho(entrada, f'{_ATOM}link')
+        artigos.append({
+            'guid': _conteudo(entrada, f'{_ATOM}id'),
+            'link': link.get('href', '') if link is not None else '',
+            'titulo': _texto_html(_conteudo(entrada, f'{_ATOM}title')),
+            'texto': _texto_html(_conteudo(entrada, f'{_ATOM}summary', f'{_ATOM}content')),
+            'publicado': _data(_conteudo(entrada, f'{_ATOM}published', f'{_ATOM}updated')),
+            'fonte': fonte,
+        })
+
+    return [artigo for artigo in artigos if artigo['titulo']]
+
+
+class ColetorNoticias:
+    """Coleta concorrente de vários feeds RSS/Atom com GET condicional
+
+    Todas as fontes são consultadas ao mesmo tempo numa sessão HTTP com pool
+    de conexões. ETag/Last-Modified de cada fonte são reenviados, então um
+    feed sem novidades custa só um 304. Artigos repetidos (mesmo GUID ou
+    mesma URL, em qualquer fonte) são descartados.
+    """
+
+    def __init__(self, fontes=None, timeout=None, max_artigos=None):
+        self.fontes = list(fontes or config.FONTES_NOTICIAS)
+        self.timeout = aiohttp.ClientTimeout(total=timeout or config.TIMEOUT_NOTICIAS)
+        self.max_artigos = max_artigos or config.MAX_NOTICIAS
+        self._sessao = None
+        self._validadores = {}            # fonte -> {'etag', 'modificado'}
+        self._vistos = OrderedDict()      # guid/url -> None (LRU limitado)
+        self.artigos = OrderedDict()      # chave -> artigo, mais recentes no fim
+
+        # 📊 Contadores
+        self.requisicoes = 0
+        self.nao_modificados = 0
+        self.erros = 0
+        self.duplicados = 0
+
+    def _obter_sessao(self):
+        if self._sessao is None or self._sessao.closed:
+            self._sessao = aiohttp.ClientSession(
+                timeout=self.timeout,
+                connector=aiohttp.TCPConnector(limit=config.MAX_CONEXOES_NOTICIAS),
+                headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'},
+            )
+        return self._sessao
+
+    async def fechar(self):
+        if self._sessao is not None:
+            await self._sessao.close()
+            self._sessao = None
+
+    async def _buscar_fonte(self, url):
+        """Artigos de uma fonte, ou [] se não mudou desde a última consulta"""
+        cabecalhos = {}
+        validadores = self._validadores.get(url, {})
+        if validadores.get('etag'):
+            cabecalhos['If-None-Match'] = validadores['etag']
+        if validadores.get('modificado'):
+            cabecalhos['If-Modified-Since'] = validadores['modificado']
+
+        try:
+            async with self._obter_sessao().get(url, headers=cabecalhos) as resposta:
+                self.requisicoes += 1
+                if resposta.status == 304:
+                    self.nao_modificados += 1
+                    return []
+                resposta.raise_for_status()
+                conteudo = await resposta.read()
+                self._validadores[url] = {
+                    'etag': resposta.headers.get('ETag'),
+                    'modificado': resposta.headers.get('Last-Modified'),
+                }
+            fonte = urlsplit(url).netloc
+            return await asyncio.to_thread(interpretar_feed, conteudo, fonte)
+        except Exception as e:
+            self.erros += 1
+            logger.debug(f"❌ Erro ao coletar {url}: {e}")
+            return []
+
+    def _registrar(self, artigo):
+        """Guardar o artigo se for inédito; retorna False para duplicados"""
+        chaves = [c for c in (artigo['guid'], normalizar_url(artigo['link']) if artigo['link'] else '') if c]
+        if not chaves:
+            chaves = [f"{artigo['fonte']}:{artigo['titulo']}"]
+        if any(chave in self._vistos for chave in chaves):
+            self.duplicados += 1
+            return False
+
+        for chave in chaves:
+            self._vistos[chave] = None
+        while len(self._vistos) > self.max_artigos * 10:
+            self._vistos.popitem(last=False)
+
+        artigo['chave'] = chaves[0]
+        artigo.setdefault('coletado', time.time())
+        self.artigos[chaves[0]] = artigo
+        while len(self.artigos) > self.max_artigos:
+            self.artigos.popitem(last=False)
+        return True
+
+    async def coletar(self):
+        """Consultar todas as fontes em paralelo; retorna só os artigos inéditos"""
+        resultados = await asyncio.gather(*(self._buscar_fonte(url) for url in self.fontes))
+        novos = [artigo for artigos in resultados for artigo in artigos if self._registrar(artigo)]
+        if novos:
+            logger.info(f"📰 {len(novos)} notícias novas de {len(self.fontes)} fontes")
+        return novos
+
+    def recentes(self, limite=None):
+        """Artigos guardados, dos mais novos para os mais antigos"""
+        artigos = sorted(
+            self.artigos.values(),
+            key=lambda a: a['publicado'] or a['coletado'],
+            reverse=True
+        )
+        return artigos[:limite] if limite else artigos
+
+    def estatisticas(self):
+        return {
+            'requisicoes': self.requisicoes,
+            'nao_modificados': self.nao_modificados,
+            'erros': self.erros,
+            'duplicados': self.duplicados,
+            'artigos': len(self.artigos),
+        }
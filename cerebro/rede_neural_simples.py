@@ -2,15 +2,31 @@ import numpy as np
 import pandas as pd
 import logging
 from datetime import datetime
+from cerebro.features import MotorFeatures, COLUNAS_FEATURES, COLUNA_SENTIMENTO, anexar_sentimento
+from cerebro.regras import TabelaRegras
+from core.metricas import metricas
+
+DIRECOES = np.array(['SELL', 'HOLD', 'BUY'])
+COLUNAS_OHLCV = ['open', 'high', 'low', 'close', 'volume']
 
 logger = logging.getLogger('RedeNeuralSimples')
 
 class CerebroNeuralSimples:
     """Cérebro neural EXTREMAMENTE LEVE - Sem dependências pesadas"""
     
-    def __init__(self):
+    def __init__(self, regras=None):
+        self.motor_features = MotorFeatures()
+        self.regras = regras or TabelaRegras()
         logger.info("🧠 CÉREBRO NEURAL SIMPLES INICIALIZADO")
     
+    def extrair_features_lote(self, candles, comprimentos=None):
+        """Features de todos os pares de uma vez: (pares, candles, OHLCV) -> (pares, 14)"""
+        try:
+            return self.motor_features.calcular(candles, comprimentos)
+        except Exception as e:
+            logger.error(f"❌ Erro na extração de features em lote: {e}")
+            return np.full((len(candles), len(COLUNAS_FEATURES)), np.nan)
+    
     def extrair_features_simples(self, dados_mercado):
         """Extrair 15 features super simples"""
         try:
@@ -108,76 +124,24 @@ class CerebroNeuralSimples:
             if features.empty:
                 return self._previsao_segura()
             
-            # 🎯 ESTRATÉGIA DE DECISÃO SIMPLES MAS EFICAZ
-            buy_signals = 0
-            sell_signals = 0
-            
-            for feature_name, value in features.items():
-                if np.isnan(value):
-                    continue
-                    
-                # Sinal de COMPRA
-                if 'rsi' in feature_name and value < 35:
-                    buy_signals += 2
-                elif 'rsi' in feature_name and value < 45:
-                    buy_signals += 1
-                    
-                elif 'price_vs_sma' in feature_name and value < -0.02:
-                    buy_signals += 1
-                elif 'trend' in feature_name and value > 0.001:
-                    buy_signals += 1
-                elif 'dist_low' in feature_name and value < 0.02:
-                    buy_signals += 1
-                elif 'vol_10' in feature_name and value > 0.02:
-                    buy_signals += 1
-                    
-                # Sinal de VENDA  
-                elif 'rsi' in feature_name and value > 65:
-                    sell_signals += 2
-                elif 'rsi' in feature_name and value > 55:
-                    sell_signals += 1
-                    
-                elif 'price_vs_sma' in feature_name and value > 0.02:
-                    sell_signals += 1
-                elif 'trend' in feature_name and value < -0.001:
-                    sell_signals += 1
-                elif 'dist_high' in feature_name and value < 0.02:
-                    sell_signals += 1
-                elif 'vol_10' in feature_name and value > 0.03:
-                    sell_signals += 1
+            # 🎯 ESTRATÉGIA DE DECISÃO: tabela de regras, uma linha por par
+            pares = [par for par in dados_mercado if f'{par}_{COLUNAS_FEATURES[0]}' in features]
+            matriz = np.array(
+                [[features[f'{par}_{coluna}'] for coluna in COLUNAS_FEATURES] for par in pares],
+                dtype=np.float64
+            )
+            compra, venda = self.regras.pontuar(matriz)
+            buy_signals = int(compra.sum())
+            sell_signals = int(venda.sum())
             
-            # TOMADA DE DECISÃO
-            if buy_signals > sell_signals and buy_signals >= 3:
-                direction = "BUY"
-                confidence = min(60 + (buy_signals * 6), 80)
-            elif sell_signals > buy_signals and sell_signals >= 3:
-                direction = "SELL"
-                confidence = min(60 + (sell_signals * 6), 80)
-            else:
-                direction = "HOLD"
-                confidence = 50
-            
-            # Ajustar confiança baseada na qualidade dos dados
-            valid_features = sum(1 for f in features.values if not np.isnan(f))
-            if valid_features > 0:
-                data_quality = valid_features / len(features)
-                confidence = confidence * data_quality
-            
-            confidence = max(40, min(80, confidence))
-            
-            # Calcular probabilidades
-            if direction == "BUY":
-                prob_buy = confidence
-                prob_sell = (100 - confidence) * 0.4
-                prob_hold = 100 - prob_buy - prob_sell
-            elif direction == "SELL":
-                prob_sell = confidence
-                prob_buy = (100 - confidence) * 0.4
-                prob_hold = 100 - prob_sell - prob_buy
-            else:
-                prob_hold = confidence
-                prob_buy = (100 - confidence) * 0.3
-                prob_sell = (100 - confidence) * 0.3
+            # TOMADA DE DECISÃO (confiança ajustada pela qualidade dos dados)
+            valid_features = int(np.count_nonzero(~np.isnan(matriz)))
+            direcao, confianca, probabilidades = self.regras.decidir(
+                buy_signals, sell_signals, valid_features, len(features)
+            )
+            direction = str(DIRECOES[direcao])
+            confidence = float(confianca)
+            prob_sell, prob_hold, prob_buy = probabilidades
             
             return {
                 'direcao': direction,
@@ -197,6 +161,86 @@ class CerebroNeuralSimples:
             logger.error(f"❌ Erro na previsão: {e}")
             return self._previsao_segura()
     
+    def prever_lote(self, matriz):
+        """Direções, confianças e probabilidades de todos os pares numa chamada
+        
+        `matriz` é a saída de `extrair_features_lote` (pares, 14); linhas sem
+        nenhuma feature válida saem como HOLD com 'valida' False. A coluna
+        opcional de sentimento (NaN sem notícias do ativo ou com o snapshot
+        velho) fica fora da conta de qualidade que reduz a confiança.
+        """
+        matriz = np.asarray(matriz, dtype=np.float64)
+        compra, venda = self.regras.pontuar(matriz)
+        candles = matriz[:, :len(COLUNAS_FEATURES)]
+        validas = np.count_nonzero(~np.isnan(candles), axis=1)
+        direcao, confianca, probabilidades = self.regras.decidir(
+            compra, venda, validas, candles.shape[1]
+        )
+        return {
+            'direcoes': DIRECOES[direcao],
+            'confiancas': confianca,
+            'probabilidades': probabilidades,  # Colunas: SELL, HOLD, BUY
+            'sinais': np.stack([compra, venda], axis=-1),
+            'valida': validas > 0,
+        }
+    
+    def prever_pares(self, dados_mercado, pares, timeframe='15m', sentimento=None):
+        """Previsões por par (mesmo formato de `prever`) numa única passada
+        
+        `sentimento` é um callable pares -> vetor (ex.: `SnapshotSentimento.por_par`),
+        usado só quando a tabela de regras tem a coluna de sentimento.
+        """
+        pares = [par for par in pares if timeframe in (dados_mercado.get(par) or {})]
+        if not pares:
+            return []
+        
+        janelas = [dados_mercado[par][timeframe][COLUNAS_OHLCV].to_numpy(dtype=np.float64) for par in pares]
+        n = max(len(janela) for janela in janelas)
+        candles = np.full((len(pares), n, len(COLUNAS_OHLCV)), np.nan)
+        comprimentos = np.array([len(janela) for janela in janelas])
+        for i, janela in enumerate(janelas):
+            if len(janela):
+                candles[i, n - len(janela):] = janela
+        
+        with metricas.medir('tavares_ciclo_estagio_segundos', estagio='features'):
+            matriz = self.extrair_features_lote(candles, comprimentos)
+        return self.prever_matriz(pares, matriz, sentimento)
+    
+    def prever_matriz(self, pares, matriz, sentimento=None):
+        """Previsões por par a partir da matriz (pares, 14) já calculada (ex.: `ArmazemCandles.features`)"""
+        if not pares:
+            return []
+        if COLUNA_SENTIMENTO in self.regras.colunas:
+            vetor = sentimento(pares) if sentimento is not None else np.full(len(pares), np.nan)
+            matriz = anexar_sentimento(matriz, vetor)
+        with metricas.medir('tavares_ciclo_estagio_segundos', estagio='regras'):
+            lote = self.prever_lote(matriz)
+        
+        previsoes = []
+        agora = datetime.now().isoformat()
+        for i, par in enumerate(pares):
+            if not lote['valida'][i]:
+                previsao = self._previsao_segura()
+            else:
+                prob_sell, prob_hold, prob_buy = lote['probabilidades'][i]
+                compra, venda = lote['sinais'][i]
+                previsao = {
+                    'direcao': str(lote['direcoes'][i]),
+                    'confianca': float(lote['confiancas'][i]),
+                    'probabilidades': {
+                        'SELL': float(prob_sell),
+                        'HOLD': float(prob_hold),
+                        'BUY': float(prob_buy)
+                    },
+                    'timestamp': agora,
+                    'modelo': 'LOGICA_SIMPLES',
+                    'total_features': matriz.shape[1],
+                    'signals': {'buy': int(compra), 'sell': int(venda)}
+                }
+            previsao['par'] = par
+            previsoes.append(previsao)
+        return previsoes
+    
     def _previsao_segura(self):
         """Previsão segura em caso de erro"""
         return {
@@ -0,0 +1,165 @@
+import json
+import logging
+import numpy as np
+from cerebro.features import COLUNAS_FEATURES
+
+logger = logging.getLogger('RegrasSinais')
+
+LADOS = ('BUY', 'SELL')
+
+# Limiares das regras padrão (o que o otimizador varia)
+PARAMETROS_PADRAO = {
+    'rsi_compra_forte': 35,
+    'rsi_compra': 45,
+    'rsi_venda': 55,
+    'rsi_venda_forte': 65,
+    'desvio_sma': 0.02,
+    'tendencia': 0.001,
+    'distancia_extremo': 0.02,
+    'volatilidade': 0.02,
+}
+
+
+def montar_regras(parametros=None):
+    """Regras padrão com os limiares de `parametros` (faltantes vêm de PARAMETROS_PADRAO)
+
+    Equivalente à cadeia elif original de `prever`: por feature vale só a
+    primeira regra que casar, na ordem da tabela. A antiga regra
+    "vol_10 > 0.03 -> SELL" ficou de fora: era sempre sombreada por
+    "vol_10 > 0.02 -> BUY" e nunca disparava.
+    """
+    p = {**PARAMETROS_PADRAO, **(parametros or {})}
+    return [
+        {'feature': 'rsi', 'operador': '<', 'limiar': p['rsi_compra_forte'], 'lado': 'BUY', 'peso': 2},
+        {'feature': 'rsi', 'operador': '<', 'limiar': p['rsi_compra'], 'lado': 'BUY', 'peso': 1},
+        {'feature': 'price_vs_sma_10', 'operador': '<', 'limiar': -p['desvio_sma'], 'lado': 'BUY', 'peso': 1},
+        {'feature': 'trend', 'operador': '>', 'limiar': p['tendencia'], 'lado': 'BUY', 'peso': 1},
+        {'feature': 'dist_low', 'operador': '<', 'limiar': p['distancia_extremo'], 'lado': 'BUY', 'peso': 1},
+        {'feature': 'vol_10', 'operador': '>', 'limiar': p['volatilidade'], 'lado': 'BUY', 'peso': 1},
+        {'feature': 'rsi', 'operador': '>', 'limiar': p['rsi_venda_forte'], 'lado': 'SELL', 'peso': 2},
+        {'feature': 'rsi', 'operador': '>', 'limiar': p['rsi_venda'], 'lado': 'SELL', 'peso': 1},
+        {'feature': 'price_vs_sma_10', 'operador': '>', 'limiar': p['desvio_sma'], 'lado': 'SELL', 'peso': 1},
+        {'feature': 'trend', 'operador': '<', 'limiar': -p['tendencia'], 'lado': 'SELL', 'peso': 1},
+        {'feature': 'dist_high', 'operador': '<', 'limiar': p['distancia_extremo'], 'lado': 'SELL', 'peso': 1},
+    ]
+
+
+REGRAS_PADRAO = montar_regras()
+
+DECISAO_PADRAO = {
+    'sinais_minimos': 3,       # Sinais para sair do HOLD
+    'confianca_base': 60,      # confiança = base + sinais * por_sinal
+    'confianca_por_sinal': 6,
+    'confianca_maxima': 80,
+    'confianca_minima': 40,
+}
+
+
+class TabelaRegras:
+    """Tabela de regras de sinal compilada em arrays NumPy
+
+    Cada regra é {'feature', 'operador' ('<' ou '>'), 'limiar', 'lado', 'peso'}.
+    Novas regras entram por JSON (`carregar`), sem novos ramos em Python.
+    """
+
+    def __init__(self, regras=None, decisao=None, colunas=COLUNAS_FEATURES):
+        self.regras = [dict(regra) for regra in (regras or REGRAS_PADRAO)]
+        self.decisao = {**DECISAO_PADRAO, **(decisao or {})}
+        self.colunas = tuple(colunas)
+        self._compilar()
+
+    @classmethod
+    def carregar(cls, caminho=None, colunas=COLUNAS_FEATURES):
+        """Tabela de um JSON {'regras': [...], 'decisao': {...}}; padrão se caminho vazio"""
+        if not caminho:
+            return cls(colunas=colunas)
+        with open(caminho, encoding='utf-8') as arquivo:
+            dados = json.load(arquivo)
+        logger.info(f"📐 Regras de sinal carregadas de {caminho}")
+        return cls(dados.get('regras'), dados.get('decisao'), colunas)
+
+    @classmethod
+    def de_parametros(cls, parametros, colunas=COLUNAS_FEATURES):
+        """Tabela padrão com limiares e parâmetros de decisão sobrescritos por um dict plano"""
+        regras = {k: v for k, v in parametros.items() if k in PARAMETROS_PADRAO}
+        decisao = {k: v for k, v in parametros.items() if k in DECISAO_PADRAO}
+        return cls(montar_regras(regras), decisao, colunas)
+
+    def _compilar(self):
+        indice = {nome: i for i, nome in enumerate(self.colunas)}
+        colunas, maior_que, limiares, lados, pesos = [], [], [], [], []
+
+        for regra in self.regras:
+            if regra['feature'] not in indice:
+                raise ValueError(f"Feature desconhecida na regra: {regra['feature']}")
+            if regra['operador'] not in ('<', '>'):
+                raise ValueError(f"Operador inválido na regra: {regra['operador']}")
+            if regra['lado'] not in LADOS:
+                raise ValueError(f"Lado inválido na regra: {regra['lado']}")
+            colunas.append(indice[regra['feature']])
+            maior_que.append(regra['operador'] == '>')
+            limiares.append(float(regra['limiar']))
+            lados.append(LADOS.index(regra['lado']))
+            pesos.append(float(regra.get('peso', 1)))
+
+        self._colunas = np.array(colunas, dtype=np.int64)
+        self._maior_que = np.array(maior_que, dtype=bool)
+        self._limiares = np.array(limiares)
+        self._lados = np.array(lados, dtype=np.int64)
+        self._pesos = np.array(pesos)
+        self._avisar_sombreadas()
+
+    def _avisar_sombreadas(self):
+        """Regras que uma anterior da mesma feature sempre captura nunca disparam"""
+        for j, regra in enumerate(self.regras):
+            for i in range(j):
+                if self._colunas[i] != self._colunas[j] or self._maior_que[i] != self._maior_que[j]:
+                    continue
+                if self._maior_que[i]:
+                    sombreia = self._limiares[i] <= self._limiares[j]
+                else:
+                    sombreia = self._limiares[i] >= self._limiares[j]
+                if sombreia:
+                    logger.warning(f"⚠️ Regra inalcançável: {regra} (sombreada por {self.regras[i]})")
+                    break
+
+    def pontuar(self, matriz):
+        """Sinais de compra e venda por linha de uma matriz (pares, features)"""
+        matriz = np.asarray(matriz, dtype=np.float64)
+        valores = matriz[:, self._colunas]
+        with np.errstate(invalid='ignore'):
+            casou = np.where(self._maior_que, valores > self._limiares, valores < self._limiares)
+
+        pontos = np.zeros((len(matriz), len(LADOS)))
+        livre = np.ones((len(matriz), len(self.colunas)), dtype=bool)
+        for r, coluna in enumerate(self._colunas):
+            efetiva = casou[:, r] & livre[:, coluna]
+            livre[:, coluna] &= ~casou[:, r]
+            pontos[:, self._lados[r]] += efetiva * self._pesos[r]
+        return pontos[:, 0], pontos[:, 1]
+
+    def decidir(self, compra, venda, validas, total):
+        """Direção (0=SELL, 1=HOLD, 2=BUY), confiança e probabilidades [SELL, HOLD, BUY]"""
+        d = self.decisao
+        compra, venda = np.asarray(compra, dtype=np.float64), np.asarray(venda, dtype=np.float64)
+
+        comprar = (compra > venda) & (compra >= d['sinais_minimos'])
+        vender = (venda > compra) & (venda >= d['sinais_minimos'])
+        sinais = np.where(comprar, compra, venda)
+        confianca = np.where(
+            comprar | vender,
+            np.minimum(d['confianca_base'] + sinais * d['confianca_por_sinal'], d['confianca_maxima']),
+            50.0
+        )
+
+        validas = np.asarray(validas, dtype=np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            confianca = np.where(validas > 0, confianca * (validas / total), confianca)
+        confianca = np.maximum(d['confianca_minima'], np.minimum(d['confianca_maxima'], confianca))
+
+        direcao = np.where(comprar, 2, np.where(vender, 0, 1))
+        resto = 100 - confianca
+        prob_buy = np.where(comprar, confianca, np.where(vender, resto * 0.4, resto * 0.3))
+        prob_sell = np.where(vender, confianca, np.where(comprar, resto * 0.4, resto * 0.3))
+        prob_hold = np.where(comprar | vender, 100 - confianca - resto * 0.4, confianca)
+        return direcao, confianca, np.stack([prob_sell, prob_hold, prob_buy], axis=-1)
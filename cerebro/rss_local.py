@@ -0,0 +1,100 @@
+import asyncio
+import hashlib
+import logging
+from email.utils import formatdate
+from xml.sax.saxutils import escape
+from aiohttp import web
+
+logger = logging.getLogger('RSSLocal')
+
+
+class ServidorRSSLocal:
+    """Servidor HTTP local que serve feeds RSS/Atom com ETag e Last-Modified
+
+    Responde 304 a GETs condicionais quando o feed não mudou, como os feeds
+    reais. `atrasos` segura a resposta de um caminho por alguns segundos (fonte
+    lenta). Serve para exercitar o ColetorNoticias sem internet.
+    """
+
+    def __init__(self, host='127.0.0.1', porta=0):
+        self.host = host
+        self.porta = porta
+        self._runner = None
+        self._feeds = {}  # caminho -> (conteúdo, content-type, etag, last-modified)
+        self.atrasos = {}  # caminho -> segundos antes de responder
+        self.requisicoes = {}
+        self.respostas_304 = {}
+
+    def url(self, caminho):
+        return f"http://{self.host}:{self.porta}/{caminho.lstrip('/')}"
+
+    async def _handler(self, request):
+        caminho = request.match_info['caminho']
+        self.requisicoes[caminho] = self.requisicoes.get(caminho, 0) + 1
+        if self.atrasos.get(caminho):
+            await asyncio.sleep(self.atrasos[caminho])
+        if caminho not in self._feeds:
+            return web.Response(status=404)
+
+        conteudo, tipo, etag, modificado = self._feeds[caminho]
+        # Como no HTTP: If-None-Match, quando presente, tem precedência
+        if 'If-None-Match' in request.headers:
+            inalterado = request.headers['If-None-Match'] == etag
+        else:
+            inalterado = request.headers.get('If-Modified-Since') == modificado
+        if inalterado:
+            self.respostas_304[caminho] = self.respostas_304.get(caminho, 0) + 1
+            return web.Response(status=304, headers={'ETag': etag, 'Last-Modified': modificado})
+
+        return web.Response(body=conteudo, content_type=tipo,
+                            headers={'ETag': etag, 'Last-Modified': modificado})
+
+    async def iniciar(self):
+        app = web.Application()
+        app.router.add_get('/{caminho:.+}', self._handler)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.porta)
+        await site.start()
+        self.porta = site._server.sockets[0].getsockname()[1]
+        logger.info(f"🧪 RSS local em http://{self.host}:{self.porta}")
+        return f"http://{self.host}:{self.porta}"
+
+    async def parar(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def _publicar(self, caminho, conteudo, tipo):
+        conteudo = conteudo.encode('utf-8')
+        etag = f'"{hashlib.md5(conteudo).hexdigest()}"'
+        self._feeds[caminho.lstrip('/')] = (conteudo, tipo, etag, formatdate(usegmt=True))
+        return self.url(caminho)
+
+    def publicar_rss(self, caminho, itens):
+        """Publicar um RSS 2.0; itens são dicts com titulo, link, texto e opcionais guid/publicado"""
+        corpo = ''.join(
+            '<item>'
+            f"<title>{escape(item['titulo'])}</title>"
+            f"<link>{escape(item.get('link', ''))}</link>"
+            f"<description>{escape(item.get('texto', ''))}</description>"
+            + (f"<guid>{escape(item['guid'])}</guid>" if item.get('guid') else '')
+            + (f"<pubDate>{formatdate(item['publicado'], usegmt=True)}</pubDate>" if item.get('publicado') else '')
+            + '</item>'
+            for item in itens
+        )
+        xml = f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>local</title>{corpo}</channel></rss>'
+        return self._publicar(caminho, xml, 'application/rss+xml')
+
+    def publicar_atom(self, caminho, itens):
+        """Publicar um feed Atom com os mesmos itens de `publicar_rss`"""
+        corpo = ''.join(
+            '<entry>'
+            f"<title>{escape(item['titulo'])}</title>"
+            f"<link href=\"{escape(item.get('link', ''))}\"/>"
+            f"<id>{escape(item.get('guid') or item.get('link', ''))}</id>"
+            f"<summary>{escape(item.get('texto', ''))}</summary>"
+            '</entry>'
+            for item in itens
+        )
+        xml = f'<?xml version="1.0" encoding="UTF-8"?><feed xmlns="http://www.w3.org/2005/Atom"><title>local</title>{corpo}</feed>'
+        return self._publicar(caminho, xml, 'application/atom+xml')
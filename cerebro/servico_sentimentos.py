@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from types import MappingProxyType
+import numpy as np
+from cerebro.analise_sentimentos import _iniciar_processo
+from core.config import config
+
+logger = logging.getLogger('ServicoSentimentos')
+
+
+def congelar(valor):
+    """Cópia somente leitura de dicts/listas aninhados"""
+    if isinstance(valor, dict):
+        return MappingProxyType({chave: congelar(v) for chave, v in valor.items()})
+    if isinstance(valor, list):
+        return tuple(congelar(v) for v in valor)
+    return valor
+
+
+class SnapshotSentimento(Mapping):
+    """Último resultado publicado pelo serviço, somente leitura
+
+    Lê-se como o dict de `analisar_sentimento_mercado` e ainda informa a
+    `idade` (segundos desde a publicação) e se está `obsoleto`.
+    """
+
+    __slots__ = ('_dados', 'publicado_em', 'max_idade')
+
+    def __init__(self, dados, publicado_em, max_idade):
+        object.__setattr__(self, '_dados', congelar(dict(dados)))
+        object.__setattr__(self, 'publicado_em', publicado_em)
+        object.__setattr__(self, 'max_idade', max_idade)
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError('snapshot de sentimento é imutável')
+
+    def __getitem__(self, chave):
+        return self._dados[chave]
+
+    def __iter__(self):
+        return iter(self._dados)
+
+    def __len__(self):
+        return len(self._dados)
+
+    @property
+    def idade(self):
+        if self.publicado_em is None:
+            return None
+        return time.monotonic() - self.publicado_em
+
+    @property
+    def obsoleto(self):
+        return self.publicado_em is None or self.idade > self.max_idade
+
+    def por_par(self, pares):
+        """Vetor de sentimento alinhado a `pares`; NaN para ativos sem notícias"""
+        por_ativo = self._dados.get('por_ativo', {})
+        return np.array([
+            por_ativo[par.split('/')[0]]['score'] if par.split('/')[0] in por_ativo else np.nan
+            for par in pares
+        ], dtype=np.float64)
+
+
+class ServicoSentimentos:
+    """Sentimento de mercado atualizado em segundo plano, no seu próprio ritmo
+
+    Coleta e pontuação rodam numa tarefa separada (a pontuação num pool de
+    processos); o ciclo de trading e o /sentimento só leem `snapshot`, que
+    é trocado de uma vez a cada atualização e nunca espera notícias.
+    """
+
+    def __init__(self, analisador, intervalo=None, max_idade=None, processos=None):
+        self.analisador = analisador
+        self.intervalo = intervalo or config.INTERVALO_SENTIMENTO
+        self.max_idade = max_idade or config.IDADE_MAXIMA_SENTIMENTO
+        self.processos = config.PROCESSOS_SENTIMENTO if processos is None else processos
+        self._executor = None
+        self._tarefa = None
+        self._snapshot = SnapshotSentimento({
+            'sentimento_geral': 'NEUTRO',
+            'score_medio': 0,
+            'intensidade': 0,
+            'total_noticias': 0,
+            'por_ativo': {},
+            'timestamp': datetime.now().isoformat()
+        }, None, self.max_idade)
+
+        # 📊 Contadores
+        self.atualizacoes = 0
+        self.falhas = 0
+        self.duracao_ultima = 0.0
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    async def atualizar(self):
+        """Coletar, pontuar e publicar um novo snapshot"""
+        inicio = time.perf_counter()
+        resultado = await self.analisador.analisar_sentimento_mercado(self._executor)
+        self.duracao_ultima = time.perf_counter() - inicio
+
+        # Sem notícias o analisador devolve uma estimativa simulada; um
+        # snapshot real anterior vale mais, mesmo envelhecendo
+        if resultado.get('simulado') and self._snapshot.publicado_em is not None \
+                and not self._snapshot.get('simulado'):
+            logger.warning("⚠️ Sem notícias novas, mantendo o último sentimento real")
+            return self._snapshot
+
+        self._snapshot = SnapshotSentimento(resultado, time.monotonic(), self.max_idade)
+        self.atualizacoes += 1
+        return self._snapshot
+
+    async def _executar(self):
+        while True:
+            try:
+                await self.atualizar()
+            except Exception as e:
+                self.falhas += 1
+                logger.error(f"❌ Erro ao atualizar sentimento: {e}")
+            await asyncio.sleep(self.intervalo)
+
+    def iniciar(self):
+        """Agendar a tarefa de atualização no event loop corrente"""
+        if self._tarefa is not None:
+            return
+        if self.processos > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processos,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_iniciar_processo
+            )
+        self._tarefa = asyncio.create_task(self._executar())
+        logger.info(f"📰 Serviço de sentimento a cada {self.intervalo}s "
+                    f"({self.processos or 'sem'} processos de pontuação)")
+
+    async def parar(self):
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        await self.analisador.fechar()
+
+    def estatisticas(self):
+        return {
+            'atualizacoes': self.atualizacoes,
+            'falhas': self.falhas,
+            'duracao_ultima': self.duracao_ultima,
+            'idade': self._snapshot.idade,
+            'obsoleto': self._snapshot.obsoleto,
+        }
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+from core.candles import duracao_timeframe_ms
+from core.config import config
+
+logger = logging.getLogger('Agenda')
+
+
+def proximo_fechamento(agora_ms, timeframe, atraso_ms=0):
+    """Instante (ms) do próximo fechamento de candle de `timeframe` após `agora_ms`, mais o atraso
+
+    Os candles da Bybit abrem em múltiplos da duração contados da época (UTC).
+    """
+    duracao = duracao_timeframe_ms(timeframe)
+    return (agora_ms - atraso_ms) // duracao * duracao + duracao + atraso_ms
+
+
+class AgendaCandles:
+    """Espera alinhada aos fechamentos de candle, pelo relógio da exchange
+
+    Cada espera é calculada do relógio até a próxima fronteira, e não somada
+    à duração do ciclo anterior, então o início dos ciclos não deriva. O
+    atraso dá tempo à exchange para consolidar a barra que acabou de fechar;
+    um ciclo que passe de uma fronteira perde essa vez e segue na seguinte.
+    """
+
+    def __init__(self, relogio, timeframes=None, atraso=None):
+        self.relogio = relogio  # Função sem argumentos -> ms (BybitManager.agora_ms)
+        self.timeframes = list(timeframes or config.TIMEFRAMES_AGENDA)
+        self.atraso_ms = int((config.ATRASO_FECHAMENTO if atraso is None else atraso) * 1000)
+        self._ultimo = None  # Instante do último disparo
+
+        # 📊 Contadores
+        self.disparos = 0
+        self.perdidos = 0  # Fronteiras que passaram com o ciclo ainda rodando
+
+    def proximo(self, agora_ms=None):
+        """(instante em ms, timeframes que fecham nele) do próximo disparo"""
+        agora_ms = self.relogio() if agora_ms is None else agora_ms
+        instantes = {tf: proximo_fechamento(agora_ms, tf, self.atraso_ms) for tf in self.timeframes}
+        instante = min(instantes.values())
+        return instante, [tf for tf, quando in instantes.items() if quando == instante]
+
+    async def aguardar(self):
+        """Dormir até a próxima fronteira; retorna os timeframes que fecharam"""
+        agora = self.relogio()
+        instante, fechados = self.proximo(agora)
+        if self._ultimo is not None:
+            # Fronteiras entre o último disparo e agora ficaram para trás
+            perdidos = max(
+                (agora - self.atraso_ms) // duracao - (self._ultimo - self.atraso_ms) // duracao
+                for duracao in map(duracao_timeframe_ms, self.timeframes)
+            )
+            if perdidos:
+                self.perdidos += perdidos
+                logger.warning(f"⏱️ {perdidos} fechamento(s) de candle perdidos com o ciclo em execução")
+
+        await asyncio.sleep(max(0.0, (instante - agora) / 1000))
+        self._ultimo = instante
+        self.disparos += 1
+        logger.debug(f"🕯️ Fechamento de {', '.join(fechados)}")
+        return fechados
+
+    def estatisticas(self):
+        instante, fechados = self.proximo()
+        return {
+            'disparos': self.disparos,
+            'perdidos': self.perdidos,
+            'proximo_em': max(0.0, (instante - self.relogio()) / 1000),
+            'proximos': fechados,
+        }
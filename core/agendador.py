@@ -0,0 +1,250 @@
+import asyncio
+import contextvars
+import functools
+import heapq
+import itertools
+import logging
+import time
+import ccxt.async_support as ccxt
+from core.config import config
+from core.metricas import metricas
+
+logger = logging.getLogger('Agendador')
+
+# Faixas em ordem de prioridade: com o teto global esgotado, a primeira da lista sai antes
+CATEGORIAS = ('ordens', 'saldo', 'tickers', 'ohlcv', 'metadados')
+
+# create_market_*_order não entram: no ccxt elas chamam create_order, que já é agendado
+METODOS_CATEGORIA = {
+    'create_order': 'ordens',
+    'cancel_order': 'ordens',
+    'fetch_order': 'ordens',
+    'fetch_balance': 'saldo',
+    'fetch_ticker': 'tickers',
+    'fetch_tickers': 'tickers',
+    'fetch_order_book': 'tickers',
+    'fetch_ohlcv': 'ohlcv',
+    'load_markets': 'metadados',
+}
+
+# Tokens por chamada (padrão 1): as que fazem várias requisições na Bybit pesam mais
+PESOS = {'load_markets': 5, 'fetch_tickers': 2}
+
+# Leituras idênticas em voo são agrupadas; duas ordens iguais são duas ordens
+CATEGORIAS_AGRUPAVEIS = frozenset({'saldo', 'tickers', 'ohlcv', 'metadados'})
+
+# Dentro de uma chamada já agendada (ex.: o load_markets interno do ccxt) não se agenda de novo
+_AGENDADO = contextvars.ContextVar('agendado', default=False)
+
+
+class BaldeTokens:
+    """Balde de tokens com taxa adaptativa
+
+    Um limite de taxa da exchange zera o balde, pausa a categoria com espera
+    exponencial e corta a taxa pela metade; cada sucesso devolve 5% da taxa
+    nominal (AIMD, como o controle de congestionamento do TCP).
+    """
+
+    def __init__(self, taxa, capacidade):
+        self.taxa_nominal = self.taxa = float(taxa)
+        self.capacidade = float(capacidade)
+        self.tokens = self.capacidade
+        self.atualizado = time.monotonic()
+        self.bloqueado_ate = 0.0
+        self.penalidades = 0  # Limites de taxa seguidos, sem sucesso no meio
+
+    def _repor(self, agora):
+        self.tokens = min(self.capacidade, self.tokens + (agora - self.atualizado) * self.taxa)
+        self.atualizado = agora
+
+    def espera(self, peso, agora):
+        """Segundos até haver `peso` tokens (0 = pode sair agora)"""
+        self._repor(agora)
+        falta = max(0.0, min(peso, self.capacidade) - self.tokens) / self.taxa
+        return max(falta, self.bloqueado_ate - agora, 0.0)
+
+    def consumir(self, peso, agora):
+        self._repor(agora)
+        self.tokens -= min(peso, self.capacidade)
+
+    def penalizar(self, agora, espera_maxima):
+        self.penalidades += 1
+        self.taxa = max(self.taxa_nominal * 0.1, self.taxa / 2)
+        self.tokens = 0.0
+        self.atualizado = agora
+        self.bloqueado_ate = agora + min(espera_maxima, 2 ** (self.penalidades - 1))
+
+    def recuperar(self):
+        self.penalidades = 0
+        self.taxa = min(self.taxa_nominal, self.taxa + self.taxa_nominal * 0.05)
+
+
+class AgendadorRequisicoes:
+    """Agendador das chamadas ccxt com baldes de tokens e faixas de prioridade
+
+    Cada categoria de endpoint (BALDES_REQUISICOES) tem seu balde, e todas
+    dividem o BALDE_GLOBAL da conta. Uma requisição sai quando os dois baldes
+    têm tokens; categorias esgotadas não travam as outras, mas quando o teto
+    global acaba ele fica reservado para a de maior prioridade, então uma
+    rajada de OHLCV nunca passa na frente de uma ordem. Leituras idênticas em
+    voo compartilham a mesma requisição, e limites de taxa (429) são repetidos
+    depois do backoff da categoria.
+
+    `envolver(exchange)` troca os métodos ccxt da instância, como o
+    `instrumentar_exchange`; quem chama a exchange não muda.
+    """
+
+    def __init__(self, baldes=None, balde_global=None, tentativas=None, espera_maxima=30.0):
+        baldes = baldes or config.BALDES_REQUISICOES
+        self.baldes = {categoria: BaldeTokens(*baldes[categoria]) for categoria in CATEGORIAS}
+        self.balde_global = BaldeTokens(*(balde_global or config.BALDE_GLOBAL))
+        self.tentativas = tentativas or config.TENTATIVAS_LIMITE_TAXA
+        self.espera_maxima = espera_maxima
+
+        self._fila = []                  # heap de (prioridade, seq, categoria, peso, futuro)
+        self._seq = itertools.count()
+        self._timer = None
+        self._em_voo = {}                # chave da leitura -> Task
+        self._profundidade = {categoria: 0 for categoria in CATEGORIAS}
+
+        # 📊 Contadores
+        self.agendadas = 0
+        self.agrupadas = 0
+        self.limites_taxa = 0
+
+        for categoria, balde in self.baldes.items():
+            metricas.definir('tavares_agendador_taxa', balde.taxa, categoria=categoria)
+
+    def envolver(self, exchange):
+        """Fazer as chamadas ccxt da instância passarem pelo agendador"""
+        for metodo in METODOS_CATEGORIA:
+            original = getattr(exchange, metodo, None)
+            if original is None:
+                continue
+
+            @functools.wraps(original)
+            async def agendado(*args, _original=original, _metodo=metodo, **kwargs):
+                if _AGENDADO.get():
+                    return await _original(*args, **kwargs)
+                return await self.executar(_metodo, _original, *args, **kwargs)
+
+            setattr(exchange, metodo, agendado)
+        return exchange
+
+    async def executar(self, metodo, chamada, *args, **kwargs):
+        """Chamar `chamada(*args, **kwargs)` quando a categoria de `metodo` tiver vez"""
+        categoria = METODOS_CATEGORIA[metodo]
+        if categoria not in CATEGORIAS_AGRUPAVEIS:
+            return await self._executar(metodo, categoria, chamada, args, kwargs)
+
+        chave = (metodo, repr(args), repr(sorted(kwargs.items())))
+        tarefa = self._em_voo.get(chave)
+        if tarefa is not None:
+            self.agrupadas += 1
+            metricas.contar('tavares_agendador_agrupadas_total', categoria=categoria)
+        else:
+            tarefa = asyncio.ensure_future(self._executar(metodo, categoria, chamada, args, kwargs))
+            self._em_voo[chave] = tarefa
+            tarefa.add_done_callback(functools.partial(self._concluida, chave))
+        # shield: quem desistir não cancela a requisição dos outros que esperam por ela
+        return await asyncio.shield(tarefa)
+
+    def _concluida(self, chave, tarefa):
+        self._em_voo.pop(chave, None)
+        if not tarefa.cancelled():
+            tarefa.exception()  # Marcar como lida mesmo se ninguém mais esperava
+
+    async def _executar(self, metodo, categoria, chamada, args, kwargs):
+        peso = PESOS.get(metodo, 1)
+        for tentativa in range(1, self.tentativas + 1):
+            await self._aguardar(categoria, peso)
+            marcador = _AGENDADO.set(True)
+            try:
+                resultado = await chamada(*args, **kwargs)
+            except (ccxt.RateLimitExceeded, ccxt.DDoSProtection) as e:
+                self._penalizar(categoria)
+                if tentativa == self.tentativas:
+                    raise
+                logger.warning(f"🚦 Limite de taxa em {metodo} ({categoria}), tentativa {tentativa}: {e}")
+                continue
+            finally:
+                _AGENDADO.reset(marcador)
+
+            balde = self.baldes[categoria]
+            if balde.taxa < balde.taxa_nominal:
+                balde.recuperar()
+                metricas.definir('tavares_agendador_taxa', balde.taxa, categoria=categoria)
+            return resultado
+
+    def _penalizar(self, categoria):
+        self.limites_taxa += 1
+        balde = self.baldes[categoria]
+        balde.penalizar(time.monotonic(), self.espera_maxima)
+        metricas.contar('tavares_agendador_limite_taxa_total', categoria=categoria)
+        metricas.definir('tavares_agendador_taxa', balde.taxa, categoria=categoria)
+
+    async def _aguardar(self, categoria, peso):
+        inicio = time.monotonic()
+        futuro = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._fila, (CATEGORIAS.index(categoria), next(self._seq), categoria, peso, futuro))
+        self.agendadas += 1
+        self._profundidade[categoria] += 1
+        metricas.definir('tavares_agendador_fila', self._profundidade[categoria], categoria=categoria)
+        try:
+            self._despachar()
+            await futuro
+        finally:
+            futuro.cancel()  # Sem efeito se já liberado; se quem esperava desistiu, o despacho o ignora
+            self._profundidade[categoria] -= 1
+            metricas.definir('tavares_agendador_fila', self._profundidade[categoria], categoria=categoria)
+        metricas.observar('tavares_agendador_espera_segundos', time.monotonic() - inicio, categoria=categoria)
+
+    def _despachar(self):
+        """Liberar tudo o que os baldes permitem, em ordem de prioridade, e agendar a próxima passada"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        agora = time.monotonic()
+        proxima = float('inf')
+        global_reservado = False
+        pendentes, self._fila = sorted(self._fila), []
+        for item in pendentes:
+            _, _, categoria, peso, futuro = item
+            if futuro.done():
+                continue
+
+            balde = self.baldes[categoria]
+            espera = balde.espera(peso, agora)
+            if espera > 0:
+                self._fila.append(item)
+                proxima = min(proxima, espera)
+                continue
+
+            if global_reservado:
+                self._fila.append(item)
+                continue
+            espera = self.balde_global.espera(peso, agora)
+            if espera > 0:
+                # O teto global fica para esta: as de menor prioridade esperam atrás
+                global_reservado = True
+                self._fila.append(item)
+                proxima = min(proxima, espera)
+                continue
+
+            balde.consumir(peso, agora)
+            self.balde_global.consumir(peso, agora)
+            futuro.set_result(None)
+
+        heapq.heapify(self._fila)
+        if self._fila and proxima < float('inf'):
+            self._timer = asyncio.get_running_loop().call_later(proxima, self._despachar)
+
+    def estatisticas(self):
+        return {
+            'agendadas': self.agendadas,
+            'agrupadas': self.agrupadas,
+            'limites_taxa': self.limites_taxa,
+            'fila': dict(self._profundidade),
+            'taxas': {categoria: balde.taxa for categoria, balde in self.baldes.items()},
+        }
@@ -0,0 +1,276 @@
+import bisect
+import heapq
+import logging
+import math
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from core.config import config
+from core.candles import COLUNAS
+from cerebro.features import MotorFeatures, COLUNAS_FEATURES
+
+logger = logging.getLogger('Backtest')
+
+_MS_POR_ANO = 365 * 86_400_000
+
+
+class MotorBacktest:
+    """Replay do histórico com o mesmo código de features e sinais do bot
+
+    As features de todas as barras saem de uma única passada vetorizada e os
+    sinais de uma única chamada a `prever_lote`. Por padrão a passada é
+    O(barras) sobre a série inteira (`MotorFeatures.calcular_serie`); com
+    `exato=True` cada barra é recalculada na mesma janela de CANDLES_ANALISE
+    candles que o bot recebe, idêntica bit a bit à execução ao vivo (~20x mais lenta).
+
+    Regras da simulação (spot, só comprado, uma posição por par):
+    - sinal na barra t é executado a mercado na abertura de t+1, com taxa e slippage;
+    - BUY abre VALOR_POR_TRADE se o par estiver zerado e o caixa permitir
+      (mesmas travas do BybitManager: saldo >= valor e valor <= 50% do saldo);
+    - SELL zera a posição; stop loss e take profit são checados dentro da barra
+      pela máxima/mínima, com o stop primeiro quando os dois caberiam na barra.
+    """
+
+    def __init__(self, cerebro=None, valor_por_trade=None, stop_loss=None, take_profit=None,
+                 confianca_minima=None, taxa=None, slippage=None, capital_inicial=None,
+                 janela=None, exato=False, tamanho_bloco=8192):
+        if cerebro is None:
+            from cerebro.rede_neural_simples import CerebroNeuralSimples
+            cerebro = CerebroNeuralSimples()
+        self.cerebro = cerebro
+
+        self.valor_por_trade = valor_por_trade or config.VALOR_POR_TRADE
+        self.stop_loss = config.STOP_LOSS if stop_loss is None else stop_loss
+        self.take_profit = config.TAKE_PROFIT if take_profit is None else take_profit
+        self.confianca_minima = config.CONFIANCA_MINIMA if confianca_minima is None else confianca_minima
+        self.taxa = config.TAXA_BACKTEST if taxa is None else taxa
+        self.slippage = config.SLIPPAGE_BACKTEST if slippage is None else slippage
+        self.capital_inicial = capital_inicial or config.CAPITAL_INICIAL_BACKTEST
+        self.janela = janela or config.CANDLES_ANALISE
+        self.tamanho_bloco = tamanho_bloco
+        self.exato = exato
+        self.motor_features = MotorFeatures(tendencia_exata=exato)
+
+    # 📐 FEATURES E SINAIS
+
+    def calcular_features(self, ohlcv):
+        """Matriz (barras, 14) com as features vistas ao fechar cada barra
+
+        As primeiras `janela - 1` barras, sem histórico completo, ficam NaN, e
+        o mesmo vale depois de cada lacuna nos timestamps (barras ausentes no
+        ArmazemHistorico): uma janela que a atravessa mistura dois períodos.
+        """
+        ohlcv = np.asarray(ohlcv, dtype=np.float64)
+        if not self.exato:
+            matriz = self.motor_features.calcular_serie(ohlcv)
+            matriz[:self.janela - 1] = np.nan
+            return self._invalidar_lacunas(ohlcv, matriz)
+
+        matriz = np.full((len(ohlcv), len(COLUNAS_FEATURES)), np.nan)
+        if len(ohlcv) < self.janela:
+            return matriz
+
+        janelas = sliding_window_view(ohlcv, self.janela, axis=0).transpose(0, 2, 1)
+        for inicio in range(0, len(janelas), self.tamanho_bloco):
+            bloco = janelas[inicio:inicio + self.tamanho_bloco]
+            fim = inicio + self.janela - 1
+            matriz[fim:fim + len(bloco)] = self.motor_features.calcular(bloco)
+        return self._invalidar_lacunas(ohlcv, matriz)
+
+    def _invalidar_lacunas(self, ohlcv, matriz):
+        """NaN nas barras cuja janela atravessa uma lacuna (passo maior que o da série)"""
+        if len(ohlcv) < 2:
+            return matriz
+        passos = np.diff(ohlcv[:, 0])
+        for depois in np.flatnonzero(passos > passos.min()) + 1:
+            matriz[depois:depois + self.janela - 1] = np.nan
+        return matriz
+
+    def gerar_sinais(self, matriz):
+        """Máscaras (comprar, vender) pelo mesmo critério de _executar_operacoes"""
+        lote = self.cerebro.prever_lote(matriz)
+        forte = lote['valida'] & (lote['confiancas'] >= self.confianca_minima)
+        return forte & (lote['direcoes'] == 'BUY'), forte & (lote['direcoes'] == 'SELL')
+
+    # ⚡ SIMULAÇÃO
+
+    def executar(self, dados, features=None):
+        """Rodar o backtest; `dados` é {par: ohlcv (barras, 6)} ordenado por timestamp
+
+        `features` opcional ({par: matriz}) evita recalcular as features quando
+        só as regras ou os parâmetros de risco mudam.
+        """
+        dados = {par: np.asarray(ohlcv, dtype=np.float64) for par, ohlcv in dados.items()}
+        sinais = {}
+        for par, ohlcv in dados.items():
+            matriz = features[par] if features is not None else self.calcular_features(ohlcv)
+            sinais[par] = self.gerar_sinais(matriz)
+
+        trades = self._simular(dados, sinais)
+        equity = self._curva_equity(dados, trades)
+        return {
+            'trades': pd.DataFrame(trades, columns=COLUNAS_TRADES),
+            'equity': equity,
+            'estatisticas': self._estatisticas(trades, equity),
+        }
+
+    def _proxima_entrada(self, par, desde):
+        """Próxima barra de execução de compra a partir da barra `desde`"""
+        indices = self._compras[par]
+        k = bisect.bisect_left(indices, desde - 1)
+        if k == len(indices) or indices[k] + 1 >= len(self._dados[par]):
+            return None
+        return indices[k] + 1
+
+    def _saida(self, par, entrada, preco_entrada):
+        """(barra, preço de referência, motivo) da saída de uma posição aberta em `entrada`"""
+        ohlcv = self._dados[par]
+        abertura, maxima, minima = ohlcv[:, 1], ohlcv[:, 2], ohlcv[:, 3]
+        stop = preco_entrada * (1 - self.stop_loss) if self.stop_loss else -np.inf
+        alvo = preco_entrada * (1 + self.take_profit) if self.take_profit else np.inf
+
+        vendas = self._vendas[par]
+        k = bisect.bisect_left(vendas, entrada)
+        limite = vendas[k] + 1 if k < len(vendas) else len(ohlcv)
+
+        # Busca em blocos crescentes: custo proporcional à duração do trade
+        inicio, passo = entrada, 64
+        while inicio < min(limite, len(ohlcv)):
+            fim = min(inicio + passo, limite, len(ohlcv))
+            toques = np.flatnonzero((minima[inicio:fim] <= stop) | (maxima[inicio:fim] >= alvo))
+            if len(toques):
+                barra = inicio + int(toques[0])
+                if minima[barra] <= stop:
+                    return barra, min(stop, abertura[barra]), 'STOP_LOSS'
+                return barra, max(alvo, abertura[barra]), 'TAKE_PROFIT'
+            inicio, passo = fim, passo * 2
+
+        if limite < len(ohlcv):
+            return limite, abertura[limite], 'SINAL_VENDA'
+        return len(ohlcv) - 1, ohlcv[-1, 4], 'FIM_DADOS'
+
+    def _simular(self, dados, sinais):
+        """Percorrer só os trades (não as barras), em ordem cronológica entre pares"""
+        self._dados = dados
+        self._compras = {par: np.flatnonzero(comprar).tolist() for par, (comprar, _) in sinais.items()}
+        self._vendas = {par: np.flatnonzero(vender).tolist() for par, (_, vender) in sinais.items()}
+
+        caixa = self.capital_inicial
+        abertos = []  # heap (timestamp_saida, liquido)
+        fila = []
+        for par in dados:
+            barra = self._proxima_entrada(par, 0)
+            if barra is not None:
+                heapq.heappush(fila, (dados[par][barra, 0], par, barra))
+
+        trades = []
+        while fila:
+            ts, par, entrada = heapq.heappop(fila)
+            while abertos and abertos[0][0] <= ts:
+                caixa += heapq.heappop(abertos)[1]
+
+            ohlcv = dados[par]
+            if caixa < self.valor_por_trade or self.valor_por_trade > caixa * 0.5:
+                # Sem saldo: o bot recusaria a ordem. O caixa só volta quando
+                # alguma posição fechar, então pular direto para o próximo
+                # sinal depois disso (sem posições abertas, acabou)
+                if not abertos:
+                    continue
+                liberacao = int(np.searchsorted(ohlcv[:, 0], abertos[0][0]))
+                proxima = self._proxima_entrada(par, max(entrada + 1, liberacao))
+                if proxima is not None:
+                    heapq.heappush(fila, (ohlcv[proxima, 0], par, proxima))
+                continue
+
+            preco_entrada = ohlcv[entrada, 1] * (1 + self.slippage)
+            quantidade = self.valor_por_trade / preco_entrada
+            custo = self.valor_por_trade * (1 + self.taxa)
+            caixa -= custo
+
+            saida, referencia, motivo = self._saida(par, entrada, preco_entrada)
+            preco_saida = referencia * (1 - self.slippage)
+            liquido = quantidade * preco_saida * (1 - self.taxa)
+            heapq.heappush(abertos, (ohlcv[saida, 0], liquido))
+
+            trades.append((
+                par, int(ohlcv[entrada, 0]), int(ohlcv[saida, 0]), entrada, saida,
+                preco_entrada, preco_saida, quantidade, liquido - custo,
+                (liquido - custo) / custo, motivo
+            ))
+
+            proxima = self._proxima_entrada(par, saida + 1)
+            if proxima is not None:
+                heapq.heappush(fila, (ohlcv[proxima, 0], par, proxima))
+
+        trades.sort(key=lambda trade: (trade[1], trade[0]))
+        return trades
+
+    def _curva_equity(self, dados, trades):
+        """Caixa + posições marcadas a mercado no fechamento de cada barra"""
+        eixo = np.unique(np.concatenate([ohlcv[:, 0] for ohlcv in dados.values()]))
+        caixa = np.zeros(len(eixo))
+        posicoes = np.zeros(len(eixo))
+
+        por_par = {}
+        for trade in trades:
+            por_par.setdefault(trade[0], []).append(trade)
+
+        for par, lista in por_par.items():
+            ohlcv = dados[par]
+            indices = np.searchsorted(eixo, ohlcv[:, 0])
+            quantidade = np.zeros(len(ohlcv))
+            custo = self.valor_por_trade * (1 + self.taxa)
+            for (_, _, _, entrada, saida, _, _, qtd, pnl, _, _) in lista:
+                caixa[indices[entrada]] -= custo
+                caixa[indices[saida]] += custo + pnl
+                quantidade[entrada] += qtd
+                quantidade[saida] -= qtd
+            quantidade = np.cumsum(quantidade)
+
+            # Fechamento do par projetado no eixo comum (último conhecido)
+            valor = np.zeros(len(eixo))
+            valor[indices] = quantidade * ohlcv[:, 4]
+            preenchido = np.zeros(len(eixo), dtype=bool)
+            preenchido[indices] = True
+            ultimo = np.maximum.accumulate(np.where(preenchido, np.arange(len(eixo)), 0))
+            posicoes += valor[ultimo]
+
+        equity = self.capital_inicial + np.cumsum(caixa) + posicoes
+        return pd.Series(equity, index=eixo.astype(np.int64), name='equity')
+
+    def _estatisticas(self, trades, equity):
+        pnls = np.array([trade[8] for trade in trades])
+        curva = equity.to_numpy()
+        pico = np.maximum.accumulate(curva)
+        retornos = np.diff(curva) / curva[:-1] if len(curva) > 1 else np.array([])
+
+        barras_por_ano = 0.0
+        if len(equity) > 1:
+            barras_por_ano = _MS_POR_ANO / np.median(np.diff(equity.index.to_numpy()))
+        desvio = retornos.std(ddof=1) if len(retornos) > 1 else 0.0
+        ganhos, perdas = pnls[pnls > 0].sum(), -pnls[pnls < 0].sum()
+
+        return {
+            'capital_inicial': float(self.capital_inicial),
+            'capital_final': float(curva[-1]) if len(curva) else float(self.capital_inicial),
+            'retorno_total': float(curva[-1] / self.capital_inicial - 1) if len(curva) else 0.0,
+            'max_drawdown': float(((pico - curva) / pico).max()) if len(curva) else 0.0,
+            'sharpe': float(retornos.mean() / desvio * math.sqrt(barras_por_ano)) if desvio > 0 else 0.0,
+            'total_trades': len(trades),
+            'win_rate': float((pnls > 0).mean()) if len(pnls) else 0.0,
+            'pnl_medio': float(pnls.mean()) if len(pnls) else 0.0,
+            'profit_factor': float(ganhos / perdas) if perdas > 0 else float('inf') if ganhos > 0 else 0.0,
+            'saidas': {motivo: sum(1 for trade in trades if trade[10] == motivo)
+                       for motivo in ('STOP_LOSS', 'TAKE_PROFIT', 'SINAL_VENDA', 'FIM_DADOS')},
+        }
+
+
+COLUNAS_TRADES = [
+    'par', 'entrada_ts', 'saida_ts', 'entrada_barra', 'saida_barra',
+    'preco_entrada', 'preco_saida', 'quantidade', 'pnl', 'retorno', 'motivo'
+]
+
+
+def carregar_dataframe(df):
+    """OHLCV (barras, 6) a partir de um DataFrame com as colunas do BufferCandles"""
+    return df[COLUNAS].to_numpy(dtype=np.float64)
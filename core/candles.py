@@ -0,0 +1,276 @@
+import asyncio
+import logging
+import numpy as np
+import pandas as pd
+from cerebro.features import COLUNAS_FEATURES
+from cerebro.indicadores import ConjuntoIndicadores
+from core.config import config
+
+logger = logging.getLogger('Candles')
+
+COLUNAS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+_UNIDADES_MS = {'m': 60_000, 'h': 3_600_000, 'd': 86_400_000, 'w': 604_800_000}
+
+
+def duracao_timeframe_ms(timeframe):
+    """Duração de um timeframe ('15m', '1h', ...) em milissegundos"""
+    return int(timeframe[:-1]) * _UNIDADES_MS[timeframe[-1]]
+
+
+class BufferCandles:
+    """Ring buffer de candles com capacidade fixa, indexado pelo horário de abertura
+
+    Cada linha é gravada duas vezes (slot e slot + capacidade), então as últimas
+    N linhas sempre formam um bloco contíguo e `janela()` devolve uma view sem cópia.
+    """
+
+    def __init__(self, capacidade):
+        self.capacidade = capacidade
+        self.tamanho = 0
+        self._dados = np.full((2 * capacidade, len(COLUNAS)), np.nan)
+        self._proximo = 0  # Slot físico da próxima escrita
+
+    @property
+    def ultimo_timestamp(self):
+        """Horário de abertura (ms) do candle mais recente, ou None"""
+        if not self.tamanho:
+            return None
+        return int(self._dados[self._slot_ultimo(), 0])
+
+    def _slot_ultimo(self):
+        return (self._proximo - 1) % self.capacidade
+
+    def mesclar(self, ohlcv):
+        """Mesclar candles ordenados; retorna quantos candles novos entraram
+
+        Um candle com o mesmo horário do último (candle ainda aberto) é
+        atualizado no lugar; candles anteriores ao último são ignorados.
+        """
+        if ohlcv is None or len(ohlcv) == 0:
+            return 0
+
+        linhas = np.asarray(ohlcv, dtype=np.float64)
+        ultimo = self.ultimo_timestamp
+
+        if ultimo is not None:
+            mesmo = linhas[:, 0] == ultimo
+            if mesmo.any():
+                slot = self._slot_ultimo()
+                linha = linhas[mesmo][-1]
+                self._dados[slot] = linha
+                self._dados[slot + self.capacidade] = linha
+            linhas = linhas[linhas[:, 0] > ultimo]
+
+        novos = len(linhas)
+        if not novos:
+            return 0
+
+        linhas = linhas[-self.capacidade:]
+        slots = (self._proximo + np.arange(len(linhas))) % self.capacidade
+        self._dados[slots] = linhas
+        self._dados[slots + self.capacidade] = linhas
+        self._proximo = int((slots[-1] + 1) % self.capacidade)
+        self.tamanho = min(self.tamanho + len(linhas), self.capacidade)
+        return novos
+
+    def janela(self, n=None):
+        """View somente-leitura (n, 6) dos últimos n candles em ordem cronológica"""
+        n = self.tamanho if n is None else min(n, self.tamanho)
+        fim = self._slot_ultimo() + self.capacidade + 1
+        view = self._dados[fim - n:fim]
+        view.flags.writeable = False
+        return view
+
+    def dataframe(self, n=None):
+        """DataFrame apoiado na view (sem copiar os candles)"""
+        return pd.DataFrame(self.janela(n), columns=COLUNAS, copy=False)
+
+    def limpar(self):
+        self.tamanho = 0
+        self._proximo = 0
+
+
+def validar_derivado(timeframe, timeframe_base, capacidade):
+    """ValueError se `timeframe` não puder ser agregado de `timeframe_base` num buffer de `capacidade`"""
+    duracao, duracao_base = duracao_timeframe_ms(timeframe), duracao_timeframe_ms(timeframe_base)
+    if duracao <= duracao_base or duracao % duracao_base:
+        raise ValueError(f"{timeframe} não é múltiplo maior de {timeframe_base}")
+    if duracao // duracao_base > capacidade:
+        raise ValueError(f"Uma barra de {timeframe} não cabe no buffer de {timeframe_base} ({capacidade} candles)")
+
+
+def agregar_ohlcv(ohlcv, timeframe, completar_inicio=True):
+    """Agregar candles ordenados de um timeframe menor em candles de `timeframe`
+
+    Cada barra vai do horário de abertura múltiplo da duração até o próximo:
+    abertura do primeiro candle, máxima e mínima do grupo, fechamento do
+    último e soma dos volumes. Com `completar_inicio`, a primeira barra é
+    descartada se o primeiro candle não for o da abertura dela (o começo
+    dela ficou fora dos dados e sairia com abertura e volume errados).
+    A última barra pode estar incompleta: é a barra parcial em formação.
+    """
+    ohlcv = np.asarray(ohlcv, dtype=np.float64)
+    if not len(ohlcv):
+        return np.empty((0, len(COLUNAS)))
+
+    duracao = duracao_timeframe_ms(timeframe)
+    baldes = ohlcv[:, 0] // duracao * duracao
+    inicios = np.flatnonzero(np.r_[True, baldes[1:] != baldes[:-1]])
+    if completar_inicio and ohlcv[0, 0] != baldes[0]:
+        inicios = inicios[1:]
+        if not len(inicios):
+            return np.empty((0, len(COLUNAS)))
+        ohlcv, baldes, inicios = ohlcv[inicios[0]:], baldes[inicios[0]:], inicios - inicios[0]
+    fins = np.r_[inicios[1:], len(ohlcv)] - 1
+
+    return np.column_stack([
+        baldes[inicios],
+        ohlcv[inicios, 1],
+        np.maximum.reduceat(ohlcv[:, 2], inicios),
+        np.minimum.reduceat(ohlcv[:, 3], inicios),
+        ohlcv[fins, 4],
+        np.add.reduceat(ohlcv[:, 5], inicios),
+    ])
+
+
+class AgregadorOHLCV:
+    """Candles de um timeframe maior montados localmente a partir do buffer base
+
+    Nada é buscado na exchange: `sincronizar()` reagrega só a partir da
+    última barra derivada (a parcial), então cada chamada custa no máximo
+    algumas barras base, e atualizações no lugar do candle base aberto,
+    venham do REST ou do stream, corrigem a barra parcial na próxima chamada.
+    """
+
+    def __init__(self, base, timeframe, timeframe_base, capacidade=None):
+        self.base = base
+        self.timeframe = timeframe
+        self.duracao = duracao_timeframe_ms(timeframe)
+        validar_derivado(timeframe, timeframe_base, base.capacidade)
+        self.buffer = BufferCandles(capacidade or config.CAPACIDADE_CANDLES)
+
+    def aquecer(self, ohlcv_base):
+        """Preencher barras antigas a partir de candles base de fora do buffer (ex.: histórico local)"""
+        return self.buffer.mesclar(agregar_ohlcv(ohlcv_base, self.timeframe))
+
+    def sincronizar(self):
+        """Agregar o que chegou no buffer base desde a última chamada; retorna o buffer derivado"""
+        linhas = self.base.janela()
+        if not len(linhas):
+            return self.buffer
+
+        ultimo = self.buffer.ultimo_timestamp
+        if ultimo is not None and linhas[-1, 0] < ultimo:
+            # Buffer base recomeçado de um ponto anterior: remontar do zero
+            self.buffer.limpar()
+            ultimo = None
+        if ultimo is not None:
+            linhas = linhas[np.searchsorted(linhas[:, 0], ultimo):]
+        self.buffer.mesclar(agregar_ohlcv(linhas, self.timeframe))
+        return self.buffer
+
+
+class ArmazemCandles:
+    """Armazém de candles por par/timeframe com atualização incremental
+
+    Com um ArmazemHistorico, buffers vazios são aquecidos do disco e só os
+    candles posteriores ao histórico local são buscados na exchange.
+
+    Só o timeframe base vem da exchange (REST ou stream); os derivados são
+    agregados dele sob demanda por um AgregadorOHLCV, sem requisição extra,
+    e terminam na barra parcial que contém o último candle base.
+    """
+
+    def __init__(self, bybit, capacidade=None, historico=None, timeframe_base=None, derivados=None):
+        self.bybit = bybit
+        self.capacidade = capacidade or config.CAPACIDADE_CANDLES
+        self.historico = historico
+        self.timeframe_base = timeframe_base or config.TIMEFRAME_BASE
+        self.derivados = tuple(config.TIMEFRAMES_DERIVADOS if derivados is None else derivados)
+        for timeframe in self.derivados:
+            validar_derivado(timeframe, self.timeframe_base, self.capacidade)
+        self._buffers = {}
+        self._agregadores = {}
+        self._indicadores = {}
+        logger.info(f"🕯️ ARMAZÉM DE CANDLES INICIALIZADO (capacidade {self.capacidade})")
+
+    def agregador(self, par, timeframe):
+        chave = (par, timeframe)
+        if chave not in self._agregadores:
+            agregador = AgregadorOHLCV(self.buffer(par, self.timeframe_base), timeframe,
+                                       self.timeframe_base, self.capacidade)
+            if self.historico is not None:
+                # Barras mais antigas que o buffer base saem do histórico local
+                inicio = self.bybit.agora_ms() - self.capacidade * agregador.duracao
+                agregador.aquecer(self.historico.ler(par, self.timeframe_base, inicio=inicio))
+            self._agregadores[chave] = agregador
+        return self._agregadores[chave]
+
+    def buffer(self, par, timeframe=None):
+        """Buffer do par no `timeframe` (padrão: o base)"""
+        timeframe = timeframe or self.timeframe_base
+        if timeframe in self.derivados:
+            return self.agregador(par, timeframe).sincronizar()
+        chave = (par, timeframe)
+        if chave not in self._buffers:
+            self._buffers[chave] = BufferCandles(self.capacidade)
+        return self._buffers[chave]
+
+    def indicadores(self, par, timeframe=None):
+        """ConjuntoIndicadores do par em dia com o buffer (só os candles novos ou alterados entram)"""
+        chave = (par, timeframe or self.timeframe_base)
+        if chave not in self._indicadores:
+            self._indicadores[chave] = ConjuntoIndicadores()
+        conjunto = self._indicadores[chave]
+        conjunto.sincronizar(self.buffer(*chave))
+        return conjunto
+
+    def features(self, pares, timeframe=None):
+        """Matriz (pares, len(COLUNAS_FEATURES)) das features mantidas incrementalmente"""
+        matriz = np.full((len(pares), len(COLUNAS_FEATURES)), np.nan)
+        for i, par in enumerate(pares):
+            matriz[i] = self.indicadores(par, timeframe).features()
+        return matriz
+
+    async def atualizar(self, pares, timeframe=None, limite_inicial=None):
+        """Buscar só os candles desde o último armazenado; retorna novos candles por par
+
+        Sem `timeframe`, ou para um timeframe derivado, atualiza o base (de onde
+        os derivados saem).
+        """
+        if timeframe is None or timeframe in self.derivados:
+            timeframe = self.timeframe_base
+        if limite_inicial is None:
+            limite_inicial = config.CANDLES_ANALISE
+            if timeframe == self.timeframe_base and self.derivados:
+                # Base suficiente para o derivado mais longo já sair com CANDLES_ANALISE barras
+                maior = max(map(duracao_timeframe_ms, self.derivados)) // duracao_timeframe_ms(timeframe)
+                limite_inicial = min(self.capacidade, limite_inicial * maior)
+        duracao = duracao_timeframe_ms(timeframe)
+
+        async def _atualizar_par(par):
+            buffer = self.buffer(par, timeframe)
+            desde = buffer.ultimo_timestamp
+            agora = self.bybit.agora_ms()
+
+            if desde is None or agora - desde > self.capacidade * duracao:
+                # Buffer vazio ou defasado demais: recomeçar do histórico local, se houver
+                buffer.limpar()
+                if self.historico is not None:
+                    buffer.mesclar(self.historico.ler(par, timeframe, inicio=agora - self.capacidade * duracao))
+                desde = buffer.ultimo_timestamp
+
+            if desde is None:
+                limite = limite_inicial
+            else:
+                # Inclui o último candle armazenado, que pode ainda estar aberto
+                limite = int((agora - desde) // duracao) + 2
+
+            ohlcv = await self.bybit.obter_dados_mercado(
+                par, timeframe, limite, since=desde, fallback=False
+            )
+            return buffer.mesclar(ohlcv)
+
+        resultados = await asyncio.gather(*(_atualizar_par(par) for par in pares))
+        return dict(zip(pares, resultados))
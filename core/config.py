@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -8,6 +9,13 @@ class TavaresConfig:
         # 🤖 CONFIGURAÇÕES TELEGRAM
         self.TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
         self.TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+        self.TELEGRAM_INTERVALO_CHAT = 1.0         # Segundos entre mensagens no mesmo chat
+        self.TELEGRAM_MAX_POR_SEGUNDO = 30         # Limite global do bot
+        self.TELEGRAM_JANELA_AGRUPAMENTO = 1.0     # Rajadas dentro da janela viram uma mensagem
+        self.TELEGRAM_MAX_FILA = 50                # Pendentes por chat antes de descartar as de baixa prioridade
+        self.TELEGRAM_TENTATIVAS = 5
+        self.INTERVALO_PAINEL = 5                  # Segundos entre snapshots do estado para os comandos
+        self.INTERVALO_COMANDOS_CHAT = 2.0         # Comandos mais rápidos que isso, por chat, são ignorados
         
         # 💰 BYBIT REAL - TESTES SEGUROS
         self.BYBIT_API_KEY = os.getenv('BYBIT_API_KEY_REAL')
@@ -24,12 +32,116 @@ class TavaresConfig:
         ]
         
         # ⚡ CONFIGURAÇÕES SUPER CONSERVADORAS - R$100
-        self.INTERVALO_ANALISE = 120  # 2 minutos entre análises
+        self.INTERVALO_ANALISE = 120  # Orçamento de um ciclo (acima disso conta como estourado)
+        self.ATRASO_FECHAMENTO = 3            # Segundos após o fechamento para a exchange consolidar a barra
+        self.INTERVALO_PROTECAO = 10          # Segundos entre checagens de stop loss/take profit
+        self.PORTA_METRICAS = int(os.getenv('PORT', '8080'))  # /metrics no formato do Prometheus
         self.RISK_PER_TRADE = 0.005   # 0.5% por trade (R$ 0.50)
         self.VALOR_POR_TRADE = 10     # $10 USD por operação (R$ 50)
         self.STOP_LOSS = 0.02         # 2% stop loss
         self.TAKE_PROFIT = 0.05       # 5% take profit  
         self.LEVERAGE = 1             # SEM alavancagem
         self.CONFIANCA_MINIMA = 75    # 75% confiança mínima
+        self.EXPOSICAO_MAXIMA = 0.5   # Posições + compras em voo, fração do patrimônio
+        self.ARQUIVO_REGRAS_SINAIS = os.getenv('ARQUIVO_REGRAS_SINAIS')  # JSON opcional; vazio = regras padrão
+        
+        # 🌐 CONEXÃO EXCHANGE
+        self.MAX_REQUISICOES_CONCORRENTES = 5  # Fetches simultâneos na Bybit
+        self.TTL_MERCADOS = 6 * 3600          # Renovação de precisão/limites
+        self.ARQUIVO_CACHE_MERCADOS = os.getenv('ARQUIVO_CACHE_MERCADOS', 'dados/mercados.json')
+        self.IDADE_MAXIMA_PRECO = 30          # Segundos de validade do último preço
+        self.INTERVALO_RECONCILIACAO_SALDO = 300  # fetch_balance real a cada 5 min
+        self.EXECUCOES_POR_RECONCILIACAO = 3      # ...ou após N execuções
+        self.MAX_ORDENS_SIMULTANEAS = 3           # Ordens em voo ao mesmo tempo (pares diferentes)
+        
+        # 🚦 AGENDADOR DE REQUISIÇÕES (prioridade: ordens > saldo > tickers > ohlcv > metadados)
+        self.BALDES_REQUISICOES = {               # categoria: (requisições/s, rajada)
+            'ordens': (10, 10),
+            'saldo': (5, 5),
+            'tickers': (20, 20),
+            'ohlcv': (20, 20),
+            'metadados': (1, 5),
+        }
+        self.BALDE_GLOBAL = (40, 40)              # Teto da conta somando as categorias
+        self.TENTATIVAS_LIMITE_TAXA = 3           # Tentativas de uma chamada recusada por limite de taxa (429)
+        
+        # 🧪 EXCHANGE SIMULADA (paper trading e testes de carga, sem dinheiro real)
+        self.MODO_SIMULADO = os.getenv('MODO_SIMULADO', 'false').lower() == 'true'
+        self.SALDO_SIMULADO = {'USDT': 100.0, **json.loads(os.getenv('SALDO_SIMULADO', '{}'))}
+        self.LATENCIA_SIMULADA = float(os.getenv('LATENCIA_SIMULADA', '0.05'))   # Segundos por chamada (média)
+        self.TAXA_ERROS_SIMULADA = float(os.getenv('TAXA_ERROS_SIMULADA', '0'))  # Fração de chamadas com falha de rede
+        
+        # 🕯️ CANDLES
+        self.CANDLES_ANALISE = 50             # Candles entregues ao cérebro
+        self.CAPACIDADE_CANDLES = 200         # Candles guardados por par/timeframe
+        self.TIMEFRAME_BASE = os.getenv('TIMEFRAME_BASE', '15m')      # Único timeframe buscado na exchange/stream
+        self.TIMEFRAME_MODELO = os.getenv('TIMEFRAME_MODELO', '15m')  # Lido pelas regras: o base ou um derivado
+        # Agregados localmente do base (múltiplos dele); padrão: só o do modelo, se não for o base
+        self.TIMEFRAMES_DERIVADOS = [
+            tf.strip() for tf in os.getenv(
+                'TIMEFRAMES_DERIVADOS',
+                self.TIMEFRAME_MODELO if self.TIMEFRAME_MODELO != self.TIMEFRAME_BASE else ''
+            ).split(',') if tf.strip()
+        ]
+        # Ciclos alinhados ao fechamento destes candles (padrão: a cada candle base)
+        self.TIMEFRAMES_AGENDA = [
+            tf.strip() for tf in os.getenv('TIMEFRAMES_AGENDA', self.TIMEFRAME_BASE).split(',') if tf.strip()
+        ]
+        
+        # 🗄️ HISTÓRICO LOCAL
+        self.DIRETORIO_HISTORICO = os.getenv('DIRETORIO_HISTORICO', 'dados/historico')
+        self.BARRAS_POR_BLOCO = 50_000        # Barras por arquivo .npy
+        self.LIMITE_PAGINA_OHLCV = 1000       # Máximo da Bybit por fetch_ohlcv
+        
+        # 📡 STREAMING (WebSocket) - ciclos disparados por eventos
+        self.MODO_STREAMING = os.getenv('MODO_STREAMING', 'false').lower() == 'true'
+        self.WS_URL = os.getenv('WS_URL', 'wss://stream.bybit.com/v5/public/spot')
+        self.LIMIAR_MOVIMENTO_PRECO = 0.005   # 0.5% de movimento dispara ciclo
+        self.WS_INTERVALO_PING = 20           # Bybit derruba sem ping em ~30s
+        self.WS_JANELA_AGRUPAMENTO = 0.5      # Segundos para agrupar disparos
+        self.WS_TOPICOS_POR_INSCRICAO = 10    # Limite da Bybit spot por mensagem de subscribe
+        
+        # 📰 NOTÍCIAS
+        self.FONTES_NOTICIAS = [
+            fonte.strip() for fonte in os.getenv(
+                'FONTES_NOTICIAS',
+                'https://cointelegraph.com/rss,'
+                'https://www.coindesk.com/arc/outboundfeeds/rss/,'
+                'https://decrypt.co/feed,'
+                'https://bitcoinmagazine.com/.rss/full/'
+            ).split(',') if fonte.strip()
+        ]
+        self.TIMEOUT_NOTICIAS = 10            # Segundos por fonte (consultadas em paralelo)
+        self.MAX_CONEXOES_NOTICIAS = 10
+        self.MAX_NOTICIAS = 200               # Artigos guardados em memória
+        self.NOTICIAS_ANALISADAS = 20         # Mais recentes entram no sentimento
+        self.CACHE_SENTIMENTOS_TAMANHO = 5000 # Pontuações em memória (LRU)
+        self.ARQUIVO_CACHE_SENTIMENTOS = os.getenv('ARQUIVO_CACHE_SENTIMENTOS', 'dados/sentimentos.sqlite')  # Vazio = só memória
+        self.INTERVALO_SENTIMENTO = 120       # Segundos entre atualizações em segundo plano
+        self.IDADE_MAXIMA_SENTIMENTO = 600    # Snapshot mais velho que isso é marcado obsoleto
+        self.PROCESSOS_SENTIMENTO = int(os.getenv('PROCESSOS_SENTIMENTO', '2'))  # 0 = pontuar numa thread
+        # Apelidos que marcam uma notícia como sendo do ativo (o símbolo já conta);
+        # ALIASES_ATIVOS no env, em JSON, acrescenta ou substitui ativos
+        self.ALIASES_ATIVOS = {
+            'XRP': ['ripple'],
+            'ADA': ['cardano'],
+            'MATIC': ['polygon'],
+            'DOGE': ['dogecoin'],
+            'SHIB': ['shiba inu', 'shiba'],
+            **json.loads(os.getenv('ALIASES_ATIVOS', '{}'))
+        }
+        self.SENTIMENTO_NAS_REGRAS = os.getenv('SENTIMENTO_NAS_REGRAS', 'false').lower() == 'true'  # Coluna 'sentimento' por par
+        
+        # 💾 DIÁRIO (estado e operações persistidos em SQLite/WAL)
+        self.ARQUIVO_DIARIO = os.getenv('ARQUIVO_DIARIO', 'dados/diario.sqlite')  # Num volume do Railway para sobreviver a restarts
+        self.DIARIO_LOTE = 200                # Escritas por transação
+        self.DIARIO_INTERVALO = 0.5           # Segundos máximos até uma escrita ir para o disco
+        self.OPERACOES_EM_MEMORIA = 50        # Janela recente guardada no estado
+        
+        # 🧪 BACKTEST
+        self.TAXA_BACKTEST = 0.001            # Taxa taker spot da Bybit (0.1%)
+        self.SLIPPAGE_BACKTEST = 0.0005       # 0.05% contra nós em cada execução
+        self.CAPITAL_INICIAL_BACKTEST = 100   # USDT
+        self.DIRETORIO_OTIMIZACAO = os.getenv('DIRETORIO_OTIMIZACAO', 'dados/otimizacao')
 
 config = TavaresConfig()
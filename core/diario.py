@@ -0,0 +1,203 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from core.config import config
+
+logger = logging.getLogger('Diario')
+
+_ESQUEMA = '''
+CREATE TABLE IF NOT EXISTS operacoes (
+    seq INTEGER PRIMARY KEY,
+    id TEXT, timestamp TEXT, par TEXT, direcao TEXT, confianca REAL,
+    lado TEXT, preco REAL, quantidade REAL, valor REAL, ordem_id TEXT, tipo TEXT,
+    lucro REAL
+);
+CREATE INDEX IF NOT EXISTS operacoes_timestamp ON operacoes (timestamp);
+CREATE INDEX IF NOT EXISTS operacoes_par ON operacoes (par, timestamp);
+CREATE TABLE IF NOT EXISTS ciclos (
+    numero INTEGER, inicio TEXT, duracao REAL, previsoes INTEGER, operacoes INTEGER, status TEXT
+);
+CREATE INDEX IF NOT EXISTS ciclos_inicio ON ciclos (inicio);
+CREATE TABLE IF NOT EXISTS contadores (nome TEXT PRIMARY KEY, valor TEXT);
+CREATE TABLE IF NOT EXISTS resumo_pares (
+    par TEXT PRIMARY KEY, operacoes INTEGER, compras INTEGER, vendas INTEGER, lucrativas INTEGER, lucro REAL
+);
+'''
+
+_COLUNAS_OPERACAO = ('id', 'timestamp', 'par', 'direcao', 'confianca', 'lado', 'preco',
+                     'quantidade', 'valor', 'ordem_id', 'tipo', 'lucro')
+
+_FIM = object()
+
+
+def _conectar(caminho, **kwargs):
+    conexao = sqlite3.connect(caminho, timeout=30, **kwargs)
+    conexao.execute('PRAGMA journal_mode=WAL')
+    conexao.execute('PRAGMA synchronous=NORMAL')  # Em WAL, só um crash do SO perde a última transação
+    return conexao
+
+
+def resumir_operacao(operacao, valor=None):
+    """Registro compacto de uma operação do bot (sem a cópia inteira da previsão)"""
+    sinal = operacao['sinal']
+    resultado = operacao.get('resultado_real') or {}
+
+    def numero(campo):
+        try:
+            return float(resultado[campo]) if resultado.get(campo) is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    return {
+        'id': operacao['id'],
+        'timestamp': operacao['timestamp'],
+        'par': sinal['par'],
+        'direcao': sinal['direcao'],
+        'confianca': float(sinal['confianca']),
+        'lado': resultado.get('side'),
+        'preco': numero('price'),
+        'quantidade': numero('amount'),
+        'valor': valor,
+        'ordem_id': resultado.get('id'),
+        'tipo': operacao.get('tipo'),
+        'lucro': operacao.get('lucro'),
+    }
+
+
+class DiarioOperacoes:
+    """Diário persistente de operações, ciclos e contadores (SQLite em WAL)
+
+    Escritas só enfileiram: uma thread dedicada grava em lotes de até
+    `tamanho_lote` numa única transação, no máximo `intervalo` segundos depois,
+    então o event loop nunca espera o disco. Leituras usam outra conexão
+    (o WAL deixa ler enquanto se escreve) e consultas indexadas.
+    """
+
+    def __init__(self, caminho=None, tamanho_lote=None, intervalo=None):
+        self.caminho = caminho or config.ARQUIVO_DIARIO
+        self.tamanho_lote = tamanho_lote or config.DIARIO_LOTE
+        self.intervalo = intervalo or config.DIARIO_INTERVALO
+
+        pasta = os.path.dirname(self.caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self._leitura = _conectar(self.caminho, check_same_thread=False)  # fechar() pode rodar em to_thread
+        self._leitura.executescript(_ESQUEMA)
+        self._leitura.commit()
+
+        self._fila = queue.Queue()
+        self._thread = threading.Thread(target=self._gravar, name='DiarioOperacoes', daemon=True)
+        self._thread.start()
+
+        # 📊 Contadores
+        self.lotes = 0
+        self.escritas = 0
+        self.erros = 0
+
+    # ✍️ Escrita (thread dedicada)
+    def registrar_operacao(self, registro):
+        self._fila.put(('operacao', tuple(registro.get(coluna) for coluna in _COLUNAS_OPERACAO)))
+
+    def registrar_ciclo(self, numero, inicio, duracao, previsoes, operacoes, status):
+        self._fila.put(('ciclo', (numero, inicio, duracao, previsoes, operacoes, status)))
+
+    def salvar_contadores(self, contadores):
+        self._fila.put(('contadores', [(nome, json.dumps(valor)) for nome, valor in contadores.items()]))
+
+    def _gravar(self):
+        conexao = _conectar(self.caminho)
+        fim = False
+        while not fim:
+            lote = [self._fila.get()]
+            prazo = time.monotonic() + self.intervalo
+            while len(lote) < self.tamanho_lote and lote[-1] is not _FIM:
+                try:
+                    lote.append(self._fila.get(timeout=max(prazo - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            if lote[-1] is _FIM:
+                lote.pop()
+                fim = True
+            if not lote:
+                continue
+
+            try:
+                with conexao:  # Uma transação por lote
+                    for tipo, dados in lote:
+                        if tipo == 'operacao':
+                            conexao.execute(
+                                f'INSERT INTO operacoes ({", ".join(_COLUNAS_OPERACAO)}) '
+                                f'VALUES ({", ".join("?" * len(_COLUNAS_OPERACAO))})', dados
+                            )
+                            registro = dict(zip(_COLUNAS_OPERACAO, dados))
+                            lucro = registro['lucro'] or 0.0
+                            conexao.execute(
+                                'INSERT INTO resumo_pares VALUES (?, 1, ?, ?, ?, ?) ON CONFLICT(par) DO UPDATE SET '
+                                'operacoes = operacoes + 1, compras = compras + excluded.compras, '
+                                'vendas = vendas + excluded.vendas, lucrativas = lucrativas + excluded.lucrativas, '
+                                'lucro = lucro + excluded.lucro',
+                                (registro['par'], registro['lado'] == 'buy', registro['lado'] == 'sell', lucro > 0, lucro)
+                            )
+                        elif tipo == 'ciclo':
+                            conexao.execute('INSERT INTO ciclos VALUES (?, ?, ?, ?, ?, ?)', dados)
+                        else:
+                            conexao.executemany('INSERT OR REPLACE INTO contadores VALUES (?, ?)', dados)
+                self.lotes += 1
+                self.escritas += len(lote)
+            except sqlite3.Error as e:
+                self.erros += 1
+                logger.error(f"❌ Erro ao gravar diário ({len(lote)} registros perdidos): {e}")
+        conexao.close()
+
+    def fechar(self):
+        """Gravar o que está na fila e fechar as conexões (bloqueia até terminar)"""
+        if self._thread.is_alive():
+            self._fila.put(_FIM)
+            self._thread.join()
+        self._leitura.close()
+
+    # 📖 Leitura (consultas indexadas)
+    def contadores(self):
+        return {nome: json.loads(valor) for nome, valor in self._leitura.execute('SELECT nome, valor FROM contadores')}
+
+    def ultimas_operacoes(self, limite=5, par=None):
+        """Operações mais recentes primeiro"""
+        sql = f'SELECT {", ".join(_COLUNAS_OPERACAO)} FROM operacoes'
+        parametros = ()
+        if par:
+            sql += ' WHERE par = ?'
+            parametros = (par,)
+        sql += ' ORDER BY timestamp DESC, seq DESC LIMIT ?'
+        linhas = self._leitura.execute(sql, parametros + (limite,)).fetchall()
+        return [dict(zip(_COLUNAS_OPERACAO, linha)) for linha in linhas]
+
+    def desempenho(self, desde=None):
+        """Totais por par (operações, compras, vendas, lucrativas, lucro) desde o timestamp ISO `desde`
+
+        Sem `desde` lê o resumo mantido a cada escrita, que custa O(pares).
+        """
+        if desde:
+            sql = ('SELECT par, COUNT(*), SUM(lado = \'buy\'), SUM(lado = \'sell\'), '
+                   'SUM(lucro > 0), COALESCE(SUM(lucro), 0) FROM operacoes '
+                   'WHERE timestamp >= ? GROUP BY par ORDER BY COUNT(*) DESC')
+            parametros = (desde,)
+        else:
+            sql = 'SELECT * FROM resumo_pares ORDER BY operacoes DESC'
+            parametros = ()
+        return {
+            par: {'operacoes': total, 'compras': compras or 0, 'vendas': vendas or 0,
+                  'lucrativas': lucrativas or 0, 'lucro': lucro}
+            for par, total, compras, vendas, lucrativas, lucro in self._leitura.execute(sql, parametros)
+        }
+
+    def estatisticas(self):
+        return {
+            'pendentes': self._fila.qsize(),
+            'lotes': self.lotes,
+            'escritas': self.escritas,
+            'erros': self.erros,
+        }
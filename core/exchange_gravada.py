@@ -0,0 +1,88 @@
+import json
+import logging
+import numpy as np
+import ccxt.async_support as ccxt
+
+logger = logging.getLogger('ExchangeGravada')
+
+
+class ExchangeGravada:
+    """Stand-in offline de uma exchange ccxt que responde `fetch_ohlcv` com candles gravados
+
+    Pagina como a Bybit (candles a partir de `since` até `params['until']`,
+    inclusivo, no máximo `limite_maximo` por chamada) e pode simular falhas de rede nas primeiras chamadas, o que
+    basta para exercitar o BaixadorHistorico e o ArmazemCandles sem internet.
+    """
+
+    def __init__(self, candles=None, id='bybit', limite_maximo=1000, falhas=0):
+        self.id = id
+        self.limite_maximo = limite_maximo
+        self.falhas = falhas
+        self.chamadas = 0
+        self.candles = {}
+        for par, timeframes in (candles or {}).items():
+            for timeframe, ohlcv in timeframes.items():
+                self.adicionar(par, timeframe, ohlcv)
+
+    def adicionar(self, par, timeframe, ohlcv):
+        linhas = np.asarray(ohlcv, dtype=np.float64).reshape(-1, 6)
+        chave = (par, timeframe)
+        if chave in self.candles:
+            linhas = np.concatenate([self.candles[chave], linhas])
+        _, unicos = np.unique(linhas[:, 0], return_index=True)
+        self.candles[chave] = linhas[unicos]
+
+    @classmethod
+    def carregar(cls, caminho, **kwargs):
+        """Gravação em JSON: {par: {timeframe: [[ts, o, h, l, c, v], ...]}}"""
+        with open(caminho, encoding='utf-8') as arquivo:
+            return cls(json.load(arquivo), **kwargs)
+
+    def salvar(self, caminho):
+        gravacao = {}
+        for (par, timeframe), linhas in self.candles.items():
+            gravacao.setdefault(par, {})[timeframe] = linhas.tolist()
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            json.dump(gravacao, arquivo)
+
+    async def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params={}):
+        self.chamadas += 1
+        if self.falhas:
+            self.falhas -= 1
+            raise ccxt.NetworkError('falha simulada')
+
+        linhas = self.candles.get((symbol, timeframe))
+        if linhas is None:
+            return []
+        limite = min(limit or self.limite_maximo, self.limite_maximo)
+        if params.get('until') is not None:
+            linhas = linhas[linhas[:, 0] <= params['until']]
+        if since is None:
+            return linhas[-limite:].tolist()
+        inicio = int(np.searchsorted(linhas[:, 0], since))
+        return linhas[inicio:inicio + limite].tolist()
+
+    async def close(self):
+        pass
+
+
+class GravadorOHLCV:
+    """Envolve uma exchange real e grava as respostas de `fetch_ohlcv` para replay offline"""
+
+    def __init__(self, exchange):
+        self.exchange = exchange
+        self.id = exchange.id
+        self.gravacao = ExchangeGravada(id=exchange.id)
+
+    async def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params={}):
+        resposta = await self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit, params=params)
+        if resposta:
+            self.gravacao.adicionar(symbol, timeframe, resposta)
+        return resposta
+
+    def salvar(self, caminho):
+        self.gravacao.salvar(caminho)
+        logger.info(f"💾 Gravação salva em {caminho}")
+
+    async def close(self):
+        await self.exchange.close()
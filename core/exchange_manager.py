@@ -1,37 +1,73 @@
-import ccxt
+import ccxt.async_support as ccxt
 import logging
 import asyncio
 import time
 import numpy as np
 from decimal import Decimal, ROUND_DOWN
 from core.config import config
+from core.mercados import IndiceMercados, CachePrecos
+from core.saldo import ServicoSaldo
+from core.metricas import instrumentar_exchange
+from core.agendador import AgendadorRequisicoes
 
 logger = logging.getLogger('ExchangeManager')
 
 class BybitManager:
     """Gerenciador Bybit - Modo Testes Seguros com R$100"""
     
-    def __init__(self):
-        # 🔥 CONEXÃO REAL MAS COM PROTEGÇÕES
-        self.exchange = ccxt.bybit({
+    def __init__(self, exchange=None):
+        # 🔥 CONEXÃO REAL MAS COM PROTEGÇÕES (ou uma exchange compatível injetada)
+        self.exchange = exchange or ccxt.bybit({
             'apiKey': config.BYBIT_API_KEY,
             'secret': config.BYBIT_API_SECRET,
             'sandbox': config.BYBIT_TESTNET,
-            'enableRateLimit': True,
+            'enableRateLimit': False,  # O ritmo é do AgendadorRequisicoes
             'options': {'defaultType': 'spot'}
         })
+        instrumentar_exchange(self.exchange)  # 📈 Latência e erros por método
+        
+        # 🚦 Baldes por categoria com prioridade (por fora da medição: a espera na fila não conta como latência)
+        self.agendador = AgendadorRequisicoes()
+        self.agendador.envolver(self.exchange)
         
         self.modo_offline = False
         self.saldo_inicial = 0
-        self._verificar_configuracao_segura()
+        
+        # ⚡ Limite de requisições simultâneas (sessão HTTP compartilhada)
+        self._limite_concorrencia = asyncio.Semaphore(config.MAX_REQUISICOES_CONCORRENTES)
+        
+        # 📚 Metadados de mercado e últimos preços (dimensionamento sem round-trips extras)
+        self.mercados = IndiceMercados(self.exchange)
+        self.precos = CachePrecos()
+        
+        # 💵 Saldo local atualizado pelas execuções
+        self.saldo = ServicoSaldo(self.exchange)
         logger.info("💰 BYBIT MANAGER - MODO TESTES SEGUROS ATIVADO!")
     
-    def _verificar_configuracao_segura(self):
+    def agora_ms(self):
+        """Relógio da exchange em ms (a simulada pode adiantar o tempo)"""
+        return int(time.time() * 1000)
+    
+    async def inicializar(self):
+        """Conectar e validar a conta (chamar dentro do event loop)"""
+        await self._verificar_configuracao_segura()
+        if not self.modo_offline:
+            self.mercados.iniciar_renovacao()
+    
+    async def fechar(self):
+        """Fechar a sessão HTTP compartilhada"""
+        self.mercados.parar()
+        try:
+            await self.exchange.close()
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao fechar sessão Bybit: {e}")
+    
+    async def _verificar_configuracao_segura(self):
         """Verificação de segurança para testes"""
         try:
             # Verificar saldo real
-            balance = self.exchange.fetch_balance()
-            saldo_usdt = float(balance['total'].get('USDT', 0))
+            saldos = await self.saldo.reconciliar()
+            saldo_usdt = saldos.get('USDT', 0.0)
             self.saldo_inicial = saldo_usdt
             
             logger.info(f"💰 SALDO INICIAL: {saldo_usdt} USDT")
@@ -44,9 +80,9 @@ class BybitManager:
                 logger.warning("⚠️ SALDO ALTO - Confirme que quer operar real")
             
             # Verificar pares acessíveis
-            markets = self.exchange.load_markets()
+            await self.mercados.carregar()
             for par in config.PARES_MONITORADOS:
-                if par not in markets:
+                if self.mercados.info(par) is None:
                     logger.warning(f"⚠️ Par não disponível: {par}")
             
             logger.info("✅ CONFIGURAÇÃO SEGURA - PRONTO PARA TESTES")
@@ -55,11 +91,10 @@ class BybitManager:
             logger.error(f"❌ ERRO CONFIGURAÇÃO: {e}")
             self.modo_offline = True
     
-    def obter_saldo(self):
-        """Obter saldo REAL com verificações"""
+    async def obter_saldo(self):
+        """Obter saldo REAL com verificações (servido pelo ServicoSaldo)"""
         try:
-            balance = self.exchange.fetch_balance()
-            saldo = float(balance['total'].get('USDT', 0))
+            saldo = await self.saldo.obter('USDT')
             
             # 🔒 VERIFICAÇÃO DE SEGURANÇA
             if saldo < 5:  # Mínimo $5 USD
@@ -72,28 +107,33 @@ class BybitManager:
             logger.error(f"❌ Erro ao obter saldo: {e}")
             return 0.0
     
-    def _calcular_quantidade_segura(self, par, valor_usdt):
+    async def _calcular_quantidade_segura(self, par, valor_usdt):
         """Calcular quantidade com MÚLTIPLAS proteções"""
         try:
-            # 1. Obter preço atual
-            ticker = self.exchange.fetch_ticker(par)
-            preco_atual = ticker['last']
-            
-            if preco_atual == 0:
+            # 1. Obter preço atual (cache do último OHLCV/ticker, ticker só se velho)
+            preco_atual = self.precos.obter(par)
+            if preco_atual is None:
+                ticker = await self.exchange.fetch_ticker(par)
+                preco_atual = ticker['last']
+                self.precos.registrar(par, preco_atual)
+            
+            if not preco_atual:
                 raise Exception(f"Preço zero para {par}")
             
             # 2. Calcular quantidade
             quantidade = valor_usdt / preco_atual
             
-            # 3. Obter informações de precisão
-            mercado = self.exchange.load_markets()
-            symbol_info = mercado[par]
+            # 3. Obter informações de precisão (índice em memória)
+            symbol_info = self.mercados.info(par)
+            if symbol_info is None:
+                raise Exception(f"Mercado desconhecido: {par}")
             
             # 4. Aplicar precisão
-            precision = symbol_info['precision']['amount']
-            quantidade = float(Decimal(str(quantidade)).quantize(
-                Decimal(str(precision)), rounding=ROUND_DOWN
-            ))
+            # (múltiplo do passo, que pode ser maior que 1: quantize só acertaria as casas)
+            passo = Decimal(str(symbol_info['precision']['amount']))
+            quantidade = float(
+                (Decimal(str(quantidade)) / passo).to_integral_value(rounding=ROUND_DOWN) * passo
+            )
             
             # 5. Verificar quantidade mínima
             min_amount = symbol_info['limits']['amount']['min']
@@ -102,7 +142,7 @@ class BybitManager:
                 quantidade = min_amount
             
             logger.info(f"📊 {par}: Preço=${preco_atual:.4f}, Qtd={quantidade:.6f}")
-            return quantidade
+            return quantidade, preco_atual
             
         except Exception as e:
             logger.error(f"❌ Erro cálculo quantidade {par}: {e}")
@@ -116,25 +156,30 @@ class BybitManager:
         try:
             logger.info(f"💰 EXECUTANDO ORDEM: {par} {direcao} ${valor_usdt}")
             
-            # 🛡️ VERIFICAÇÕES DE SEGURANÇA
-            saldo_atual = self.obter_saldo()
-            
-            # 1. Verificar saldo suficiente
-            if saldo_atual < valor_usdt:
-                raise Exception(f"Saldo insuficiente: ${saldo_atual:.2f} < ${valor_usdt}")
+            # 🛡️ VERIFICAÇÕES DE SEGURANÇA (vendas liberam USDT: o ativo é conferido no pipeline)
+            saldo_atual = await self.obter_saldo()
             
-            # 2. Verificar limite por trade (não mais que 50% do saldo)
-            if valor_usdt > saldo_atual * 0.5:
-                raise Exception(f"Valor muito alto: ${valor_usdt} > 50% do saldo")
+            if direcao.upper() == 'BUY':
+                # 1. Verificar saldo suficiente
+                if saldo_atual < valor_usdt:
+                    raise Exception(f"Saldo insuficiente: ${saldo_atual:.2f} < ${valor_usdt}")
+                
+                # 2. Verificar limite por trade (não mais que 50% do saldo)
+                if valor_usdt > saldo_atual * 0.5:
+                    raise Exception(f"Valor muito alto: ${valor_usdt} > 50% do saldo")
             
             # 3. Calcular quantidade segura
-            quantidade = self._calcular_quantidade_segura(par, valor_usdt)
+            quantidade, preco_ref = await self._calcular_quantidade_segura(par, valor_usdt)
             
-            # 4. Executar ordem
+            # 4. Executar ordem (único round-trip; o preço de referência deixa a
+            #    Bybit calcular o custo da compra a mercado sem consultar o ticker)
             if direcao.upper() == 'BUY':
-                ordem = self.exchange.create_market_buy_order(par, quantidade)
+                ordem = await self.exchange.create_order(par, 'market', 'buy', quantidade, preco_ref)
             else:
-                ordem = self.exchange.create_market_sell_order(par, quantidade)
+                ordem = await self.exchange.create_market_sell_order(par, quantidade)
+            
+            # Atualizar saldo local (ou invalidar, se a resposta vier incompleta)
+            self.saldo.registrar_execucao(par, ordem)
             
             logger.info(f"✅ ORDEM EXECUTADA: {ordem['id']} - ${ordem['cost']:.2f}")
             
@@ -157,12 +202,22 @@ class BybitManager:
             logger.error(f"❌ ERRO ORDEM {par}: {e}")
             raise
     
-    def obter_dados_mercado(self, par, timeframe='15m', limit=50):
-        """Obter dados do mercado"""
+    async def obter_dados_mercado(self, par, timeframe='15m', limit=50, since=None, fallback=True):
+        """Obter dados do mercado (desde `since` em ms, se informado)
+
+        Chamadas em paralelo (ex.: `ArmazemCandles.atualizar`) ficam limitadas
+        a MAX_REQUISICOES_CONCORRENTES aqui mesmo.
+        """
         try:
-            return self.exchange.fetch_ohlcv(par, timeframe, limit=limit)
+            async with self._limite_concorrencia:
+                ohlcv = await self.exchange.fetch_ohlcv(par, timeframe, since=since, limit=limit)
+            if ohlcv:
+                self.precos.registrar(par, ohlcv[-1][4])
+            return ohlcv
         except Exception as e:
             logger.warning(f"⚠️ Erro dados {par}: {e}")
+            if not fallback:
+                return []
             # Fallback simples
             return self._dados_fallback(par, limit)
     
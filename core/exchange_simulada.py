@@ -0,0 +1,430 @@
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime, timezone
+import numpy as np
+import ccxt.async_support as ccxt
+from core.config import config
+from core.candles import duracao_timeframe_ms
+from core.exchange_manager import BybitManager
+from core.mercados import IndiceMercados
+
+logger = logging.getLogger('ExchangeSimulada')
+
+MINUTO_MS = 60_000
+DIA_MS = 86_400_000
+
+# Preços de partida dos pares monitorados; outros pares começam em 1.0
+PRECOS_INICIAIS = {
+    'XRP/USDT': 0.5,
+    'ADA/USDT': 0.4,
+    'MATIC/USDT': 0.7,
+    'DOGE/USDT': 0.15,
+    'SHIB/USDT': 0.00001,
+}
+
+# Falhas transitórias sorteadas pela injeção de erros
+ERROS_INJETADOS = (ccxt.NetworkError, ccxt.RequestTimeout, ccxt.ExchangeNotAvailable, ccxt.RateLimitExceeded)
+
+
+def mercado_simulado(par, preco, taxa):
+    """Mercado no formato ccxt, com passos de preço e quantidade proporcionais ao preço"""
+    base, cotacao = par.split('/')
+    ordem = math.floor(math.log10(preco))
+    passo_preco = float(f'1e{ordem - 4}')                 # 5 algarismos significativos
+    passo_quantidade = float(f'1e{max(-6, -ordem - 2)}')  # Centavos de dólar por passo
+    return {
+        'id': f'{base}{cotacao}',
+        'symbol': par,
+        'base': base,
+        'quote': cotacao,
+        'type': 'spot',
+        'spot': True,
+        'active': True,
+        'taker': taxa,
+        'maker': taxa,
+        'precision': {'amount': passo_quantidade, 'price': passo_preco},
+        'limits': {
+            'amount': {'min': passo_quantidade, 'max': passo_quantidade * 1e9},
+            'cost': {'min': 1.0, 'max': None},
+        },
+    }
+
+
+def _multiplo(valor, passo):
+    razao = valor / passo
+    return abs(razao - round(razao)) <= 1e-9 * max(1.0, abs(razao))
+
+
+class LivroSimulado:
+    """Livro de ofertas de um par em torno do preço médio
+
+    Níveis espaçados de `passo_nivel` (relativo) com liquidez exponencial em
+    USDT por nível. Ordens a mercado consomem os níveis, então o slippage
+    cresce com o tamanho e com ordens seguidas no mesmo minuto.
+    """
+
+    def __init__(self, meio, mercado, rng, niveis, liquidez, spread, passo_nivel, minuto):
+        passo = mercado['precision']['price']
+        afastamento = spread / 2 + np.arange(niveis) * passo_nivel
+        casas = max(0, -math.floor(math.log10(passo)))
+        precos_ask = np.round(np.ceil(meio * (1 + afastamento) / passo) * passo, casas)
+        precos_bid = np.round(np.floor(meio * (1 - afastamento) / passo) * passo, casas)
+        self.asks = np.column_stack([precos_ask, rng.exponential(liquidez, niveis) / precos_ask])
+        self.bids = np.column_stack([precos_bid, rng.exponential(liquidez, niveis) / np.maximum(precos_bid, passo)])
+        self.minuto = minuto
+
+    def melhor(self, lado):
+        """Melhor preço do lado do livro ('asks' ou 'bids') com quantidade disponível"""
+        niveis = self.asks if lado == 'asks' else self.bids
+        disponiveis = niveis[niveis[:, 1] > 0]
+        return float(disponiveis[0, 0]) if len(disponiveis) else None
+
+    def consumir(self, lado, quantidade, limite=None, executar=True):
+        """(quantidade executada, custo) de uma ordem `lado` percorrendo o lado oposto
+
+        Com `limite`, para no primeiro nível pior que o preço (IOC). Com
+        `executar=False` só simula, sem tirar liquidez do livro.
+        """
+        niveis = self.asks if lado == 'buy' else self.bids
+        restante, custo = quantidade, 0.0
+        for i in range(len(niveis)):
+            preco, disponivel = niveis[i]
+            if limite is not None and (preco > limite if lado == 'buy' else preco < limite):
+                break
+            if disponivel <= 0:
+                continue
+            executado = min(restante, disponivel)
+            if executar:
+                niveis[i, 1] -= executado
+            custo += executado * preco
+            restante -= executado
+            if restante <= quantidade * 1e-12:
+                restante = 0.0
+                break
+        return quantidade - restante, custo
+
+    def profundidade(self, limite=None):
+        asks = self.asks[self.asks[:, 1] > 0][:limite]
+        bids = self.bids[self.bids[:, 1] > 0][:limite]
+        return asks.tolist(), bids.tolist()
+
+
+class ExchangeSimulada:
+    """Exchange ccxt simulada em memória para paper trading e testes de carga
+
+    Cada par segue um passeio aleatório em resolução de 1 minuto, gerado sob
+    demanda até o relógio atual; candles de qualquer timeframe são agregados
+    desse caminho. Ordens a mercado (e limitadas, como IOC) casam contra o
+    LivroSimulado com taxa taker, respeitando precisão, limites e saldo.
+    Latência e falhas transitórias são sorteadas por chamada.
+
+    O relógio é o real mais um deslocamento: `avancar(segundos)` adianta o
+    mercado sem esperar, o que permite milhares de ciclos por minuto.
+    """
+
+    def __init__(self, pares=None, saldo=None, precos=None, taxa=None, latencia=None,
+                 variacao_latencia=None, taxa_erros=None, erros_por_metodo=None,
+                 volatilidade=0.002, niveis=20, liquidez=2000.0, spread=0.0005,
+                 passo_nivel=0.0005, historico_minutos=7 * 24 * 60, semente=None, id='simulada'):
+        self.id = id
+        self.taxa = config.TAXA_BACKTEST if taxa is None else taxa
+        self.latencia = config.LATENCIA_SIMULADA if latencia is None else latencia
+        self.variacao_latencia = self.latencia / 2 if variacao_latencia is None else variacao_latencia
+        self.taxa_erros = config.TAXA_ERROS_SIMULADA if taxa_erros is None else taxa_erros
+        self.erros_por_metodo = dict(erros_por_metodo or {})
+        self.volatilidade = volatilidade
+        self.niveis = niveis
+        self.liquidez = liquidez
+        self.spread = spread
+        self.passo_nivel = passo_nivel
+        self.historico_minutos = historico_minutos
+        self._rng = np.random.default_rng(semente)
+        self._deslocamento_ms = 0
+
+        precos = {**PRECOS_INICIAIS, **(precos or {})}
+        self.markets = {
+            par: mercado_simulado(par, precos.get(par, 1.0), self.taxa)
+            for par in (pares or config.PARES_MONITORADOS)
+        }
+        self._precos_iniciais = {par: precos.get(par, 1.0) for par in self.markets}
+        self._caminhos = {}  # par -> (n, 6) candles de 1 minuto
+        self._livros = {}
+        self.saldos = {moeda: float(valor) for moeda, valor in (saldo or config.SALDO_SIMULADO).items()}
+        self.ordens = {}
+        self._proxima_ordem = 1
+
+        # 📊 Contadores
+        self.chamadas = {}
+        self.erros = {}
+        self.ordens_executadas = 0
+        self.ordens_rejeitadas = 0
+        self.volume = 0.0
+        self.taxas_pagas = 0.0
+        self.slippage_total = 0.0  # Soma de |preço médio / meio - 1| das execuções
+
+    # RELÓGIO
+    def agora_ms(self):
+        return int(time.time() * 1000) + self._deslocamento_ms
+
+    def avancar(self, segundos):
+        """Adiantar o relógio do mercado simulado"""
+        self._deslocamento_ms += int(segundos * 1000)
+
+    # MERCADO
+    def _caminho(self, par):
+        """Candles de 1 minuto do par até o minuto corrente (inclusive)"""
+        if par not in self.markets:
+            raise ccxt.BadSymbol(f'{self.id} não tem o mercado {par}')
+
+        minuto_atual = self.agora_ms() // MINUTO_MS * MINUTO_MS
+        linhas = self._caminhos.get(par)
+        if linhas is None:
+            inicio = (minuto_atual - self.historico_minutos * MINUTO_MS) // DIA_MS * DIA_MS
+            linhas = self._gerar(self._precos_iniciais[par], inicio, (minuto_atual - inicio) // MINUTO_MS + 1)
+        elif linhas[-1, 0] < minuto_atual:
+            novos = self._gerar(linhas[-1, 4], int(linhas[-1, 0]) + MINUTO_MS,
+                                (minuto_atual - int(linhas[-1, 0])) // MINUTO_MS)
+            linhas = np.concatenate([linhas, novos])
+            if len(linhas) > 2 * self.historico_minutos:
+                # Descarta em dias inteiros para manter os candles diários alinhados
+                corte = (len(linhas) - self.historico_minutos) // 1440 * 1440
+                linhas = linhas[corte:]
+        else:
+            return linhas
+
+        self._caminhos[par] = linhas
+        return linhas
+
+    def _gerar(self, ultimo, inicio, n):
+        retornos = self._rng.normal(0, self.volatilidade, n)
+        fechamentos = ultimo * np.exp(np.cumsum(retornos))
+        aberturas = np.concatenate([[ultimo], fechamentos[:-1]])
+        pavios = np.abs(self._rng.normal(0, self.volatilidade / 2, (2, n)))
+        return np.column_stack([
+            inicio + np.arange(n, dtype=np.float64) * MINUTO_MS,
+            aberturas,
+            np.maximum(aberturas, fechamentos) * (1 + pavios[0]),
+            np.minimum(aberturas, fechamentos) * (1 - pavios[1]),
+            fechamentos,
+            self._rng.exponential(self.liquidez * 5, n) / fechamentos,
+        ])
+
+    def _livro(self, par):
+        linhas = self._caminho(par)
+        minuto = int(linhas[-1, 0])
+        livro = self._livros.get(par)
+        if livro is None or livro.minuto != minuto:
+            # Novo minuto: liquidez reposta em torno do novo preço
+            livro = LivroSimulado(float(linhas[-1, 4]), self.markets[par], self._rng, self.niveis,
+                                  self.liquidez, self.spread, self.passo_nivel, minuto)
+            self._livros[par] = livro
+        return livro
+
+    async def _chamada(self, metodo):
+        """Contar, esperar a latência sorteada e, às vezes, falhar"""
+        self.chamadas[metodo] = self.chamadas.get(metodo, 0) + 1
+        atraso = max(0.0, self._rng.normal(self.latencia, self.variacao_latencia)) if self.latencia else 0.0
+        await asyncio.sleep(atraso)
+
+        taxa = self.erros_por_metodo.get(metodo, self.taxa_erros)
+        if taxa and self._rng.random() < taxa:
+            self.erros[metodo] = self.erros.get(metodo, 0) + 1
+            erro = ERROS_INJETADOS[self._rng.integers(len(ERROS_INJETADOS))]
+            raise erro(f'{self.id} {metodo}: falha simulada')
+
+    # API ccxt
+    async def load_markets(self, reload=False, params={}):
+        await self._chamada('load_markets')
+        return self.markets
+
+    def set_markets(self, markets, currencies=None):
+        for mercado in markets:
+            if mercado['symbol'] in self.markets:
+                self.markets[mercado['symbol']] = mercado
+        return self.markets
+
+    async def fetch_balance(self, params={}):
+        await self._chamada('fetch_balance')
+        saldos = dict(self.saldos)
+        balance = {'total': saldos, 'free': dict(saldos), 'used': {moeda: 0.0 for moeda in saldos}}
+        for moeda, valor in saldos.items():
+            balance[moeda] = {'total': valor, 'free': valor, 'used': 0.0}
+        return balance
+
+    async def fetch_ticker(self, symbol, params={}):
+        await self._chamada('fetch_ticker')
+        linhas, livro = self._caminho(symbol), self._livro(symbol)
+        return {
+            'symbol': symbol,
+            'timestamp': self.agora_ms(),
+            'last': float(linhas[-1, 4]),
+            'bid': livro.melhor('bids'),
+            'ask': livro.melhor('asks'),
+        }
+
+    async def fetch_order_book(self, symbol, limit=None, params={}):
+        await self._chamada('fetch_order_book')
+        asks, bids = self._livro(symbol).profundidade(limit)
+        return {'symbol': symbol, 'timestamp': self.agora_ms(), 'asks': asks, 'bids': bids}
+
+    async def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params={}):
+        await self._chamada('fetch_ohlcv')
+        linhas = self._caminho(symbol)
+        duracao = duracao_timeframe_ms(timeframe)
+        limite = min(limit or config.LIMITE_PAGINA_OHLCV, config.LIMITE_PAGINA_OHLCV)
+
+        if since is None:
+            inicio = self.agora_ms() // duracao * duracao - (limite - 1) * duracao
+        else:
+            inicio = -(-int(since) // duracao) * duracao  # Primeiro candle que abre em `since` ou depois
+        primeiro = max(0, (inicio - int(linhas[0, 0])) // MINUTO_MS)
+        bloco = linhas[primeiro:primeiro + limite * (duracao // MINUTO_MS)]
+        if not len(bloco):
+            return []
+
+        chaves = bloco[:, 0] // duracao
+        cortes = np.flatnonzero(np.r_[True, chaves[1:] != chaves[:-1]])
+        ultimos = np.r_[cortes[1:] - 1, len(bloco) - 1]
+        ohlcv = np.column_stack([
+            chaves[cortes] * duracao,
+            bloco[cortes, 1],
+            np.maximum.reduceat(bloco[:, 2], cortes),
+            np.minimum.reduceat(bloco[:, 3], cortes),
+            bloco[ultimos, 4],
+            np.add.reduceat(bloco[:, 5], cortes),
+        ])
+        return ohlcv[:limite].tolist()
+
+    def _validar(self, mercado, tipo, lado, quantidade, preco):
+        if tipo not in ('market', 'limit'):
+            raise ccxt.NotSupported(f'{self.id} não simula ordens {tipo}')
+        if lado not in ('buy', 'sell'):
+            raise ccxt.InvalidOrder(f'Lado inválido: {lado}')
+        if tipo == 'limit' and preco is None:
+            raise ccxt.ArgumentsRequired('Ordem limitada sem preço')
+
+        precisao, limites = mercado['precision'], mercado['limits']['amount']
+        if quantidade <= 0 or not _multiplo(quantidade, precisao['amount']):
+            raise ccxt.InvalidOrder(f"Quantidade {quantidade} fora do passo {precisao['amount']}")
+        if quantidade < limites['min'] or quantidade > limites['max']:
+            raise ccxt.InvalidOrder(f"Quantidade {quantidade} fora dos limites [{limites['min']}, {limites['max']}]")
+        if tipo == 'limit' and not _multiplo(preco, precisao['price']):
+            raise ccxt.InvalidOrder(f"Preço {preco} fora do passo {precisao['price']}")
+
+    async def create_order(self, symbol, type, side, amount, price=None, params={}):
+        await self._chamada('create_order')
+        mercado = self.markets.get(symbol)
+        if mercado is None:
+            raise ccxt.BadSymbol(f'{self.id} não tem o mercado {symbol}')
+
+        try:
+            quantidade = float(amount)
+            limite = float(price) if type == 'limit' else None  # A mercado, o preço é só referência
+            self._validar(mercado, type, side, quantidade, limite)
+
+            livro = self._livro(symbol)
+            meio = float(self._caminho(symbol)[-1, 4])
+            executado, custo = livro.consumir(side, quantidade, limite, executar=False)
+            if executado * (limite or meio) < mercado['limits']['cost']['min'] and type == 'market':
+                raise ccxt.InvalidOrder(f"Valor abaixo do mínimo de {mercado['limits']['cost']['min']} {mercado['quote']}")
+
+            taxa = custo * self.taxa
+            base, cotacao = mercado['base'], mercado['quote']
+            if side == 'buy' and custo + taxa > self.saldos.get(cotacao, 0.0):
+                raise ccxt.InsufficientFunds(f'{cotacao} insuficiente: {self.saldos.get(cotacao, 0.0):.8f} < {custo + taxa:.8f}')
+            if side == 'sell' and quantidade > self.saldos.get(base, 0.0):
+                raise ccxt.InsufficientFunds(f'{base} insuficiente: {self.saldos.get(base, 0.0):.8f} < {quantidade}')
+        except ccxt.BaseError:
+            self.ordens_rejeitadas += 1
+            raise
+
+        livro.consumir(side, quantidade, limite)
+        sinal = 1 if side == 'buy' else -1
+        self.saldos[base] = self.saldos.get(base, 0.0) + sinal * executado
+        self.saldos[cotacao] = self.saldos.get(cotacao, 0.0) - sinal * custo - taxa
+
+        agora = self.agora_ms()
+        preco_medio = custo / executado if executado else None
+        ordem = {
+            'id': str(self._proxima_ordem),
+            'clientOrderId': params.get('clientOrderId'),
+            'timestamp': agora,
+            'datetime': datetime.fromtimestamp(agora / 1000, timezone.utc).isoformat(),
+            'symbol': symbol,
+            'type': type,
+            'side': side,
+            'price': preco_medio if type == 'market' else limite,
+            'average': preco_medio,
+            'amount': quantidade,
+            'filled': executado,
+            'remaining': quantidade - executado,
+            'cost': custo,
+            'status': 'closed' if executado == quantidade else 'canceled',
+            'fee': {'cost': taxa, 'currency': cotacao},
+            'trades': [],
+            'info': {},
+        }
+        self._proxima_ordem += 1
+        self.ordens[ordem['id']] = ordem
+
+        if executado:
+            self.ordens_executadas += 1
+            self.volume += custo
+            self.taxas_pagas += taxa
+            self.slippage_total += abs(preco_medio / meio - 1)
+        return ordem
+
+    async def create_market_buy_order(self, symbol, amount, params={}):
+        return await self.create_order(symbol, 'market', 'buy', amount, None, params)
+
+    async def create_market_sell_order(self, symbol, amount, params={}):
+        return await self.create_order(symbol, 'market', 'sell', amount, None, params)
+
+    async def fetch_order(self, id, symbol=None, params={}):
+        await self._chamada('fetch_order')
+        if id not in self.ordens:
+            raise ccxt.OrderNotFound(f'Ordem {id} não encontrada')
+        return self.ordens[id]
+
+    async def cancel_order(self, id, symbol=None, params={}):
+        await self._chamada('cancel_order')
+        # Nada fica no livro: toda ordem termina executada ou cancelada (IOC)
+        raise ccxt.OrderNotFound(f'Ordem {id} não está aberta')
+
+    async def close(self):
+        pass
+
+    def patrimonio(self, moeda='USDT'):
+        """Saldo total marcado ao último preço de cada par"""
+        total = self.saldos.get(moeda, 0.0)
+        for par, mercado in self.markets.items():
+            quantidade = self.saldos.get(mercado['base'], 0.0)
+            if quantidade and mercado['quote'] == moeda:
+                total += quantidade * float(self._caminho(par)[-1, 4])
+        return total
+
+    def estatisticas(self):
+        return {
+            'chamadas': dict(self.chamadas),
+            'erros_injetados': dict(self.erros),
+            'ordens_executadas': self.ordens_executadas,
+            'ordens_rejeitadas': self.ordens_rejeitadas,
+            'volume': self.volume,
+            'taxas_pagas': self.taxas_pagas,
+            'slippage_medio': self.slippage_total / self.ordens_executadas if self.ordens_executadas else 0.0,
+        }
+
+
+class BybitSimulado(BybitManager):
+    """BybitManager completo sobre a ExchangeSimulada: mesmas proteções, sem dinheiro real"""
+
+    def __init__(self, exchange=None, **opcoes):
+        super().__init__(exchange or ExchangeSimulada(**opcoes))
+        self.mercados = IndiceMercados(self.exchange, caminho='')  # O cache em disco é o da Bybit real
+        logger.info(f"🧪 EXCHANGE SIMULADA: {len(self.exchange.markets)} pares, "
+                    f"saldo {self.exchange.saldos}")
+
+    def agora_ms(self):
+        return self.exchange.agora_ms()
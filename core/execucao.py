@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import time
+from core.config import config
+from core.metricas import metricas
+
+logger = logging.getLogger('Execucao')
+
+
+class PipelineExecucao:
+    """Execução concorrente das ordens de um ciclo
+
+    Ordens de pares diferentes saem juntas, limitadas por MAX_ORDENS_SIMULTANEAS
+    em voo (o ritmo é o do balde 'ordens' do AgendadorRequisicoes); no mesmo
+    par uma trava garante que nunca há duas ordens ao mesmo tempo. Compras
+    reservam o valor contra o saldo em cache antes de sair, para ordens
+    concorrentes não aprovarem todas o mesmo saldo, e posições + reservas
+    ficam abaixo de EXPOSICAO_MAXIMA do patrimônio. Vendas sem o ativo em
+    carteira (spot não vende a descoberto) nem chegam à exchange.
+
+    As compras executadas formam as posições (quantidade e preço médio de
+    entrada), que `saidas_protecao` confere contra STOP_LOSS e TAKE_PROFIT
+    entre um candle e outro. Só conhece as posições abertas nesta execução.
+    """
+
+    def __init__(self, bybit, max_simultaneas=None, exposicao_maxima=None):
+        self.bybit = bybit
+        self.max_simultaneas = max_simultaneas or config.MAX_ORDENS_SIMULTANEAS
+        self.exposicao_maxima = config.EXPOSICAO_MAXIMA if exposicao_maxima is None else exposicao_maxima
+
+        self._simultaneas = asyncio.Semaphore(self.max_simultaneas)
+        self._travas = {}    # par -> asyncio.Lock
+        self._reservas = {}  # par -> valor reservado por uma compra em voo
+        self.posicoes = {}   # par -> (quantidade, preço médio de entrada)
+
+        # 📊 Contadores
+        self.executadas = 0
+        self.recusadas = 0
+        self.falhas = 0
+        self.stops = 0
+        self.alvos = 0
+
+    def _trava(self, par):
+        if par not in self._travas:
+            self._travas[par] = asyncio.Lock()
+        return self._travas[par]
+
+    def exposicao(self, moeda='USDT'):
+        """(exposição, patrimônio) em `moeda`: posições ao último preço conhecido + compras em voo"""
+        saldos = self.bybit.saldo.saldos
+        posicoes = 0.0
+        for ativo, quantidade in saldos.items():
+            if ativo == moeda or quantidade <= 0:
+                continue
+            preco = self.bybit.precos.obter(f'{ativo}/{moeda}', idade_maxima=float('inf'))
+            if preco:
+                posicoes += quantidade * preco
+        return posicoes + sum(self._reservas.values()), posicoes + saldos.get(moeda, 0.0)
+
+    def _reservar(self, par, direcao, valor):
+        """Reservar o valor de uma compra; retorna o motivo da recusa, ou None"""
+        base, cotacao = par.split('/')
+        if direcao != 'BUY':
+            quantidade = self.bybit.saldo.saldos.get(base, 0.0)
+            mercado = self.bybit.mercados.info(par)
+            minimo = (mercado or {}).get('limits', {}).get('amount', {}).get('min') or 0.0
+            if quantidade <= 0 or quantidade < minimo:
+                return f"{base} em carteira ({quantidade:g}) abaixo do mínimo para vender"
+            return None
+
+        livre = self.bybit.saldo.saldos.get(cotacao, 0.0) - sum(self._reservas.values())
+        if valor > livre:
+            return f"saldo livre {livre:.2f} {cotacao} < {valor}"
+
+        exposicao, patrimonio = self.exposicao(cotacao)
+        if exposicao + valor > patrimonio * self.exposicao_maxima:
+            return (f"exposição {exposicao + valor:.2f} acima de "
+                    f"{self.exposicao_maxima * 100:.0f}% do patrimônio ({patrimonio:.2f})")
+
+        self._reservas[par] = valor
+        return None
+
+    def _valor_venda(self, par, valor):
+        """Valor da venda limitado ao ativo em carteira (ao último preço conhecido)
+
+        Uma posição aberta com VALOR_POR_TRADE vale menos que isso depois da
+        taxa ou de qualquer queda; a venda zera o que houver.
+        """
+        quantidade = self.bybit.saldo.saldos.get(par.split('/')[0], 0.0)
+        preco = self.bybit.precos.obter(par, idade_maxima=float('inf'))
+        return min(valor, quantidade * preco) if preco else valor
+
+    def _registrar_posicao(self, par, ordem):
+        """Atualizar a posição com a ordem executada; retorna o lucro realizado de uma venda, ou None"""
+        quantidade, preco = ordem['amount'], ordem['price']
+        atual, medio = self.posicoes.get(par, (0.0, 0.0))
+        if ordem['side'] == 'buy':
+            total = atual + quantidade
+            self.posicoes[par] = (total, (atual * medio + quantidade * preco) / total)
+            return None
+
+        if not atual:
+            return None  # Ativo comprado fora desta execução: sem preço de entrada
+        vendida = min(quantidade, atual)
+        if atual - vendida > atual * 1e-9:
+            self.posicoes[par] = (atual - vendida, medio)
+        else:
+            del self.posicoes[par]
+        return vendida * (preco - medio)
+
+    async def saidas_protecao(self):
+        """Vendas das posições que tocaram o stop loss ou o take profit
+
+        Usa o último preço em cache (alimentado pelo OHLCV e pelo stream) e só
+        consulta o ticker dos pares em carteira sem preço recente. Cada saída é
+        uma previsão SELL com `valor` da posição inteira, `motivo` e `sinal_em`.
+        """
+        if not self.posicoes:
+            return []
+
+        async def _preco(par):
+            preco = self.bybit.precos.obter(par)
+            if preco is None:
+                try:
+                    preco = (await self.bybit.exchange.fetch_ticker(par))['last']
+                    self.bybit.precos.registrar(par, preco)
+                except Exception as e:
+                    logger.warning(f"⚠️ Sem preço para proteger {par}: {e}")
+            return preco
+
+        pares = list(self.posicoes)
+        saidas = []
+        for par, preco in zip(pares, await asyncio.gather(*(_preco(par) for par in pares))):
+            if not preco or par not in self.posicoes:
+                continue
+            quantidade, entrada = self.posicoes[par]
+            quantidade = min(quantidade, self.bybit.saldo.saldos.get(par.split('/')[0], 0.0))
+            if preco <= entrada * (1 - config.STOP_LOSS):
+                motivo = 'STOP_LOSS'
+            elif preco >= entrada * (1 + config.TAKE_PROFIT):
+                motivo = 'TAKE_PROFIT'
+            else:
+                continue
+
+            info = self.bybit.mercados.info(par) or {}
+            limites = info.get('limits', {})
+            if (quantidade < (limites.get('amount', {}).get('min') or 0)
+                    or quantidade * preco < (limites.get('cost', {}).get('min') or 0)):
+                # Resto abaixo do mínimo da exchange: não há como vender
+                logger.info(f"🧹 {par}: posição residual {quantidade:g} abaixo do mínimo, deixando de acompanhar")
+                del self.posicoes[par]
+                continue
+
+            logger.warning(f"🛑 {par} {motivo}: {preco:g} (entrada {entrada:g})")
+            saidas.append({
+                'par': par, 'direcao': 'SELL', 'confianca': 100.0, 'motivo': motivo,
+                'valor': quantidade * preco, 'sinal_em': time.perf_counter(),
+            })
+        return saidas
+
+    async def _executar(self, previsao, valor, sinal_em):
+        par, direcao = previsao['par'], previsao['direcao']
+        valor = previsao.get('valor', valor)
+        sinal_em = previsao.get('sinal_em', sinal_em)
+        resultado = {'previsao': previsao, 'ordem': None, 'erro': None, 'recusada': False,
+                     'latencia': None, 'lucro': None}
+
+        async with self._trava(par):
+            motivo = self._reservar(par, direcao, valor)
+            if motivo is not None:
+                self.recusadas += 1
+                logger.warning(f"🛡️ {par} {direcao} recusada: {motivo}")
+                resultado.update(erro=motivo, recusada=True)
+                return resultado
+            if direcao != 'BUY':
+                valor = self._valor_venda(par, valor)
+
+            try:
+                async with self._simultaneas:
+                    resultado['ordem'] = await self.bybit.executar_ordem(par, direcao, valor)
+                resultado['latencia'] = time.perf_counter() - sinal_em
+                metricas.observar('tavares_ordem_segundos', resultado['latencia'], par=par)
+                self.executadas += 1
+                resultado['lucro'] = self._registrar_posicao(par, resultado['ordem'])
+                if previsao.get('motivo') == 'STOP_LOSS':
+                    self.stops += 1
+                elif previsao.get('motivo') == 'TAKE_PROFIT':
+                    self.alvos += 1
+                logger.info(f"⚡ {par} {direcao}: sinal → confirmação em {resultado['latencia'] * 1000:.0f}ms")
+            except Exception as e:
+                self.falhas += 1
+                resultado['erro'] = str(e)
+            finally:
+                self._reservas.pop(par, None)
+
+        return resultado
+
+    async def executar_lote(self, previsoes, valor=None):
+        """Executar as ordens das previsões em paralelo; um resultado por previsão, na mesma ordem
+
+        Cada resultado tem `ordem` (retorno do BybitManager), `erro`, `recusada`
+        (barrada pelo saldo/exposição, sem chegar à exchange), `latencia`
+        (segundos do sinal até a confirmação da ordem) e `lucro` (vendas de
+        posições conhecidas). Uma previsão com `valor` usa esse valor; o sinal
+        conta de `sinal_em` (time.perf_counter() de quando a previsão saiu) ou,
+        sem ele, do início do lote.
+        """
+        valor = valor or config.VALOR_POR_TRADE
+        sinal_em = time.perf_counter()
+        if not previsoes:
+            return []
+
+        await self.bybit.obter_saldo()  # Reconcilia só se o cache venceu
+        return await asyncio.gather(*(self._executar(previsao, valor, sinal_em) for previsao in previsoes))
+
+    def estatisticas(self):
+        exposicao, patrimonio = self.exposicao()
+        return {
+            'executadas': self.executadas,
+            'recusadas': self.recusadas,
+            'falhas': self.falhas,
+            'stops': self.stops,
+            'alvos': self.alvos,
+            'posicoes': len(self.posicoes),
+            'exposicao': exposicao,
+            'patrimonio': patrimonio,
+        }
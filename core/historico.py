@@ -0,0 +1,306 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+import numpy as np
+import ccxt.async_support as ccxt
+from core.config import config
+from core.candles import COLUNAS, duracao_timeframe_ms
+
+logger = logging.getLogger('Historico')
+
+
+class ArmazemHistorico:
+    """Histórico OHLCV em disco: {raiz}/{exchange}/{par}/{timeframe}/{bloco}.npy
+
+    Cada bloco cobre um trecho fixo do calendário (BARRAS_POR_BLOCO barras),
+    com uma linha por barra na posição (timestamp - início) / duração. Barras
+    ausentes ficam NaN, então lacunas aparecem direto no arquivo. Os blocos
+    são gravados em ordem Fortran (cada coluna contígua) e lidos por memmap;
+    num bloco que já existe só as linhas recebidas são escritas, no lugar.
+    """
+
+    def __init__(self, raiz=None, exchange_id='bybit', barras_por_bloco=None):
+        self.raiz = raiz or config.DIRETORIO_HISTORICO
+        self.exchange_id = exchange_id
+        self.barras_por_bloco = barras_por_bloco or config.BARRAS_POR_BLOCO
+
+    def _diretorio(self, par, timeframe):
+        return os.path.join(self.raiz, self.exchange_id, par.replace('/', '_'), timeframe)
+
+    def _arquivo(self, par, timeframe, bloco):
+        return os.path.join(self._diretorio(par, timeframe), f'{bloco}.npy')
+
+    def _blocos(self, par, timeframe):
+        diretorio = self._diretorio(par, timeframe)
+        if not os.path.isdir(diretorio):
+            return []
+        return sorted(int(nome[:-4]) for nome in os.listdir(diretorio) if nome.endswith('.npy'))
+
+    def _abrir(self, par, timeframe, bloco):
+        """Bloco mapeado em memória (somente leitura), ou None se não existe"""
+        caminho = self._arquivo(par, timeframe, bloco)
+        if not os.path.exists(caminho):
+            return None
+        return np.load(caminho, mmap_mode='r')
+
+    def gravar(self, par, timeframe, ohlcv):
+        """Gravar candles fechados; retorna quantas barras eram novas"""
+        linhas = np.asarray(ohlcv, dtype=np.float64).reshape(-1, len(COLUNAS))
+        if not len(linhas):
+            return 0
+
+        duracao = duracao_timeframe_ms(timeframe)
+        barras = linhas[:, 0].astype(np.int64) // duracao
+        blocos = barras // self.barras_por_bloco
+        os.makedirs(self._diretorio(par, timeframe), exist_ok=True)
+
+        novos = 0
+        for bloco in np.unique(blocos):
+            do_bloco = blocos == bloco
+            posicoes = barras[do_bloco] - bloco * self.barras_por_bloco
+            caminho = self._arquivo(par, timeframe, bloco)
+
+            if not os.path.exists(caminho):
+                dados = np.full((self.barras_por_bloco, len(COLUNAS)), np.nan, order='F')
+                novos += len(np.unique(posicoes))
+                dados[posicoes] = linhas[do_bloco]
+                # Troca atômica: um download interrompido nunca deixa bloco pela metade
+                temporario = f'{caminho}.tmp'
+                with open(temporario, 'wb') as arquivo:
+                    np.save(arquivo, dados)
+                os.replace(temporario, caminho)
+                continue
+
+            # Bloco existente: escreve só as linhas da página, não o bloco inteiro.
+            # O timestamp vai por último, então uma escrita interrompida deixa a
+            # barra ausente (e baixada de novo), nunca com colunas misturadas.
+            dados = np.load(caminho, mmap_mode='r+')
+            novos += int(np.isnan(dados[posicoes, 0]).sum())
+            dados[posicoes, 1:] = linhas[do_bloco, 1:]
+            dados.flush()
+            dados[posicoes, 0] = linhas[do_bloco, 0]
+            dados.flush()
+            del dados
+        return novos
+
+    def ler(self, par, timeframe, inicio=None, fim=None):
+        """Candles (n, 6) com timestamp em [inicio, fim), sem as barras ausentes"""
+        duracao = duracao_timeframe_ms(timeframe)
+        blocos = self._blocos(par, timeframe)
+        if inicio is not None:
+            blocos = [b for b in blocos if (b + 1) * self.barras_por_bloco * duracao > inicio]
+        if fim is not None:
+            blocos = [b for b in blocos if b * self.barras_por_bloco * duracao < fim]
+
+        partes = []
+        for bloco in blocos:
+            dados = self._abrir(par, timeframe, bloco)
+            timestamps = dados[:, 0]
+            selecao = ~np.isnan(timestamps)
+            if inicio is not None:
+                selecao &= timestamps >= inicio
+            if fim is not None:
+                selecao &= timestamps < fim
+            partes.append(np.ascontiguousarray(dados[selecao]))
+
+        if not partes:
+            return np.empty((0, len(COLUNAS)))
+        return np.concatenate(partes)
+
+    def ler_varios(self, pares, timeframe, inicio=None, fim=None):
+        """{par: candles} pronto para o MotorBacktest"""
+        return {par: self.ler(par, timeframe, inicio, fim) for par in pares}
+
+    def intervalo(self, par, timeframe):
+        """(primeiro, último) timestamp armazenado, ou None"""
+        blocos = self._blocos(par, timeframe)
+        if not blocos:
+            return None
+        primeiro = self._abrir(par, timeframe, blocos[0])[:, 0]
+        ultimo = self._abrir(par, timeframe, blocos[-1])[:, 0]
+        return int(np.nanmin(primeiro)), int(np.nanmax(ultimo))
+
+    # 🕳️ LACUNAS
+
+    def _arquivo_vazios(self, par, timeframe):
+        return os.path.join(self._diretorio(par, timeframe), 'vazios.json')
+
+    def vazios(self, par, timeframe):
+        """Intervalos [a, b) que a exchange confirmou não ter candles"""
+        try:
+            with open(self._arquivo_vazios(par, timeframe), encoding='utf-8') as arquivo:
+                return [tuple(intervalo) for intervalo in json.load(arquivo)]
+        except FileNotFoundError:
+            return []
+
+    def confirmar_vazio(self, par, timeframe, inicio, fim):
+        """Registrar um trecho sem candles na exchange para não buscá-lo de novo"""
+        if fim <= inicio:
+            return
+        intervalos = sorted(self.vazios(par, timeframe) + [(int(inicio), int(fim))])
+        unidos = [list(intervalos[0])]
+        for a, b in intervalos[1:]:
+            if a <= unidos[-1][1]:
+                unidos[-1][1] = max(unidos[-1][1], b)
+            else:
+                unidos.append([a, b])
+
+        os.makedirs(self._diretorio(par, timeframe), exist_ok=True)
+        caminho = self._arquivo_vazios(par, timeframe)
+        with open(f'{caminho}.tmp', 'w', encoding='utf-8') as arquivo:
+            json.dump(unidos, arquivo)
+        os.replace(f'{caminho}.tmp', caminho)
+
+    def lacunas(self, par, timeframe, inicio, fim):
+        """Intervalos [a, b) de barras faltando entre inicio e fim (ms)"""
+        duracao = duracao_timeframe_ms(timeframe)
+        primeira, ultima = -(-inicio // duracao), -(-fim // duracao)
+        if ultima <= primeira:
+            return []
+
+        faltando = np.ones(ultima - primeira, dtype=bool)
+        for bloco in range(primeira // self.barras_por_bloco, (ultima - 1) // self.barras_por_bloco + 1):
+            dados = self._abrir(par, timeframe, bloco)
+            if dados is None:
+                continue
+            base = bloco * self.barras_por_bloco
+            a, b = max(primeira, base), min(ultima, base + self.barras_por_bloco)
+            faltando[a - primeira:b - primeira] = np.isnan(dados[a - base:b - base, 0])
+
+        for a, b in self.vazios(par, timeframe):
+            a, b = max(-(-a // duracao), primeira), min(-(-b // duracao), ultima)
+            if a < b:
+                faltando[a - primeira:b - primeira] = False
+
+        # Sequências de barras faltando -> intervalos em ms
+        bordas = np.flatnonzero(np.diff(np.concatenate([[0], faltando.astype(np.int8), [0]])))
+        return [
+            (int((primeira + a) * duracao), int((primeira + b) * duracao))
+            for a, b in zip(bordas[::2], bordas[1::2])
+        ]
+
+
+class BaixadorHistorico:
+    """Download em massa de OHLCV para o ArmazemHistorico
+
+    Pagina `fetch_ohlcv` com `since` só sobre as lacunas do armazém, então
+    uma execução interrompida retoma de onde parou e uma execução repetida
+    só busca o que falta. Cada página é gravada assim que chega.
+
+    Toda página vai com fim (`until`) e cobre no máximo `limite` barras, então
+    uma resposta sem candles diz respeito só àquela janela. Uma janela só é
+    registrada como vazia depois de `confirmacoes_vazio` respostas vazias
+    seguidas, para uma falha momentânea da exchange não virar lacuna eterna.
+    """
+
+    def __init__(self, exchange, armazem, limite=None, concorrencia=None, tentativas=5, confirmacoes_vazio=2):
+        self.exchange = exchange
+        self.armazem = armazem
+        self.limite = limite or config.LIMITE_PAGINA_OHLCV
+        self.tentativas = tentativas
+        self.confirmacoes_vazio = confirmacoes_vazio
+        self._limite_concorrencia = asyncio.Semaphore(concorrencia or config.MAX_REQUISICOES_CONCORRENTES)
+
+        self.paginas = 0
+        self.candles = 0
+
+    async def _buscar_pagina(self, par, timeframe, desde, ate, limite):
+        """Candles em [desde, ate) — o `until` do ccxt é inclusivo"""
+        espera = 1
+        for tentativa in range(self.tentativas):
+            try:
+                async with self._limite_concorrencia:
+                    pagina = await self.exchange.fetch_ohlcv(
+                        par, timeframe, since=desde, limit=limite, params={'until': ate - 1}
+                    )
+                self.paginas += 1
+                return pagina
+            except (ccxt.RateLimitExceeded, ccxt.NetworkError) as e:
+                if tentativa == self.tentativas - 1:
+                    raise
+                logger.warning(f"⚠️ {par} {timeframe}: {e} - nova tentativa em {espera}s")
+                await asyncio.sleep(espera)
+                espera = min(espera * 2, 60)
+
+    async def baixar(self, par, timeframe, inicio, fim=None):
+        """Preencher [inicio, fim) — por padrão até o último candle fechado"""
+        duracao = duracao_timeframe_ms(timeframe)
+        agora = int(time.time() * 1000)
+        fim = min(fim or agora, agora // duracao * duracao)
+
+        lacunas = self.armazem.lacunas(par, timeframe, inicio, fim)
+        novos = 0
+        for a, b in lacunas:
+            desde, vazias = a, 0
+            while desde < b:
+                limite = int(min(self.limite, -(-(b - desde) // duracao)))
+                ate = min(b, desde + limite * duracao)
+                pagina = await self._buscar_pagina(par, timeframe, desde, ate, limite)
+                recebidas = np.asarray(pagina or [], dtype=np.float64).reshape(-1, len(COLUNAS))
+                linhas = recebidas[(recebidas[:, 0] >= desde) & (recebidas[:, 0] < ate)]
+
+                if not len(linhas):
+                    if len(recebidas) and recebidas[:, 0].max() < desde:
+                        # A exchange ignorou o `since`: não dá para concluir nada do trecho
+                        logger.warning(f"⚠️ {par} {timeframe}: resposta fora do trecho pedido, lacuna mantida")
+                        break
+                    vazias += 1
+                    if not len(recebidas) and vazias < self.confirmacoes_vazio:
+                        continue
+                    # A exchange não tem nada nessa janela (antes da listagem, manutenção...)
+                    self.armazem.confirmar_vazio(par, timeframe, desde, ate)
+                    desde, vazias = ate, 0
+                    continue
+                vazias = 0
+
+                novos += await asyncio.to_thread(self.armazem.gravar, par, timeframe, linhas)
+
+                # Buracos dentro da página também são da exchange, não do download
+                timestamps = np.concatenate([[desde - duracao], linhas[:, 0]])
+                for i in np.flatnonzero(np.diff(timestamps) > duracao):
+                    self.armazem.confirmar_vazio(par, timeframe, timestamps[i] + duracao, timestamps[i + 1])
+
+                desde = int(linhas[-1, 0]) + duracao
+
+        self.candles += novos
+        if lacunas:
+            logger.info(f"📥 {par} {timeframe}: {novos} candles em {len(lacunas)} lacuna(s)")
+        return novos
+
+    async def baixar_varios(self, pares, timeframe, inicio, fim=None):
+        """Todos os pares em paralelo (limitados pelo semáforo); retorna novos por par"""
+        resultados = await asyncio.gather(*(self.baixar(par, timeframe, inicio, fim) for par in pares))
+        return dict(zip(pares, resultados))
+
+
+def _data_ms(texto):
+    data = datetime.strptime(texto, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    return int(data.timestamp() * 1000)
+
+
+async def _principal(argumentos):
+    exchange = ccxt.bybit({'enableRateLimit': True, 'options': {'defaultType': 'spot'}})
+    armazem = ArmazemHistorico(argumentos.diretorio, exchange.id)
+    baixador = BaixadorHistorico(exchange, armazem)
+    try:
+        fim = _data_ms(argumentos.ate) if argumentos.ate else None
+        for timeframe in argumentos.timeframes:
+            await baixador.baixar_varios(argumentos.pares, timeframe, _data_ms(argumentos.desde), fim)
+        logger.info(f"✅ {baixador.candles} candles novos em {baixador.paginas} páginas")
+    finally:
+        await exchange.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Baixar histórico OHLCV da Bybit para o armazém local')
+    parser.add_argument('--pares', nargs='+', default=config.PARES_MONITORADOS)
+    parser.add_argument('--timeframes', nargs='+', default=['15m'])
+    parser.add_argument('--desde', required=True, help='AAAA-MM-DD (UTC)')
+    parser.add_argument('--ate', help='AAAA-MM-DD (UTC), padrão: agora')
+    parser.add_argument('--diretorio', default=None)
+    asyncio.run(_principal(parser.parse_args()))
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from core.config import config
+
+logger = logging.getLogger('Mercados')
+
+
+class IndiceMercados:
+    """Índice de mercados (precisão e limites) com TTL e cache em disco
+
+    Os mercados dos pares monitorados são gravados em JSON; num restart eles
+    são injetados no ccxt (`set_markets`) e as ordens não precisam de um
+    `load_markets` completo. A renovação acontece em background.
+    """
+
+    def __init__(self, exchange, pares=None, caminho=None, ttl=None):
+        self.exchange = exchange
+        self.pares = list(pares or config.PARES_MONITORADOS)
+        self.caminho = config.ARQUIVO_CACHE_MERCADOS if caminho is None else caminho  # Vazio = sem disco
+        self.ttl = ttl or config.TTL_MERCADOS
+        self.atualizado_em = 0.0
+        self._mercados = {}
+        self._tarefa = None
+
+    @property
+    def vencido(self):
+        return time.time() - self.atualizado_em > self.ttl
+
+    def info(self, par):
+        """Mercado ccxt do par (precision/limits), ou None se desconhecido"""
+        return self._mercados.get(par)
+
+    def _carregar_disco(self):
+        if not self.caminho:
+            return False
+        try:
+            with open(self.caminho, encoding='utf-8') as arquivo:
+                cache = json.load(arquivo)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"⚠️ Cache de mercados ilegível: {e}")
+            return False
+
+        mercados = cache.get('mercados', {})
+        if not all(par in mercados for par in self.pares):
+            return False
+
+        self._mercados = mercados
+        self.atualizado_em = cache.get('atualizado_em', 0.0)
+        self.exchange.set_markets(list(mercados.values()))
+        return True
+
+    def _salvar_disco(self):
+        if not self.caminho:
+            return
+        try:
+            pasta = os.path.dirname(self.caminho)
+            if pasta:
+                os.makedirs(pasta, exist_ok=True)
+            temporario = f"{self.caminho}.tmp"
+            with open(temporario, 'w', encoding='utf-8') as arquivo:
+                json.dump({'atualizado_em': self.atualizado_em, 'mercados': self._mercados}, arquivo)
+            os.replace(temporario, self.caminho)
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao salvar cache de mercados: {e}")
+
+    async def atualizar(self):
+        """Recarregar os mercados da exchange e persistir"""
+        mercados = await self.exchange.load_markets(reload=True)
+        self._mercados = {par: mercados[par] for par in self.pares if par in mercados}
+        self.atualizado_em = time.time()
+        self._salvar_disco()
+        logger.info(f"📚 Mercados atualizados: {len(self._mercados)} pares")
+
+    async def carregar(self):
+        """Carga inicial: disco se possível, exchange se não houver cache"""
+        if self._carregar_disco():
+            idade = time.time() - self.atualizado_em
+            logger.info(f"📚 Mercados do cache em disco ({idade / 3600:.1f}h)")
+            if not self.vencido:
+                return
+            try:
+                await self.atualizar()
+            except Exception as e:
+                logger.warning(f"⚠️ Mantendo cache vencido de mercados: {e}")
+            return
+
+        await self.atualizar()
+
+    async def _renovar(self):
+        while True:
+            espera = max(self.atualizado_em + self.ttl - time.time(), 60)
+            await asyncio.sleep(espera)
+            try:
+                await self.atualizar()
+            except Exception as e:
+                logger.warning(f"⚠️ Erro ao renovar mercados: {e}")
+                self.atualizado_em = time.time() - self.ttl + 300  # Nova tentativa em 5 min
+
+    def iniciar_renovacao(self):
+        if self._tarefa is None:
+            self._tarefa = asyncio.create_task(self._renovar())
+
+    def parar(self):
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            self._tarefa = None
+
+
+class CachePrecos:
+    """Último preço conhecido por par, com orçamento de idade"""
+
+    def __init__(self, idade_maxima=None):
+        self.idade_maxima = idade_maxima or config.IDADE_MAXIMA_PRECO
+        self._precos = {}
+
+    def registrar(self, par, preco):
+        if preco:
+            self._precos[par] = (float(preco), time.monotonic())
+
+    def obter(self, par, idade_maxima=None):
+        """Preço se for mais novo que o orçamento, senão None"""
+        registro = self._precos.get(par)
+        if registro is None:
+            return None
+        preco, quando = registro
+        limite = self.idade_maxima if idade_maxima is None else idade_maxima
+        if time.monotonic() - quando > limite:
+            return None
+        return preco
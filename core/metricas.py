@@ -0,0 +1,221 @@
+import bisect
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from aiohttp import web
+from core.config import config
+
+logger = logging.getLogger('Metricas')
+
+# Limites dos buckets em segundos (de 1ms a 1min)
+BUCKETS_PADRAO = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Métodos ccxt cronometrados por `instrumentar_exchange`
+METODOS_EXCHANGE = (
+    'load_markets', 'fetch_balance', 'fetch_ticker', 'fetch_tickers', 'fetch_ohlcv',
+    'create_order', 'create_market_buy_order', 'create_market_sell_order',
+    'fetch_order', 'cancel_order',
+)
+
+DESCRICOES = {
+    'tavares_ciclo_segundos': 'Duração total do ciclo de trading',
+    'tavares_ciclo_estagio_segundos': 'Duração de cada estágio do ciclo de trading',
+    'tavares_ciclos_total': 'Ciclos de trading executados',
+    'tavares_ciclos_estourados_total': 'Ciclos mais longos que INTERVALO_ANALISE',
+    'tavares_exchange_segundos': 'Latência das chamadas à exchange',
+    'tavares_exchange_erros_total': 'Chamadas à exchange que falharam',
+    'tavares_ordem_segundos': 'Latência do sinal até a confirmação da ordem',
+    'tavares_telegram_segundos': 'Latência das chamadas à API do Telegram',
+    'tavares_telegram_erros_total': 'Chamadas à API do Telegram que falharam',
+    'tavares_sentimento_segundos': 'Duração da coleta e da pontuação de notícias (em segundo plano)',
+    'tavares_agendador_fila': 'Requisições à exchange esperando vez, por categoria',
+    'tavares_agendador_taxa': 'Requisições por segundo liberadas hoje para a categoria (cai com limite de taxa)',
+    'tavares_agendador_espera_segundos': 'Espera na fila do agendador antes de ir para a exchange',
+    'tavares_agendador_agrupadas_total': 'Chamadas idênticas atendidas por uma requisição já em voo',
+    'tavares_agendador_limite_taxa_total': 'Respostas de limite de taxa recebidas da exchange',
+    'tavares_pares_analisados_total': 'Pares analisados nos ciclos (com candle novo)',
+    'tavares_pares_sem_novidade_total': 'Pares pulados no ciclo por não terem candle novo',
+    'tavares_protecao_saidas_total': 'Vendas por stop loss ou take profit entre candles',
+}
+
+
+class Histograma:
+    """Histograma cumulativo no formato do Prometheus"""
+
+    def __init__(self, buckets=BUCKETS_PADRAO):
+        self.buckets = tuple(buckets)
+        self.contagens = [0] * (len(self.buckets) + 1)  # Último = +Inf
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.contagens[bisect.bisect_left(self.buckets, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def quantil(self, q):
+        """Estimativa por interpolação linear dentro do bucket (como histogram_quantile)"""
+        if not self.total:
+            return None
+        alvo = q * self.total
+        acumulado = 0
+        for i, contagem in enumerate(self.contagens):
+            if acumulado + contagem >= alvo and contagem:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                inferior = self.buckets[i - 1] if i else 0.0
+                return inferior + (self.buckets[i] - inferior) * (alvo - acumulado) / contagem
+            acumulado += contagem
+        return self.buckets[-1]
+
+
+def _rotulos(rotulos):
+    if not rotulos:
+        return ''
+    return '{' + ','.join(f'{chave}="{valor}"' for chave, valor in rotulos) + '}'
+
+
+class RegistroMetricas:
+    """Contadores, medidores e histogramas de latência, com saída em texto do Prometheus
+
+    Métricas são criadas no primeiro uso; rótulos são keyword arguments.
+    Seguro para chamar de threads (diário, pool de sentimento).
+    """
+
+    def __init__(self):
+        self._contadores = {}    # (nome, rótulos) -> valor
+        self._medidores = {}     # (nome, rótulos) -> último valor
+        self._histogramas = {}   # (nome, rótulos) -> Histograma
+        self._trava = threading.Lock()
+
+    def contar(self, nome, valor=1, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def definir(self, nome, valor, **rotulos):
+        with self._trava:
+            self._medidores[(nome, tuple(sorted(rotulos.items())))] = valor
+
+    def observar(self, nome, segundos, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            histograma = self._histogramas.get(chave)
+            if histograma is None:
+                histograma = self._histogramas[chave] = Histograma()
+            histograma.observar(segundos)
+
+    @contextmanager
+    def medir(self, nome, **rotulos):
+        """Cronometrar o bloco (também dentro de código async) e observar em `nome`"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nome, time.perf_counter() - inicio, **rotulos)
+
+    def contador(self, nome, **rotulos):
+        return self._contadores.get((nome, tuple(sorted(rotulos.items()))), 0)
+
+    def medidor(self, nome, **rotulos):
+        return self._medidores.get((nome, tuple(sorted(rotulos.items()))), 0)
+
+    def histogramas(self, nome):
+        """[(rótulos, Histograma)] de uma métrica"""
+        with self._trava:
+            return [(dict(r), h) for (n, r), h in sorted(self._histogramas.items()) if n == nome]
+
+    def texto_prometheus(self):
+        linhas = []
+        with self._trava:
+            contadores = sorted(self._contadores.items())
+            medidores = sorted(self._medidores.items())
+            histogramas = sorted(self._histogramas.items(), key=lambda item: item[0])
+
+            vistos = set()
+            for (nome, rotulos), valor in contadores:
+                if nome not in vistos:
+                    vistos.add(nome)
+                    linhas.append(f'# HELP {nome} {DESCRICOES.get(nome, nome)}')
+                    linhas.append(f'# TYPE {nome} counter')
+                linhas.append(f'{nome}{_rotulos(rotulos)} {valor}')
+
+            for (nome, rotulos), valor in medidores:
+                if nome not in vistos:
+                    vistos.add(nome)
+                    linhas.append(f'# HELP {nome} {DESCRICOES.get(nome, nome)}')
+                    linhas.append(f'# TYPE {nome} gauge')
+                linhas.append(f'{nome}{_rotulos(rotulos)} {valor}')
+
+            for (nome, rotulos), histograma in histogramas:
+                if nome not in vistos:
+                    vistos.add(nome)
+                    linhas.append(f'# HELP {nome} {DESCRICOES.get(nome, nome)}')
+                    linhas.append(f'# TYPE {nome} histogram')
+                acumulado = 0
+                for limite, contagem in zip(histograma.buckets + ('+Inf',), histograma.contagens):
+                    acumulado += contagem
+                    linhas.append(f'{nome}_bucket{_rotulos(rotulos + (("le", limite),))} {acumulado}')
+                linhas.append(f'{nome}_sum{_rotulos(rotulos)} {histograma.soma}')
+                linhas.append(f'{nome}_count{_rotulos(rotulos)} {histograma.total}')
+        return '\n'.join(linhas) + '\n'
+
+
+metricas = RegistroMetricas()
+
+
+def instrumentar_exchange(exchange, registro=None):
+    """Envolver os métodos ccxt da instância para medir latência e contar erros"""
+    registro = registro or metricas
+    for metodo in METODOS_EXCHANGE:
+        original = getattr(exchange, metodo, None)
+        if original is None:
+            continue
+
+        @functools.wraps(original)
+        async def medido(*args, _original=original, _metodo=metodo, **kwargs):
+            try:
+                with registro.medir('tavares_exchange_segundos', metodo=_metodo):
+                    return await _original(*args, **kwargs)
+            except Exception:
+                registro.contar('tavares_exchange_erros_total', metodo=_metodo)
+                raise
+
+        setattr(exchange, metodo, medido)
+    return exchange
+
+
+class ServidorMetricas:
+    """Endpoint HTTP /metrics (texto do Prometheus) na porta do container"""
+
+    def __init__(self, registro=None, host='0.0.0.0', porta=None):
+        self.registro = registro or metricas
+        self.host = host
+        self.porta = config.PORTA_METRICAS if porta is None else porta
+        self._runner = None
+
+    async def _metrics(self, request):
+        return web.Response(text=self.registro.texto_prometheus(),
+                            content_type='text/plain', charset='utf-8',
+                            headers={'X-Content-Type-Options': 'nosniff'})
+
+    async def _saude(self, request):
+        return web.Response(text='ok')
+
+    async def iniciar(self):
+        app = web.Application()
+        app.router.add_get('/metrics', self._metrics)
+        app.router.add_get('/', self._saude)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.porta)
+        await site.start()
+        self.porta = site._server.sockets[0].getsockname()[1]
+        logger.info(f"📈 Métricas em http://{self.host}:{self.porta}/metrics")
+
+    async def parar(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
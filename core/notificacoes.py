@@ -0,0 +1,231 @@
+import asyncio
+import html
+import itertools
+import logging
+import re
+import time
+from collections import deque
+from telegram.error import BadRequest, Forbidden, RetryAfter
+from core.config import config
+from core.metricas import metricas
+
+logger = logging.getLogger('Notificacoes')
+
+# Menor número sai primeiro
+PRIORIDADE_ALTA = 0    # Falhas e erros de ordem
+PRIORIDADE_NORMAL = 1  # Operações executadas, avisos de sistema
+PRIORIDADE_BAIXA = 2   # Relatórios e avisos repetitivos (saldo, offline)
+
+LIMITE_TEXTO = 4096    # Máximo do Telegram por mensagem
+SEPARADOR = '\n\n➖➖➖➖➖\n\n'
+
+
+def _cortar_linha(linha):
+    """Linha maior que o limite: sem as tags, cortada fora das entidades HTML"""
+    texto = html.escape(html.unescape(re.sub(r'<[^>]+>', '', linha)), quote=False)
+    partes = []
+    while texto:
+        corte = LIMITE_TEXTO
+        if len(texto) > corte:
+            entidade = texto.rfind('&', corte - 8, corte)
+            if entidade > 0 and ';' not in texto[entidade:corte]:
+                corte = entidade
+        partes.append(texto[:corte])
+        texto = texto[corte:]
+    return partes
+
+
+def dividir_mensagem(texto):
+    """Partes de até LIMITE_TEXTO de uma mensagem HTML, cortadas nas quebras de linha
+
+    Cortar no meio de uma tag ou entidade faz o Telegram recusar a mensagem
+    (BadRequest, sem nova tentativa); as mensagens do bot abrem e fecham as
+    tags na mesma linha.
+    """
+    if len(texto) <= LIMITE_TEXTO:
+        return [texto]
+    partes, atual = [], ''
+    for linha in texto.split('\n'):
+        if len(linha) > LIMITE_TEXTO:
+            if atual:
+                partes.append(atual)
+                atual = ''
+            partes.extend(_cortar_linha(linha))
+        elif atual and len(atual) + 1 + len(linha) > LIMITE_TEXTO:
+            partes.append(atual)
+            atual = linha
+        else:
+            atual = f'{atual}\n{linha}' if atual else linha
+    if atual:
+        partes.append(atual)
+    return partes
+
+
+class FilaTelegram:
+    """Fila de saída do Telegram com uma tarefa de envio dedicada
+
+    `enviar` só enfileira e retorna na hora; quem opera nunca espera I/O do
+    Telegram. A tarefa de envio junta o que chegou dentro da janela de
+    agrupamento numa só mensagem por chat, respeita o intervalo por chat e o
+    limite global, espera o `RetryAfter` em 429 e repete falhas de rede com
+    backoff. Mensagens com a mesma `chave` se substituem enquanto pendentes;
+    com a fila cheia, as de menor prioridade são descartadas primeiro.
+    """
+
+    def __init__(self, bot, chat_id, intervalo_chat=None, max_por_segundo=None,
+                 janela=None, max_fila=None, tentativas=None):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.intervalo_chat = config.TELEGRAM_INTERVALO_CHAT if intervalo_chat is None else intervalo_chat
+        self.max_por_segundo = max_por_segundo or config.TELEGRAM_MAX_POR_SEGUNDO
+        self.janela = config.TELEGRAM_JANELA_AGRUPAMENTO if janela is None else janela
+        self.max_fila = max_fila or config.TELEGRAM_MAX_FILA
+        self.tentativas = tentativas or config.TELEGRAM_TENTATIVAS
+
+        self._pendentes = {}             # chat -> [(prioridade, seq, texto, chave)]
+        self._seq = itertools.count()
+        self._evento = asyncio.Event()
+        self._ultimo_envio = {}          # chat -> monotonic do último envio
+        self._envios_recentes = deque()  # monotonic dos envios do último segundo
+        self._tarefa = None
+
+        # 📊 Contadores
+        self.enfileiradas = 0
+        self.enviadas = 0
+        self.agrupadas = 0
+        self.substituidas = 0
+        self.descartadas = 0
+        self.esperas_retry_after = 0
+        self.falhas = 0
+
+    def enviar(self, texto, prioridade=PRIORIDADE_NORMAL, chave=None, chat_id=None):
+        """Enfileirar uma mensagem HTML; nunca bloqueia"""
+        chat = chat_id or self.chat_id
+        pendentes = self._pendentes.setdefault(chat, [])
+        self.enfileiradas += 1
+
+        if chave is not None:
+            for i, item in enumerate(pendentes):
+                if item[3] == chave:
+                    # Mesma notícia mais recente: fica só a última, no lugar da antiga
+                    pendentes[i] = (min(item[0], prioridade), item[1], texto.strip(), chave)
+                    self.substituidas += 1
+                    return
+
+        pendentes.append((prioridade, next(self._seq), texto.strip(), chave))
+        if len(pendentes) > self.max_fila:
+            # Descartar a mais antiga entre as de menor prioridade
+            descartada = max(pendentes, key=lambda item: (item[0], -item[1]))
+            pendentes.remove(descartada)
+            self.descartadas += 1
+            logger.warning(f"⚠️ Fila do Telegram cheia, descartando: {descartada[2][:50]}...")
+
+        self._evento.set()
+
+    def _agrupar(self, pendentes):
+        """Textos pendentes (já ordenados) unidos em mensagens de até LIMITE_TEXTO"""
+        mensagens, atual = [], ''
+        for texto in (parte for texto in pendentes for parte in dividir_mensagem(texto)):
+            if atual and len(atual) + len(SEPARADOR) + len(texto) > LIMITE_TEXTO:
+                mensagens.append(atual)
+                atual = texto
+            else:
+                atual = f'{atual}{SEPARADOR}{texto}' if atual else texto
+        if atual:
+            mensagens.append(atual)
+        return mensagens
+
+    async def _aguardar_vez(self, chat):
+        """Respeitar o intervalo por chat e o limite global por segundo"""
+        espera = self._ultimo_envio.get(chat, -float('inf')) + self.intervalo_chat - time.monotonic()
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+        while True:
+            agora = time.monotonic()
+            while self._envios_recentes and agora - self._envios_recentes[0] >= 1:
+                self._envios_recentes.popleft()
+            if len(self._envios_recentes) < self.max_por_segundo:
+                break
+            await asyncio.sleep(1 - (agora - self._envios_recentes[0]))
+
+    async def _enviar_agora(self, chat, texto):
+        for tentativa in range(self.tentativas):
+            await self._aguardar_vez(chat)
+            try:
+                with metricas.medir('tavares_telegram_segundos', chamada='send_message'):
+                    await self.bot.send_message(chat_id=chat, text=texto, parse_mode='HTML')
+                self._ultimo_envio[chat] = time.monotonic()
+                self._envios_recentes.append(self._ultimo_envio[chat])
+                self.enviadas += 1
+                logger.info(f"📤 Mensagem enviada: {texto[:50]}...")
+                return True
+            except RetryAfter as e:
+                metricas.contar('tavares_telegram_erros_total', chamada='send_message', erro='retry_after')
+                espera = e.retry_after
+                espera = espera.total_seconds() if hasattr(espera, 'total_seconds') else float(espera)
+                self.esperas_retry_after += 1
+                logger.warning(f"⏳ Telegram pediu {espera:.0f}s de espera (429)")
+                await asyncio.sleep(espera)
+            except (BadRequest, Forbidden) as e:
+                metricas.contar('tavares_telegram_erros_total', chamada='send_message', erro='recusada')
+                # Repetir não adianta: texto inválido ou chat inacessível
+                logger.error(f"❌ Telegram recusou a mensagem: {e}")
+                break
+            except Exception as e:
+                metricas.contar('tavares_telegram_erros_total', chamada='send_message', erro='rede')
+                espera = min(2 ** tentativa, 30)
+                logger.warning(f"⚠️ Erro ao enviar Telegram ({e}), nova tentativa em {espera}s")
+                await asyncio.sleep(espera)
+
+        self.falhas += 1
+        logger.error(f"❌ Erro ao enviar mensagem Telegram: {texto[:50]}...")
+        return False
+
+    async def _drenar(self):
+        """Enviar tudo o que está pendente, um bloco agrupado por chat"""
+        for chat in list(self._pendentes):
+            pendentes = sorted(self._pendentes.pop(chat, []))
+            if not pendentes:
+                continue
+            mensagens = self._agrupar([item[2] for item in pendentes])
+            self.agrupadas += len(pendentes) - len(mensagens)
+            for texto in mensagens:
+                await self._enviar_agora(chat, texto)
+
+    async def _executar(self):
+        while True:
+            await self._evento.wait()
+            await asyncio.sleep(self.janela)  # Deixar a rajada terminar de chegar
+            self._evento.clear()
+            await self._drenar()
+
+    def iniciar(self):
+        if self._tarefa is None:
+            self._tarefa = asyncio.create_task(self._executar())
+
+    async def parar(self, timeout=10):
+        """Parar a tarefa de envio, tentando entregar o que ainda está na fila"""
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+        try:
+            await asyncio.wait_for(self._drenar(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("⚠️ Mensagens do Telegram não entregues ao encerrar")
+
+    def estatisticas(self):
+        return {
+            'pendentes': sum(len(p) for p in self._pendentes.values()),
+            'enfileiradas': self.enfileiradas,
+            'enviadas': self.enviadas,
+            'agrupadas': self.agrupadas,
+            'substituidas': self.substituidas,
+            'descartadas': self.descartadas,
+            'esperas_retry_after': self.esperas_retry_after,
+            'falhas': self.falhas,
+        }
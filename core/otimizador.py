@@ -0,0 +1,307 @@
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import os
+import random
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from core.config import config
+from cerebro.regras import TabelaRegras, PARAMETROS_PADRAO, DECISAO_PADRAO
+
+logger = logging.getLogger('Otimizador')
+
+# Parâmetros repassados ao MotorBacktest (o resto vai para a TabelaRegras)
+PARAMETROS_BACKTEST = ('confianca_minima', 'stop_loss', 'take_profit')
+
+# Listas são varridas na grade; tuplas (mín, máx) são amostradas na busca aleatória
+ESPACO_PADRAO = {
+    'rsi_compra_forte': [25, 30, 35, 40],
+    'rsi_compra': [40, 45, 50],
+    'rsi_venda': [50, 55, 60],
+    'rsi_venda_forte': [60, 65, 70, 75],
+    'desvio_sma': [0.01, 0.02, 0.03],
+    'tendencia': [0.0005, 0.001, 0.002],
+    'confianca_base': [50, 60, 70],
+    'confianca_por_sinal': [4, 6, 8],
+    'confianca_minima': [65, 70, 75, 80],
+}
+
+# Estado de cada processo do pool: arrays mapeados do disco, nunca serializados
+_DADOS = {}
+
+
+def _iniciar_processo(diretorio, pares):
+    # Milhares de configurações: avisos por configuração (regras sombreadas...) só poluem
+    logging.disable(logging.WARNING)
+    for i, par in enumerate(pares):
+        _DADOS[par] = (
+            np.load(os.path.join(diretorio, f'{i}_ohlcv.npy'), mmap_mode='r'),
+            np.load(os.path.join(diretorio, f'{i}_features.npy'), mmap_mode='r'),
+        )
+
+
+def _avaliar_lote(tarefas, parametros_backtest):
+    """Rodar um lote de (chave, parâmetros, início, fim) dentro de um processo do pool"""
+    from core.backtest import MotorBacktest
+    from cerebro.rede_neural_simples import CerebroNeuralSimples
+
+    resultados = []
+    for chave, parametros, inicio, fim in tarefas:
+        cerebro = CerebroNeuralSimples(TabelaRegras.de_parametros(parametros))
+        ajustes = {k: v for k, v in parametros.items() if k in PARAMETROS_BACKTEST}
+        motor = MotorBacktest(cerebro, **{**parametros_backtest, **ajustes})
+
+        dados, features = {}, {}
+        for par, (ohlcv, matriz) in _DADOS.items():
+            a, b = np.searchsorted(ohlcv[:, 0], [inicio, fim])
+            if b > a:
+                dados[par], features[par] = ohlcv[a:b], matriz[a:b]
+
+        estatisticas = motor.executar(dados, features)['estatisticas'] if dados else {}
+        resultados.append((chave, parametros, inicio, fim, estatisticas))
+    return resultados
+
+
+def _chave(contexto, parametros, inicio, fim):
+    texto = json.dumps([contexto, parametros, inicio, fim], sort_keys=True)
+    return hashlib.sha1(texto.encode()).hexdigest()[:16]
+
+
+def _impressao_dados(dados):
+    """Hash dos candles de todos os pares (nome, forma e bytes)"""
+    resumo = hashlib.sha1()
+    for par in sorted(dados):
+        ohlcv = np.ascontiguousarray(dados[par])
+        resumo.update(f'{par}:{ohlcv.shape}'.encode())
+        resumo.update(ohlcv.tobytes())
+    return resumo.hexdigest()
+
+
+class Otimizador:
+    """Varredura de parâmetros e walk-forward em cima do MotorBacktest
+
+    As features não dependem dos parâmetros, então são calculadas uma única
+    vez; candles e features vão para .npy temporários que cada processo do
+    pool abre por memmap (o SO compartilha as páginas entre os processos).
+    Cada resultado é anexado ao checkpoint JSONL assim que chega, e uma nova
+    execução com o mesmo checkpoint pula o que já foi avaliado. A chave de
+    cada resultado inclui o contexto (pares, timeframe, parâmetros efetivos do
+    backtest, padrões das regras e hash dos dados): resultados de outros dados
+    ou de outras taxas no mesmo arquivo não são reaproveitados.
+    """
+
+    def __init__(self, dados, espaco=None, metrica='sharpe', trades_minimos=10,
+                 processos=None, checkpoint=None, tamanho_lote=8, timeframe=None, **parametros_backtest):
+        self.dados = {par: np.asarray(ohlcv, dtype=np.float64) for par, ohlcv in dados.items()}
+        self.espaco = espaco or ESPACO_PADRAO
+        self.metrica = metrica
+        self.trades_minimos = trades_minimos
+        self.processos = processos or os.cpu_count()
+        self.checkpoint = checkpoint
+        self.tamanho_lote = tamanho_lote
+        self.parametros_backtest = parametros_backtest
+        self.timeframe = timeframe
+
+        conhecidos = set(PARAMETROS_PADRAO) | set(DECISAO_PADRAO) | set(PARAMETROS_BACKTEST)
+        desconhecidos = set(self.espaco) - conhecidos
+        if desconhecidos:
+            raise ValueError(f"Parâmetros desconhecidos: {sorted(desconhecidos)}")
+
+        self._features = None
+        self.contexto = self._contexto()
+        self.resultados = {}
+        if checkpoint and os.path.exists(checkpoint):
+            with open(checkpoint, encoding='utf-8') as arquivo:
+                for linha in arquivo:
+                    if linha.strip():
+                        registro = json.loads(linha)
+                        self.resultados[registro['chave']] = registro
+            logger.info(f"♻️ {len(self.resultados)} resultados retomados de {checkpoint}")
+
+    def _contexto(self):
+        """Tudo além dos parâmetros e do período que muda o resultado de uma avaliação"""
+        from core.backtest import MotorBacktest
+        motor = MotorBacktest(**self.parametros_backtest)
+        efetivos = ('valor_por_trade', 'stop_loss', 'take_profit', 'confianca_minima',
+                    'taxa', 'slippage', 'capital_inicial', 'janela', 'exato')
+        return {
+            'pares': sorted(self.dados),
+            'timeframe': self.timeframe,
+            'backtest': {nome: getattr(motor, nome) for nome in efetivos},
+            'regras': {**PARAMETROS_PADRAO, **DECISAO_PADRAO},
+            'dados': _impressao_dados(self.dados),
+        }
+
+    # 🎲 CONFIGURAÇÕES
+
+    def grade(self):
+        """Produto cartesiano das listas do espaço"""
+        nomes = list(self.espaco)
+        valores = [v if isinstance(v, list) else list(v) for v in self.espaco.values()]
+        return [dict(zip(nomes, combinacao)) for combinacao in itertools.product(*valores)]
+
+    def aleatoria(self, n, semente=0):
+        """n configurações sorteadas (listas: escolha; tuplas (mín, máx): uniforme)"""
+        sorteio = random.Random(semente)
+        configuracoes = []
+        for _ in range(n):
+            parametros = {}
+            for nome, valores in self.espaco.items():
+                if isinstance(valores, tuple):
+                    minimo, maximo = valores
+                    if isinstance(minimo, int) and isinstance(maximo, int):
+                        parametros[nome] = sorteio.randint(minimo, maximo)
+                    else:
+                        parametros[nome] = sorteio.uniform(minimo, maximo)
+                else:
+                    parametros[nome] = sorteio.choice(valores)
+            configuracoes.append(parametros)
+        return configuracoes
+
+    # ⚡ AVALIAÇÃO
+
+    def _eixo(self):
+        return np.unique(np.concatenate([ohlcv[:, 0] for ohlcv in self.dados.values()]))
+
+    def _executar(self, tarefas):
+        """Avaliar (parâmetros, início, fim) no pool; retorna os registros na mesma ordem"""
+        pendentes = []
+        for parametros, inicio, fim in tarefas:
+            chave = _chave(self.contexto, parametros, inicio, fim)
+            if chave not in self.resultados:
+                pendentes.append((chave, parametros, inicio, fim))
+        pendentes = list({tarefa[0]: tarefa for tarefa in pendentes}.values())
+
+        if pendentes:
+            self._rodar_pool(pendentes)
+        return [self.resultados[_chave(self.contexto, p, a, b)] for p, a, b in tarefas]
+
+    def _calcular_features(self):
+        """Features de cada par, uma única vez para todas as configurações"""
+        if self._features is None:
+            from core.backtest import MotorBacktest
+            motor = MotorBacktest(**self.parametros_backtest)
+            self._features = {par: motor.calcular_features(ohlcv) for par, ohlcv in self.dados.items()}
+        return self._features
+
+    def _rodar_pool(self, pendentes):
+        pares = list(self.dados)
+        features = self._calcular_features()
+        lotes = [pendentes[i:i + self.tamanho_lote] for i in range(0, len(pendentes), self.tamanho_lote)]
+
+        with tempfile.TemporaryDirectory(prefix='otimizacao_') as diretorio:
+            for i, par in enumerate(pares):
+                np.save(os.path.join(diretorio, f'{i}_ohlcv.npy'), self.dados[par])
+                np.save(os.path.join(diretorio, f'{i}_features.npy'), features[par])
+
+            checkpoint = open(self.checkpoint, 'a', encoding='utf-8') if self.checkpoint else None
+            try:
+                with ProcessPoolExecutor(self.processos, initializer=_iniciar_processo,
+                                         initargs=(diretorio, pares)) as pool:
+                    futuros = [pool.submit(_avaliar_lote, lote, self.parametros_backtest) for lote in lotes]
+                    feitos = 0
+                    for futuro in as_completed(futuros):
+                        for chave, parametros, inicio, fim, estatisticas in futuro.result():
+                            registro = {'chave': chave, 'parametros': parametros,
+                                        'inicio': inicio, 'fim': fim, 'estatisticas': estatisticas}
+                            self.resultados[chave] = registro
+                            if checkpoint:
+                                checkpoint.write(json.dumps(registro) + '\n')
+                        if checkpoint:
+                            checkpoint.flush()
+                        feitos += 1
+                        if feitos % max(len(lotes) // 10, 1) == 0:
+                            logger.info(f"⏳ {feitos}/{len(lotes)} lotes avaliados")
+            finally:
+                if checkpoint:
+                    checkpoint.close()
+
+    def _pontuacao(self, estatisticas):
+        if not estatisticas or estatisticas.get('total_trades', 0) < self.trades_minimos:
+            return -np.inf
+        return estatisticas.get(self.metrica, -np.inf)
+
+    def _tabela(self, registros):
+        linhas = []
+        for registro in registros:
+            estatisticas = {k: v for k, v in registro['estatisticas'].items() if k != 'saidas'}
+            linhas.append({**registro['parametros'], **estatisticas,
+                           'pontuacao': self._pontuacao(registro['estatisticas'])})
+        tabela = pd.DataFrame(linhas)
+        if tabela.empty:
+            return tabela
+        return tabela.sort_values('pontuacao', ascending=False, ignore_index=True)
+
+    def avaliar(self, configuracoes, inicio=None, fim=None):
+        """Ranking das configurações no período [inicio, fim) (ms; padrão: tudo)"""
+        eixo = self._eixo()
+        inicio = int(eixo[0]) if inicio is None else int(inicio)
+        fim = int(eixo[-1]) + 1 if fim is None else int(fim)
+        return self._tabela(self._executar([(p, inicio, fim) for p in configuracoes]))
+
+    def walk_forward(self, configuracoes, treino, teste, passo=None):
+        """Otimizar em `treino` barras e validar a melhor nas `teste` barras seguintes
+
+        A janela avança `passo` barras (padrão: `teste`) até o fim dos dados.
+        Retorna uma linha por janela com os parâmetros escolhidos e as
+        estatísticas fora da amostra.
+        """
+        eixo = self._eixo()
+        passo = passo or teste
+        janelas = []
+        for a in range(0, len(eixo) - treino - teste + 1, passo):
+            b, c = a + treino, min(a + treino + teste, len(eixo))
+            fim_teste = int(eixo[c]) if c < len(eixo) else int(eixo[-1]) + 1
+            janelas.append((int(eixo[a]), int(eixo[b]), fim_teste))
+        if not janelas:
+            raise ValueError("Dados insuficientes para uma janela de treino + teste")
+
+        # Todas as janelas de treino numa única passada pelo pool
+        self._executar([(p, a, b) for a, b, _ in janelas for p in configuracoes])
+
+        escolhas = []
+        for a, b, c in janelas:
+            pontuacoes = [self._pontuacao(self.resultados[_chave(self.contexto, p, a, b)]['estatisticas'])
+                          for p in configuracoes]
+            melhor = int(np.argmax(pontuacoes))
+            escolhas.append((configuracoes[melhor], a, b, c, pontuacoes[melhor]))
+
+        fora = self._executar([(melhor, b, c) for melhor, _, b, c, _ in escolhas])
+        linhas = []
+        for (melhor, a, b, c, pontuacao), registro in zip(escolhas, fora):
+            estatisticas = {f'teste_{k}': v for k, v in registro['estatisticas'].items() if k != 'saidas'}
+            linhas.append({'treino_inicio': a, 'teste_inicio': b, 'teste_fim': c,
+                           'treino_pontuacao': pontuacao, **melhor, **estatisticas})
+        return pd.DataFrame(linhas)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    from core.historico import ArmazemHistorico, _data_ms
+
+    parser = argparse.ArgumentParser(description='Otimizar os parâmetros da estratégia no histórico local')
+    parser.add_argument('--pares', nargs='+', default=config.PARES_MONITORADOS)
+    parser.add_argument('--timeframe', default='15m')
+    parser.add_argument('--desde', help='AAAA-MM-DD (UTC)')
+    parser.add_argument('--amostras', type=int, help='Busca aleatória com N configurações (padrão: grade)')
+    parser.add_argument('--walk-forward', nargs=2, type=int, metavar=('TREINO', 'TESTE'))
+    parser.add_argument('--checkpoint', default=os.path.join(config.DIRETORIO_OTIMIZACAO, 'resultados.jsonl'))
+    parser.add_argument('--metrica', default='sharpe')
+    argumentos = parser.parse_args()
+
+    inicio = _data_ms(argumentos.desde) if argumentos.desde else None
+    dados = ArmazemHistorico().ler_varios(argumentos.pares, argumentos.timeframe, inicio)
+    os.makedirs(os.path.dirname(argumentos.checkpoint) or '.', exist_ok=True)
+    otimizador = Otimizador(dados, metrica=argumentos.metrica, checkpoint=argumentos.checkpoint,
+                            timeframe=argumentos.timeframe)
+    configuracoes = otimizador.aleatoria(argumentos.amostras) if argumentos.amostras else otimizador.grade()
+
+    if argumentos.walk_forward:
+        resultado = otimizador.walk_forward(configuracoes, *argumentos.walk_forward)
+    else:
+        resultado = otimizador.avaliar(configuracoes).head(20)
+    print(resultado.to_string())
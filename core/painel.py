@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import time
+from cerebro.servico_sentimentos import congelar
+from core.config import config
+
+logger = logging.getLogger('Painel')
+
+
+class PainelEstado:
+    """Snapshot versionado e somente leitura do estado, servido aos comandos
+
+    `coletar` monta o estado atual só com dados em memória (sem chamadas à
+    exchange). O snapshot é refeito a cada `intervalo` segundos e depois de
+    cada ciclo; a versão só muda quando o conteúdo muda, e o texto de cada
+    comando fica em cache até lá. Comandos repetidos rápido demais no mesmo
+    chat são ignorados.
+    """
+
+    def __init__(self, coletar, intervalo=None, intervalo_chat=None):
+        self.coletar = coletar
+        self.intervalo = intervalo or config.INTERVALO_PAINEL
+        self.intervalo_chat = config.INTERVALO_COMANDOS_CHAT if intervalo_chat is None else intervalo_chat
+        self.versao = 0
+        self._snapshot = congelar({})
+        self._renderizados = {}      # comando -> (versão, texto)
+        self._ultimo_comando = {}    # chat -> monotonic
+        self._tarefa = None
+
+        # 📊 Contadores
+        self.renderizacoes = 0
+        self.acertos_render = 0
+        self.bloqueados = 0
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    def atualizar(self):
+        """Refazer o snapshot; retorna True se o conteúdo mudou"""
+        try:
+            estado = self.coletar()
+        except Exception as e:
+            logger.error(f"❌ Erro ao montar snapshot do estado: {e}")
+            return False
+        novo = congelar(estado)
+        if novo == self._snapshot:
+            return False
+        self._snapshot = novo
+        self.versao += 1
+        return True
+
+    def renderizar(self, comando, renderizador):
+        """Texto do comando para a versão atual, chamando `renderizador(snapshot)` só se mudou"""
+        if self.versao == 0:
+            self.atualizar()
+        cache = self._renderizados.get(comando)
+        if cache is not None and cache[0] == self.versao:
+            self.acertos_render += 1
+            return cache[1]
+        texto = renderizador(self._snapshot)
+        self._renderizados[comando] = (self.versao, texto)
+        self.renderizacoes += 1
+        return texto
+
+    def permitir(self, chat_id):
+        """False se o chat mandou outro comando há menos de `intervalo_chat` segundos"""
+        agora = time.monotonic()
+        ultimo = self._ultimo_comando.get(chat_id)
+        if ultimo is not None and agora - ultimo < self.intervalo_chat:
+            self.bloqueados += 1
+            return False
+        self._ultimo_comando[chat_id] = agora
+        return True
+
+    async def _executar(self):
+        while True:
+            self.atualizar()
+            await asyncio.sleep(self.intervalo)
+
+    def iniciar(self):
+        if self._tarefa is None:
+            self._tarefa = asyncio.create_task(self._executar())
+
+    async def parar(self):
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+
+    def estatisticas(self):
+        return {
+            'versao': self.versao,
+            'renderizacoes': self.renderizacoes,
+            'acertos_render': self.acertos_render,
+            'bloqueados': self.bloqueados,
+        }
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import time
+from core.config import config
+
+logger = logging.getLogger('ServicoSaldo')
+
+
+class ServicoSaldo:
+    """Saldo mantido localmente a partir das execuções
+
+    Todos os leitores são servidos da memória; o `fetch_balance` remoto só
+    acontece na reconciliação (a cada INTERVALO_RECONCILIACAO_SALDO segundos,
+    após EXECUCOES_POR_RECONCILIACAO execuções, ou quando uma execução chega
+    sem dados suficientes para atualizar o saldo local).
+    """
+
+    def __init__(self, exchange, intervalo=None, max_execucoes=None):
+        self.exchange = exchange
+        self.intervalo = intervalo or config.INTERVALO_RECONCILIACAO_SALDO
+        self.max_execucoes = max_execucoes or config.EXECUCOES_POR_RECONCILIACAO
+
+        self.saldos = {}
+        self.reconciliado_em = None
+        self._execucoes_pendentes = 0
+        self._invalidado = True
+        self._trava = asyncio.Lock()
+
+        # 📊 Contadores
+        self.chamadas_remotas = 0
+        self.leituras_locais = 0
+        self.execucoes_aplicadas = 0
+
+    @property
+    def precisa_reconciliar(self):
+        if self._invalidado or self.reconciliado_em is None:
+            return True
+        if self._execucoes_pendentes >= self.max_execucoes:
+            return True
+        return time.monotonic() - self.reconciliado_em >= self.intervalo
+
+    async def _buscar(self):
+        balance = await self.exchange.fetch_balance()
+        self.chamadas_remotas += 1
+        self.saldos = {
+            moeda: float(valor or 0)
+            for moeda, valor in balance.get('total', {}).items()
+        }
+        self.reconciliado_em = time.monotonic()
+        self._execucoes_pendentes = 0
+        self._invalidado = False
+
+    async def reconciliar(self):
+        """Buscar o saldo real na exchange e substituir o local"""
+        async with self._trava:
+            await self._buscar()
+        return self.saldos
+
+    async def obter(self, moeda='USDT'):
+        """Saldo total da moeda, servido da memória quando possível"""
+        if self.precisa_reconciliar:
+            try:
+                # Leitores concorrentes aproveitam a mesma reconciliação
+                async with self._trava:
+                    if self.precisa_reconciliar:
+                        await self._buscar()
+                        return self.saldos.get(moeda, 0.0)
+            except Exception as e:
+                if self.reconciliado_em is None:
+                    raise
+                logger.warning(f"⚠️ Reconciliação falhou, usando saldo local: {e}")
+
+        self.leituras_locais += 1
+        return self.saldos.get(moeda, 0.0)
+
+    def invalidar(self):
+        """Forçar reconciliação na próxima leitura"""
+        self._invalidado = True
+
+    def registrar_execucao(self, par, ordem):
+        """Aplicar uma execução (formato ccxt) ao saldo local"""
+        self._execucoes_pendentes += 1
+
+        quantidade = ordem.get('filled') or ordem.get('amount')
+        custo = ordem.get('cost')
+        lado = ordem.get('side')
+        if not quantidade or not custo or lado not in ('buy', 'sell'):
+            # Resposta sem dados de execução: só a exchange sabe o saldo certo
+            self.invalidar()
+            return
+
+        base, cotacao = par.split('/')
+        quantidade, custo = float(quantidade), float(custo)
+        sinal = 1 if lado == 'buy' else -1
+        self.saldos[base] = self.saldos.get(base, 0.0) + sinal * quantidade
+        self.saldos[cotacao] = self.saldos.get(cotacao, 0.0) - sinal * custo
+
+        taxa = ordem.get('fee') or {}
+        if taxa.get('cost') and taxa.get('currency') in self.saldos:
+            self.saldos[taxa['currency']] -= float(taxa['cost'])
+
+        self.execucoes_aplicadas += 1
+
+    def estatisticas(self):
+        return {
+            'chamadas_remotas': self.chamadas_remotas,
+            'chamadas_economizadas': self.leituras_locais,
+            'execucoes_aplicadas': self.execucoes_aplicadas,
+        }
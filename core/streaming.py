@@ -0,0 +1,187 @@
+import asyncio
+import json
+import logging
+import aiohttp
+from core.config import config
+
+logger = logging.getLogger('StreamMercado')
+
+INTERVALOS_BYBIT = {
+    '1m': '1', '3m': '3', '5m': '5', '15m': '15', '30m': '30',
+    '1h': '60', '2h': '120', '4h': '240', '6h': '360', '12h': '720',
+    '1d': 'D', '1w': 'W',
+}
+
+
+def simbolo_bybit(par):
+    """'XRP/USDT' -> 'XRPUSDT'"""
+    return par.replace('/', '')
+
+
+class StreamMercado:
+    """Stream WebSocket (Bybit v5 público) de klines e tickers
+
+    Os candles recebidos alimentam o ArmazemCandles; quando um candle fecha ou o
+    preço se move além de LIMIAR_MOVIMENTO_PRECO, o par é agendado e
+    `ao_disparar(pares)` é chamado com todos os pares pendentes de uma vez.
+    """
+
+    def __init__(self, candles, pares, ao_disparar, timeframe=None, url=None, limiar=None, precos=None):
+        self.candles = candles
+        self.precos = precos
+        self.pares = list(pares)
+        self.ao_disparar = ao_disparar
+        self.timeframe = timeframe or candles.timeframe_base
+        self.url = url or config.WS_URL
+        self.limiar = limiar if limiar is not None else config.LIMIAR_MOVIMENTO_PRECO
+
+        self._par_por_simbolo = {simbolo_bybit(par): par for par in self.pares}
+        self._preco_referencia = {}
+        self._pendentes = set()
+        self._evento_pendentes = asyncio.Event()
+        self._ativo = False
+        self._ws = None
+        self.reconexoes = 0
+
+    def _topicos(self):
+        intervalo = INTERVALOS_BYBIT[self.timeframe]
+        topicos = []
+        for simbolo in self._par_por_simbolo:
+            topicos.append(f"kline.{intervalo}.{simbolo}")
+            topicos.append(f"tickers.{simbolo}")
+        return topicos
+
+    def _agendar(self, par, motivo):
+        if par not in self._pendentes:
+            logger.debug(f"⚡ {par}: ciclo agendado ({motivo})")
+        self._pendentes.add(par)
+        self._evento_pendentes.set()
+
+    def _processar_kline(self, par, candles):
+        buffer = self.candles.buffer(par, self.timeframe)
+        for candle in candles:
+            linha = [
+                float(candle['start']), float(candle['open']), float(candle['high']),
+                float(candle['low']), float(candle['close']), float(candle['volume'])
+            ]
+            buffer.mesclar([linha])
+            if self.precos is not None:
+                self.precos.registrar(par, linha[4])
+            if candle.get('confirm'):
+                self._preco_referencia[par] = linha[4]
+                self._agendar(par, 'candle fechado')
+
+    def _processar_ticker(self, par, dados):
+        preco = dados.get('lastPrice')
+        if preco is None:
+            return
+        preco = float(preco)
+        if self.precos is not None:
+            self.precos.registrar(par, preco)
+
+        referencia = self._preco_referencia.setdefault(par, preco)
+        if referencia and abs(preco / referencia - 1) >= self.limiar:
+            self._preco_referencia[par] = preco
+            self._agendar(par, f"movimento {preco / referencia - 1:+.2%}")
+
+    def processar_mensagem(self, mensagem):
+        """Tratar uma mensagem JSON do stream"""
+        topico = mensagem.get('topic')
+        if not topico:
+            if mensagem.get('op') == 'subscribe' and not mensagem.get('success', True):
+                logger.error(f"❌ Falha na inscrição: {mensagem.get('ret_msg')}")
+            return
+
+        tipo, _, simbolo = topico.rpartition('.')
+        par = self._par_por_simbolo.get(simbolo)
+        if par is None:
+            return
+
+        if tipo.startswith('kline'):
+            self._processar_kline(par, mensagem.get('data', []))
+        elif tipo == 'tickers':
+            self._processar_ticker(par, mensagem.get('data', {}))
+
+    async def _preencher_lacunas(self):
+        """Backfill via REST do que foi perdido enquanto o stream estava fora"""
+        novos = await self.candles.atualizar(self.pares, self.timeframe)
+        for par, quantidade in novos.items():
+            if quantidade:
+                self._agendar(par, f"backfill de {quantidade} candles")
+
+    async def _ping(self, ws):
+        while not ws.closed:
+            await asyncio.sleep(config.WS_INTERVALO_PING)
+            await ws.send_json({'op': 'ping'})
+
+    async def _conectar(self, sessao):
+        async with sessao.ws_connect(self.url, heartbeat=None) as ws:
+            self._ws = ws
+            # A Bybit spot recusa inscrições com mais de 10 tópicos por mensagem
+            topicos = self._topicos()
+            for i in range(0, len(topicos), config.WS_TOPICOS_POR_INSCRICAO):
+                await ws.send_json({'op': 'subscribe', 'args': topicos[i:i + config.WS_TOPICOS_POR_INSCRICAO]})
+            logger.info(f"📡 Stream conectado: {len(self.pares)} pares ({self.timeframe})")
+
+            await self._preencher_lacunas()
+            tarefa_ping = asyncio.create_task(self._ping(ws))
+            try:
+                async for msg in ws:
+                    if msg.type == aiohttp.WSMsgType.TEXT:
+                        self.processar_mensagem(json.loads(msg.data))
+                    elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                        break
+            finally:
+                tarefa_ping.cancel()
+                try:
+                    await tarefa_ping
+                except asyncio.CancelledError:
+                    pass
+                except Exception as e:
+                    logger.debug(f"Ping encerrado com erro: {e}")
+                self._ws = None
+
+    async def _despachar(self):
+        """Executar ciclos para os pares pendentes, agrupando disparos próximos"""
+        while self._ativo:
+            await self._evento_pendentes.wait()
+            # Candles de todos os pares fecham juntos: agrupar numa janela curta
+            await asyncio.sleep(config.WS_JANELA_AGRUPAMENTO)
+            self._evento_pendentes.clear()
+            pares = [par for par in self.pares if par in self._pendentes]
+            self._pendentes.clear()
+            try:
+                await self.ao_disparar(pares)
+            except Exception as e:
+                logger.error(f"❌ Erro no ciclo disparado pelo stream: {e}")
+
+    async def executar(self):
+        """Manter o stream ativo com reconexão e backoff exponencial"""
+        self._ativo = True
+        despachante = asyncio.create_task(self._despachar())
+        espera = 1
+        try:
+            async with aiohttp.ClientSession() as sessao:
+                while self._ativo:
+                    try:
+                        await self._conectar(sessao)
+                        espera = 1
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        logger.warning(f"⚠️ Stream caiu: {e}")
+
+                    if not self._ativo:
+                        break
+                    self.reconexoes += 1
+                    logger.info(f"🔄 Reconectando stream em {espera}s...")
+                    await asyncio.sleep(espera)
+                    espera = min(espera * 2, 60)
+        finally:
+            self._ativo = False
+            despachante.cancel()
+
+    async def parar(self):
+        self._ativo = False
+        if self._ws is not None:
+            await self._ws.close()
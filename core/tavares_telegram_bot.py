@@ -7,6 +7,13 @@ from telegram import Bot
 from telegram.ext import Application, CommandHandler, ContextTypes
 import time
 import os
+from collections import deque
+from core.painel import PainelEstado
+from core.diario import DiarioOperacoes, resumir_operacao
+from core.agenda import AgendaCandles
+from core.execucao import PipelineExecucao
+from core.metricas import metricas, ServidorMetricas
+from core.notificacoes import FilaTelegram, PRIORIDADE_ALTA, PRIORIDADE_NORMAL, PRIORIDADE_BAIXA
 
 logger = logging.getLogger('TavaresTelegram')
 
@@ -21,25 +28,46 @@ class TavaresTelegramBot:
         # 🧠 Sistema Neural
         from cerebro.rede_neural_simples import CerebroNeuralSimples
         from cerebro.analise_sentimentos import AnalisadorSentimentos
+        from cerebro.servico_sentimentos import ServicoSentimentos
+        from cerebro.regras import TabelaRegras
+        from cerebro.features import COLUNAS_FEATURES, COLUNAS_COM_SENTIMENTO
+        from core.config import config
         
-        self.cerebro = CerebroNeuralSimples()
+        colunas = COLUNAS_COM_SENTIMENTO if config.SENTIMENTO_NAS_REGRAS else COLUNAS_FEATURES
+        self.cerebro = CerebroNeuralSimples(TabelaRegras.carregar(config.ARQUIVO_REGRAS_SINAIS, colunas))
         self.analisador_sentimentos = AnalisadorSentimentos()
+        self.sentimento = ServicoSentimentos(self.analisador_sentimentos)
         
         # 💰 Bybit Manager
         from core.exchange_manager import BybitManager
-        self.bybit = BybitManager()
+        from core.exchange_simulada import BybitSimulado
+        from core.candles import ArmazemCandles
+        from core.historico import ArmazemHistorico
+        self.bybit = BybitSimulado() if config.MODO_SIMULADO else BybitManager()
+        self.candles = ArmazemCandles(self.bybit, historico=ArmazemHistorico(exchange_id=self.bybit.exchange.id))
+        if config.TIMEFRAME_MODELO not in (self.candles.timeframe_base, *self.candles.derivados):
+            raise ValueError(f"TIMEFRAME_MODELO {config.TIMEFRAME_MODELO} não é o base "
+                             f"({self.candles.timeframe_base}) nem um derivado {list(self.candles.derivados)}")
+        self.execucao = PipelineExecucao(self.bybit)
+        self.agenda = AgendaCandles(self.bybit.agora_ms)
+        self.stream = None
+        self._ultimo_analisado = {}  # par -> abertura do último candle analisado
         
         # 🤖 Telegram
         from core.config import config
         self.config = config
         self.bot = Bot(token=config.TELEGRAM_BOT_TOKEN)
         self.chat_id = config.TELEGRAM_CHAT_ID
+        self.notificacoes = FilaTelegram(self.bot, self.chat_id)
+        self.painel = PainelEstado(self._estado_painel)
+        self.servidor_metricas = ServidorMetricas()
+        self.diario = DiarioOperacoes()
         
         # 📊 Estado do Sistema
         self.estado = {
             'id': self._instance_id,
             'status': '🟢 INICIANDO',
-            'modo': 'BYBIT REAL 💰',
+            'modo': 'SIMULADO 🧪' if config.MODO_SIMULADO else 'BYBIT REAL 💰',
             'ciclo_atual': 0,
             'ultima_atualizacao': datetime.now().isoformat(),
             'performance': {
@@ -47,126 +75,160 @@ class TavaresTelegramBot:
                 'operacoes_executadas': 0,
                 'operacoes_lucrativas': 0,
                 'lucro_total': 0.0,
-                'saldo_atual': self.bybit.obter_saldo(),
+                'saldo_atual': 0.0,
                 'win_rate': 0.0
             },
             'sentimento_mercado': {},
-            'historico_operacoes': [],
+            'historico_operacoes': deque(maxlen=config.OPERACOES_EM_MEMORIA),  # Resto fica no diário
             'bybit_status': 'ONLINE' if not self.bybit.modo_offline else 'OFFLINE'
         }
+        self._restaurar_estado()
         
         logger.info("🤖 TAVARES INICIALIZADO COM SUCESSO!")
+    
+    def _restaurar_estado(self):
+        """Recuperar contadores e operações recentes do diário após um restart"""
+        inicio = time.perf_counter()
+        contadores = self.diario.contadores()
+        perf = self.estado['performance']
+        for nome, valor in contadores.items():
+            if nome in perf:
+                perf[nome] = valor
+        self.estado['ciclo_atual'] = contadores.get('ciclo_atual', 0)
+        self.estado['historico_operacoes'].extend(
+            reversed(self.diario.ultimas_operacoes(self.config.OPERACOES_EM_MEMORIA))
+        )
+        if contadores:
+            logger.info(f"💾 Estado restaurado: ciclo {self.estado['ciclo_atual']}, "
+                        f"{perf['operacoes_executadas']} operações "
+                        f"({(time.perf_counter() - inicio) * 1000:.1f}ms)")
+    
+    def _salvar_contadores(self):
+        self.diario.salvar_contadores({**self.estado['performance'], 'ciclo_atual': self.estado['ciclo_atual']})
+    
+    async def inicializar(self):
+        """Conectar na Bybit e carregar o saldo inicial"""
+        await self.bybit.inicializar()
+        self.estado['performance']['saldo_atual'] = await self.bybit.obter_saldo()
+        self.estado['bybit_status'] = 'ONLINE' if not self.bybit.modo_offline else 'OFFLINE'
         
-    async def enviar_mensagem(self, texto):
-        """Enviar mensagem para o Telegram"""
-        try:
-            await self.bot.send_message(
-                chat_id=self.chat_id,
-                text=texto,
-                parse_mode='HTML'
-            )
-            logger.info(f"📤 Mensagem enviada: {texto[:50]}...")
-        except Exception as e:
-            logger.error(f"❌ Erro ao enviar mensagem Telegram: {e}")
+    def enviar_mensagem(self, texto, prioridade=PRIORIDADE_NORMAL, chave=None):
+        """Enfileirar mensagem para o Telegram (o envio roda em segundo plano)"""
+        self.notificacoes.enviar(texto, prioridade, chave)
     
-    async def enviar_operacao_real(self, operacao):
+    def enviar_operacao_real(self, operacao):
         """Enviar notificação de operação REAL"""
         sinal = operacao['sinal']
         resultado_real = operacao.get('resultado_real', {})
         
         emoji = "🟢" if resultado_real.get('side') == 'buy' else "🔴"
         seta = "📈" if sinal['direcao'] == 'BUY' else "📉"
+        motivo = f"\n<b>Motivo:</b> {sinal['motivo']}" if sinal.get('motivo') else ''
+        lucro = f"\n<b>Resultado:</b> ${operacao['lucro']:+.2f}" if operacao.get('lucro') is not None else ''
         
         mensagem = f"""
 {emoji} <b>🔥 OPERAÇÃO REAL EXECUTADA</b> {seta}
 
 <b>Par:</b> {sinal['par']}
-<b>Direção:</b> {sinal['direcao']}
+<b>Direção:</b> {sinal['direcao']}{motivo}
 <b>Confiança:</b> {sinal['confianca']:.1f}%
-<b>Valor:</b> ${self.config.VALOR_POR_TRADE}
+<b>Valor:</b> ${sinal.get('valor', self.config.VALOR_POR_TRADE):.2f}{lucro}
 
 <b>ID Ordem:</b> <code>{resultado_real.get('id', 'N/A')}</code>
 <b>Preço:</b> ${resultado_real.get('price', 'N/A')}
 <b>Quantidade:</b> {resultado_real.get('amount', 'N/A')}
+<b>Latência:</b> {operacao.get('latencia_ms', 'N/A')}ms
 
 <b>Saldo Atual:</b> ${self.estado['performance']['saldo_atual']:.2f}
 
 ⏰ <i>{datetime.now().strftime('%H:%M:%S')}</i>
         """
         
-        await self.enviar_mensagem(mensagem)
+        self.enviar_mensagem(mensagem)
     
     async def executar_operacao_real(self, previsao):
-        """Executar operação REAL na Bybit"""
-        try:
-            logger.info(f"💰 EXECUTANDO OPERAÇÃO REAL: {previsao['par']} {previsao['direcao']}")
-            
-            # Verificar se Bybit está online
-            if self.bybit.modo_offline:
-                await self.enviar_mensagem(
-                    f"🚫 <b>BYBIT OFFLINE</b>\n\n"
-                    f"Operação {previsao['par']} {previsao['direcao']} cancelada.\n"
-                    f"💡 <i>Configure VPS para operação real</i>"
-                )
-                return None
-            
-            # Verificar saldo
-            saldo_atual = self.bybit.obter_saldo()
-            if saldo_atual < self.config.VALOR_POR_TRADE:
-                await self.enviar_mensagem(
-                    f"⚠️ <b>SALDO INSUFICIENTE</b>\n\n"
-                    f"Saldo: ${saldo_atual:.2f}\n"
-                    f"Necessário: ${self.config.VALOR_POR_TRADE}\n"
-                    f"Operação cancelada."
-                )
-                return None
-            
-            # Executar ordem na Bybit
-            resultado_ordem = await self.bybit.executar_ordem(
-                previsao['par'], 
-                previsao['direcao'], 
-                self.config.VALOR_POR_TRADE
+        """Executar uma operação REAL na Bybit (pelo mesmo pipeline do ciclo)"""
+        if self.bybit.modo_offline:
+            self.enviar_mensagem(
+                f"🚫 <b>BYBIT OFFLINE</b>\n\n"
+                f"Operação {previsao['par']} {previsao['direcao']} cancelada.\n"
+                f"💡 <i>Configure VPS para operação real</i>",
+                PRIORIDADE_BAIXA, chave='bybit_offline'
             )
-            
-            if resultado_ordem:
-                # Registrar operação
-                operacao = {
-                    'id': f"TAVR{int(time.time())}",
-                    'sinal': previsao,
-                    'resultado_real': resultado_ordem,
-                    'timestamp': datetime.now().isoformat(),
-                    'tipo': 'REAL'
-                }
-                
-                self.estado['historico_operacoes'].append(operacao)
-                self.estado['performance']['operacoes_executadas'] += 1
-                
-                # Atualizar saldo
-                self.estado['performance']['saldo_atual'] = self.bybit.obter_saldo()
-                
-                # Enviar notificação
-                await self.enviar_operacao_real(operacao)
-                
-                return operacao
-            else:
-                await self.enviar_mensagem(
-                    f"❌ <b>FALHA NA ORDEM REAL</b>\n\n"
-                    f"Par: {previsao['par']}\n"
-                    f"Erro: Ordem não executada"
-                )
-                return None
-                
-        except Exception as e:
-            logger.error(f"❌ ERRO OPERAÇÃO REAL: {e}")
-            await self.enviar_mensagem(
+            return None
+        
+        resultado, = await self.execucao.executar_lote([previsao], self.config.VALOR_POR_TRADE)
+        return self._concluir_operacao(resultado)
+    
+    def _concluir_operacao(self, resultado):
+        """Registrar e notificar o resultado de uma ordem do pipeline"""
+        previsao = resultado['previsao']
+        
+        if resultado['recusada']:
+            self.enviar_mensagem(
+                f"⚠️ <b>ORDEM RECUSADA</b>\n\n"
+                f"Par: {previsao['par']} {previsao['direcao']}\n"
+                f"Motivo: {resultado['erro']}",
+                PRIORIDADE_BAIXA, chave=f"recusada_{previsao['par']}"
+            )
+            return None
+        
+        if resultado['erro'] is not None:
+            logger.error(f"❌ ERRO OPERAÇÃO REAL: {resultado['erro']}")
+            self.enviar_mensagem(
                 f"💥 <b>ERRO NA ORDEM</b>\n\n"
                 f"Par: {previsao['par']}\n"
-                f"Erro: {str(e)[:100]}..."
+                f"Erro: {resultado['erro'][:100]}...",
+                PRIORIDADE_ALTA
+            )
+            return None
+        
+        resultado_ordem = resultado['ordem']
+        if not resultado_ordem:
+            self.enviar_mensagem(
+                f"❌ <b>FALHA NA ORDEM REAL</b>\n\n"
+                f"Par: {previsao['par']}\n"
+                f"Erro: Ordem não executada",
+                PRIORIDADE_ALTA
             )
             return None
+        
+        # Registrar operação (ms + ativo: ordens concorrentes não repetem o id)
+        operacao = {
+            'id': f"TAVR{int(time.time() * 1000)}_{previsao['par'].split('/')[0]}",
+            'sinal': previsao,
+            'resultado_real': resultado_ordem,
+            'timestamp': datetime.now().isoformat(),
+            'tipo': previsao.get('motivo', 'REAL'),
+            'latencia_ms': round(resultado['latencia'] * 1000, 1),
+            'lucro': resultado['lucro']
+        }
+        
+        registro = resumir_operacao(operacao, previsao.get('valor', self.config.VALOR_POR_TRADE))
+        self.estado['historico_operacoes'].append(registro)
+        perf = self.estado['performance']
+        perf['operacoes_executadas'] += 1
+        if resultado['lucro'] is not None:
+            perf['lucro_total'] += resultado['lucro']
+            perf['operacoes_lucrativas'] += resultado['lucro'] > 0
+        
+        # Saldo local já atualizado pela execução
+        perf['saldo_atual'] = self.bybit.saldo.saldos.get('USDT', perf['saldo_atual'])
+        self.diario.registrar_operacao(registro)
+        self._salvar_contadores()
+        
+        # Enviar notificação
+        self.enviar_operacao_real(operacao)
+        
+        return operacao
     
-    async def executar_ciclo_trading(self):
-        """Executar ciclo completo de trading"""
+    async def executar_ciclo_trading(self, pares=None):
+        """Executar ciclo completo de trading (todos os pares ou só `pares`)"""
+        pares = pares or self.config.PARES_MONITORADOS
+        inicio = time.perf_counter()
+        inicio_iso = datetime.now().isoformat()
+        operacoes_antes = self.estado['performance']['operacoes_executadas']
+        previsoes = []
         try:
             self.estado['ciclo_atual'] += 1
             self.estado['performance']['total_ciclos'] += 1
@@ -176,58 +238,95 @@ class TavaresTelegramBot:
             # 🔄 ATUALIZAR STATUS BYBIT
             self.estado['bybit_status'] = 'ONLINE' if not self.bybit.modo_offline else 'OFFLINE'
             
-            # 1. 📰 ANÁLISE DE SENTIMENTOS
-            await self._analisar_sentimentos_mercado()
+            # 1. 📰 SENTIMENTO (último snapshot do serviço, sem esperar notícias)
+            with metricas.medir('tavares_ciclo_estagio_segundos', estagio='sentimento'):
+                self._ler_sentimento_mercado()
             
             # 2. 📊 COLETAR DADOS
-            dados_mercado = await self._coletar_dados_reais()
+            with metricas.medir('tavares_ciclo_estagio_segundos', estagio='dados'):
+                prontos, fallback = await self._coletar_dados_reais(pares)
             
             # 3. 🎯 PREVISÃO NEURAL
-            previsoes = await self._gerar_previsoes_neurais(dados_mercado)
+            with metricas.medir('tavares_ciclo_estagio_segundos', estagio='previsao'):
+                previsoes = await self._gerar_previsoes_neurais(prontos, fallback)
             
             # 4. ⚡ EXECUTAR OPERAÇÕES
-            await self._executar_operacoes(previsoes)
+            with metricas.medir('tavares_ciclo_estagio_segundos', estagio='operacoes'):
+                await self._executar_operacoes(previsoes)
             
             # 5. 📊 ATUALIZAR ESTADO
             self.estado['status'] = '🟢 OPERANDO'
             self.estado['ultima_atualizacao'] = datetime.now().isoformat()
+            self.painel.atualizar()
             
             # 6. 📋 RELATÓRIO PERIÓDICO
             if self.estado['ciclo_atual'] % 10 == 0:
-                await self.enviar_relatorio_diario()
+                with metricas.medir('tavares_ciclo_estagio_segundos', estagio='relatorio'):
+                    await self.enviar_relatorio_diario()
             
         except Exception as e:
             logger.error(f"❌ ERRO NO CICLO: {e}")
             self.estado['status'] = '🔴 ERRO TEMPORÁRIO'
+        
+        # 📈 Métricas do ciclo
+        duracao = time.perf_counter() - inicio
+        metricas.observar('tavares_ciclo_segundos', duracao)
+        metricas.contar('tavares_ciclos_total')
+        if duracao > self.config.INTERVALO_ANALISE:
+            metricas.contar('tavares_ciclos_estourados_total')
+            logger.warning(f"⏱️ Ciclo levou {duracao:.1f}s (intervalo: {self.config.INTERVALO_ANALISE}s)")
+        
+        # 💾 Diário (só enfileira; a gravação roda em outra thread)
+        self.diario.registrar_ciclo(
+            self.estado['ciclo_atual'], inicio_iso, duracao, len(previsoes),
+            self.estado['performance']['operacoes_executadas'] - operacoes_antes, self.estado['status']
+        )
+        self._salvar_contadores()
     
-    async def _analisar_sentimentos_mercado(self):
-        """Analisar sentimentos do mercado"""
-        try:
-            sentimento = self.analisador_sentimentos.analisar_sentimento_mercado()
-            self.estado['sentimento_mercado'] = sentimento
-            logger.info(f"📊 Sentimento: {sentimento.get('sentimento_geral', 'N/A')}")
-        except Exception as e:
-            logger.error(f"❌ Erro sentimentos: {e}")
-            self.estado['sentimento_mercado'] = {
-                'sentimento_geral': 'NEUTRO', 
-                'score_medio': 0,
-                'timestamp': datetime.now().isoformat()
-            }
-    
-    async def _coletar_dados_reais(self):
-        """Coletar dados do mercado"""
+    def _ler_sentimento_mercado(self):
+        """Usar o snapshot mais recente do serviço de sentimento"""
+        sentimento = self.sentimento.snapshot
+        self.estado['sentimento_mercado'] = sentimento
+        if sentimento.obsoleto:
+            logger.warning(f"⚠️ Sentimento obsoleto: {sentimento.get('sentimento_geral', 'N/A')}")
+        else:
+            logger.info(f"📊 Sentimento: {sentimento.get('sentimento_geral', 'N/A')} (há {sentimento.idade:.0f}s)")
+    
+    async def _coletar_dados_reais(self, pares):
+        """Coletar dados do mercado
+        
+        Retorna (pares com candle novo no armazém, {par: {timeframe: DataFrame}}
+        de fallback para os pares sem candles no modo offline).
+        """
         try:
-            dados = {}
+            prontos, fallback = [], {}
+            
+            # No modo streaming o armazém já é alimentado pelo WebSocket
+            # e o stream só dispara os pares com novidade
+            base = self.config.TIMEFRAME_BASE
+            sem_novidade = 0
+            if self.stream is None:
+                # Todos os pares em paralelo, pedindo só os candles novos do timeframe base
+                await self.candles.atualizar(pares, base)
             
-            for par in self.config.PARES_MONITORADOS:
+            for par in pares:
                 try:
-                    ohlcv = self.bybit.obter_dados_mercado(par, '15m', 50)
+                    buffer = self.candles.buffer(par, base)
                     
-                    if ohlcv:
-                        df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-                        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-                        dados[par] = {'15m': df}
+                    if self.stream is None and buffer.tamanho:
+                        # Sem candle novo desde a última análise: features e previsão seriam as mesmas
+                        if buffer.ultimo_timestamp == self._ultimo_analisado.get(par):
+                            sem_novidade += 1
+                            continue
+                    
+                    if buffer.tamanho:
+                        # As features saem dos indicadores incrementais do armazém
+                        prontos.append(par)
                         logger.debug(f"✅ Dados coletados: {par}")
+                    elif self.bybit.modo_offline:
+                        ohlcv = self.bybit._dados_fallback(par, self.config.CANDLES_ANALISE)
+                        df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+                        fallback[par] = {self.config.TIMEFRAME_MODELO: df}
                     else:
                         logger.warning(f"⚠️ Dados vazios para {par}")
                         continue
@@ -236,55 +335,94 @@ class TavaresTelegramBot:
                     logger.warning(f"⚠️ Erro ao coletar dados {par}: {e}")
                     continue
             
-            return dados
+            metricas.contar('tavares_pares_analisados_total', len(prontos) + len(fallback))
+            if sem_novidade:
+                metricas.contar('tavares_pares_sem_novidade_total', sem_novidade)
+                logger.info(f"💤 {sem_novidade} par(es) sem candle novo, análise pulada")
+            return prontos, fallback
             
         except Exception as e:
             logger.error(f"❌ Erro geral na coleta de dados: {e}")
-            return {}
+            return [], {}
     
-    async def _gerar_previsoes_neurais(self, dados_mercado):
-        """Gerar previsões neurais"""
-        previsoes = []
+    async def _gerar_previsoes_neurais(self, pares, fallback=None):
+        """Gerar previsões neurais (todos os pares numa única passada)
         
-        for par in self.config.PARES_MONITORADOS:
-            if par in dados_mercado:
-                try:
-                    # Criar dados específicos para o par
-                    dados_par = {par: dados_mercado[par]}
-                    
-                    # Gerar previsão
-                    previsao = self.cerebro.prever(dados_par)
-                    previsao['par'] = par
-                    
-                    previsoes.append(previsao)
-                    logger.info(f"🎯 {par}: {previsao['direcao']} ({previsao['confianca']:.1f}%)")
-                    
-                except Exception as e:
-                    logger.error(f"❌ Erro na previsão {par}: {e}")
-                    continue
+        Os pares do armazém usam as features mantidas candle a candle
+        (`ArmazemCandles.features`); o fallback offline passa pelo MotorFeatures.
+        """
+        try:
+            # Sentimento obsoleto não entra nas features (vira NaN)
+            snapshot = self.sentimento.snapshot
+            sentimento = None if snapshot.obsoleto else snapshot.por_par
+            with metricas.medir('tavares_ciclo_estagio_segundos', estagio='features'):
+                matriz = self.candles.features(pares, self.config.TIMEFRAME_MODELO)
+            previsoes = self.cerebro.prever_matriz(pares, matriz, sentimento=sentimento)
+            # Só com a previsão feita o candle conta como analisado: uma falha antes
+            # disso deixa o par para o próximo ciclo, em vez de perder o candle
+            for par in pares:
+                self._ultimo_analisado[par] = self.candles.buffer(par, self.config.TIMEFRAME_BASE).ultimo_timestamp
+            if fallback:
+                previsoes += self.cerebro.prever_pares(
+                    fallback, list(fallback), self.config.TIMEFRAME_MODELO, sentimento=sentimento
+                )
+        except Exception as e:
+            logger.error(f"❌ Erro nas previsões: {e}")
+            return []
+        
+        # Instante do sinal: a latência até a ordem é medida a partir daqui
+        sinal_em = time.perf_counter()
+        for previsao in previsoes:
+            previsao['sinal_em'] = sinal_em
+            logger.info(f"🎯 {previsao['par']}: {previsao['direcao']} ({previsao['confianca']:.1f}%)")
         
         return previsoes
     
     async def _executar_operacoes(self, previsoes):
-        """Executar operações baseadas nas previsões"""
+        """Executar operações baseadas nas previsões (pares em paralelo)"""
         try:
-            for previsao in previsoes:
-                # Critério conservador para operações
-                if (previsao['confianca'] >= self.config.CONFIANCA_MINIMA and 
-                    previsao['direcao'] != 'HOLD'):
-                    
-                    if not self.bybit.modo_offline:
-                        # MODO REAL - Executar ordem
-                        await self.executar_operacao_real(previsao)
-                    else:
-                        # MODO OFFLINE - Apenas registrar sinal
-                        logger.info(f"🎯 SINAL (OFFLINE): {previsao['par']} {previsao['direcao']} ({previsao['confianca']:.1f}%)")
-                    
-                    await asyncio.sleep(2)  # Delay entre operações
+            # Critério conservador para operações
+            sinais = [
+                previsao for previsao in previsoes
+                if previsao['confianca'] >= self.config.CONFIANCA_MINIMA and previsao['direcao'] != 'HOLD'
+            ]
+            if not sinais:
+                return
+            
+            if self.bybit.modo_offline:
+                # MODO OFFLINE - Apenas registrar sinal
+                for previsao in sinais:
+                    logger.info(f"🎯 SINAL (OFFLINE): {previsao['par']} {previsao['direcao']} ({previsao['confianca']:.1f}%)")
+                return
+            
+            # MODO REAL - Executar ordens
+            for resultado in await self.execucao.executar_lote(sinais, self.config.VALOR_POR_TRADE):
+                self._concluir_operacao(resultado)
                     
         except Exception as e:
             logger.error(f"❌ Erro na execução: {e}")
     
+    async def verificar_protecao(self):
+        """Checagem leve entre candles: vender posições no stop loss ou take profit"""
+        if self.bybit.modo_offline:
+            return
+        try:
+            saidas = await self.execucao.saidas_protecao()
+            if not saidas:
+                return
+            for resultado in await self.execucao.executar_lote(saidas):
+                if self._concluir_operacao(resultado):
+                    metricas.contar('tavares_protecao_saidas_total', motivo=resultado['previsao']['motivo'])
+            self.painel.atualizar()
+        except Exception as e:
+            logger.error(f"❌ Erro na proteção de posições: {e}")
+    
+    async def _executar_protecao(self):
+        """Cadência própria (INTERVALO_PROTECAO) para stop loss/take profit, independente dos candles"""
+        while True:
+            await asyncio.sleep(self.config.INTERVALO_PROTECAO)
+            await self.verificar_protecao()
+    
     async def enviar_relatorio_diario(self):
         """Enviar relatório diário"""
         try:
@@ -316,17 +454,122 @@ class TavaresTelegramBot:
 💪 <i>Sistema ativo e monitorando</i>
             """
             
-            await self.enviar_mensagem(mensagem)
+            self.enviar_mensagem(mensagem, PRIORIDADE_BAIXA, chave='relatorio')
             
         except Exception as e:
             logger.error(f"❌ Erro no relatório: {e}")
     
+    # PAINEL (snapshot servido aos comandos)
+    def _estado_painel(self):
+        """Estado atual para o painel, só com dados em memória"""
+        perf = self.estado['performance']
+        sentimento = self.sentimento.snapshot
+        stats_cache = self.analisador_sentimentos.cache.estatisticas()
+        stats_saldo = self.bybit.saldo.estatisticas()
+        
+        return {
+            'status': self.estado['status'],
+            'bybit_online': not self.bybit.modo_offline,
+            'ultima_atualizacao': self.estado['ultima_atualizacao'],
+            'performance': dict(perf),
+            'saldo': self.bybit.saldo.saldos.get('USDT', perf['saldo_atual']),
+            'consultas_saldo': stats_saldo['chamadas_remotas'],
+            'consultas_economizadas': stats_saldo['chamadas_economizadas'],
+            'operacoes': self.diario.ultimas_operacoes(5),
+            'desempenho_pares': self.diario.desempenho(),
+            'sentimento': {
+                **sentimento,
+                # Em minutos, para o texto só mudar quando a idade exibida muda
+                'idade_min': None if sentimento.idade is None else int(sentimento.idade // 60),
+                'obsoleto': sentimento.obsoleto,
+            },
+            'cache_taxa_acerto': round(stats_cache['taxa_acerto'], 2),
+            'cache_tempo_economizado': round(stats_cache['tempo_economizado'], 1),
+        }
+    
+    async def _responder(self, update, comando, renderizador):
+        """Responder do snapshot do painel; nenhum comando consulta a exchange"""
+        if not self.painel.permitir(update.effective_chat.id):
+            return
+        texto = self.painel.renderizar(comando, renderizador)
+        with metricas.medir('tavares_telegram_segundos', chamada='reply_text'):
+            await update.message.reply_text(texto, parse_mode='HTML')
+    
     # COMANDOS TELEGRAM
     async def comando_start(self, update, context):
         """Comando /start"""
-        status_bybit = "🟢 CONECTADO" if not self.bybit.modo_offline else "🔴 OFFLINE"
+        await self._responder(update, 'start', self._renderizar_start)
+    
+    async def comando_status(self, update, context):
+        """Comando /status"""
+        await self._responder(update, 'status', self._renderizar_status)
+    
+    async def comando_saldo(self, update, context):
+        """Comando /saldo"""
+        await self._responder(update, 'saldo', self._renderizar_saldo)
+    
+    async def comando_operacoes(self, update, context):
+        """Comando /operacoes"""
+        await self._responder(update, 'operacoes', self._renderizar_operacoes)
+    
+    async def comando_performance(self, update, context):
+        """Comando /performance"""
+        await self._responder(update, 'performance', self._renderizar_performance)
+    
+    async def comando_sentimento(self, update, context):
+        """Comando /sentimento"""
+        await self._responder(update, 'sentimento', self._renderizar_sentimento)
+    
+    async def comando_metricas(self, update, context):
+        """Comando /metricas (lido direto do registro, que já está em memória)"""
+        if not self.painel.permitir(update.effective_chat.id):
+            return
+        with metricas.medir('tavares_telegram_segundos', chamada='reply_text'):
+            await update.message.reply_text(self._renderizar_metricas(), parse_mode='HTML')
+    
+    def _renderizar_metricas(self):
+        def linhas(nome, rotulo):
+            texto = ''
+            for rotulos, hist in metricas.histogramas(nome):
+                texto += (f"\n• {rotulos.get(rotulo, 'total')}: p50 {hist.quantil(0.5)*1000:.0f}ms | "
+                          f"p95 {hist.quantil(0.95)*1000:.0f}ms | n={hist.total}")
+            return texto or '\n• sem dados'
         
-        mensagem = f"""
+        ciclos = metricas.contador('tavares_ciclos_total')
+        estourados = metricas.contador('tavares_ciclos_estourados_total')
+        analisados = metricas.contador('tavares_pares_analisados_total')
+        sem_novidade = metricas.contador('tavares_pares_sem_novidade_total')
+        agenda = self.agenda.estatisticas()
+        execucao = self.execucao.estatisticas()
+        
+        return f"""
+📈 <b>MÉTRICAS TAVARES</b>
+
+<b>Ciclos:</b> {ciclos} ({estourados} acima de {self.config.INTERVALO_ANALISE}s){linhas('tavares_ciclo_segundos', '')}
+
+<b>Estágios do ciclo:</b>{linhas('tavares_ciclo_estagio_segundos', 'estagio')}
+
+<b>Exchange:</b>{linhas('tavares_exchange_segundos', 'metodo')}
+
+<b>Ordens (sinal → confirmação):</b>{linhas('tavares_ordem_segundos', 'par')}
+
+<b>Agenda:</b> próximo fechamento em {agenda['proximo_em']:.0f}s | {agenda['perdidos']} perdidos
+• Pares analisados: {analisados} | sem candle novo: {sem_novidade}
+• Proteção: {execucao['posicoes']} posições | {execucao['stops']} stops | {execucao['alvos']} alvos
+
+<b>Fila da exchange (espera):</b>{linhas('tavares_agendador_espera_segundos', 'categoria')}
+
+<b>Telegram:</b>{linhas('tavares_telegram_segundos', 'chamada')}
+
+<b>Sentimento (segundo plano):</b>{linhas('tavares_sentimento_segundos', 'etapa')}
+
+🔗 <i>Prometheus: porta {self.config.PORTA_METRICAS}, /metrics</i>
+        """
+    
+    def _renderizar_start(self, painel):
+        status_bybit = "🟢 CONECTADO" if painel['bybit_online'] else "🔴 OFFLINE"
+        
+        return f"""
 🤖 <b>TAVARES A EVOLUÇÃO</b> 🚀
 
 <b>Status Bybit:</b> {status_bybit}
@@ -340,22 +583,21 @@ class TavaresTelegramBot:
 /operacoes - Histórico
 /performance - Performance
 /sentimento - Análise de mercado
+/metricas - Latência do sistema
 
 ⚡ <i>Sistema ativo e monitorando</i>
         """
-        await update.message.reply_text(mensagem, parse_mode='HTML')
     
-    async def comando_status(self, update, context):
-        """Comando /status"""
-        perf = self.estado['performance']
-        sentimento = self.estado['sentimento_mercado']
+    def _renderizar_status(self, painel):
+        perf = painel['performance']
+        sentimento = painel['sentimento']
         
-        status_bybit = "🟢 ONLINE" if not self.bybit.modo_offline else "🔴 OFFLINE"
+        status_bybit = "🟢 ONLINE" if painel['bybit_online'] else "🔴 OFFLINE"
         
-        mensagem = f"""
+        return f"""
 💰 <b>STATUS TAVARES</b>
 
-<b>Sistema:</b> {self.estado['status']}
+<b>Sistema:</b> {painel['status']}
 <b>Bybit:</b> {status_bybit}
 <b>Ciclos:</b> {perf['total_ciclos']}
 <b>Operações:</b> {perf['operacoes_executadas']}
@@ -365,68 +607,60 @@ class TavaresTelegramBot:
 • Sentimento: {sentimento.get('sentimento_geral', 'N/A')}
 • Score: {sentimento.get('score_medio', 0):.3f}
 
-🔄 <i>Última atualização: {self.estado['ultima_atualizacao'][11:19]}</i>
+🔄 <i>Última atualização: {painel['ultima_atualizacao'][11:19]}</i>
         """
-        
-        await update.message.reply_text(mensagem, parse_mode='HTML')
     
-    async def comando_saldo(self, update, context):
-        """Comando /saldo"""
-        saldo = self.bybit.obter_saldo()
-        status_bybit = "🟢 ONLINE" if not self.bybit.modo_offline else "🔴 OFFLINE"
+    def _renderizar_saldo(self, painel):
+        status_bybit = "🟢 ONLINE" if painel['bybit_online'] else "🔴 OFFLINE"
         
-        mensagem = f"""
+        return f"""
 💰 <b>SALDO BYBIT</b>
 
 <b>Status:</b> {status_bybit}
-<b>Saldo Disponível:</b> <code>${saldo:.2f}</code>
+<b>Saldo Disponível:</b> <code>${painel['saldo']:.2f}</code>
 <b>Valor por Trade:</b> <code>${self.config.VALOR_POR_TRADE}</code>
 <b>Risco por Trade:</b> <code>{self.config.RISK_PER_TRADE*100}%</code>
+<b>Consultas à Bybit:</b> {painel['consultas_saldo']} (economizadas: {painel['consultas_economizadas']})
 
 💸 <i>Gestão conservadora ativa</i>
         """
-        
-        await update.message.reply_text(mensagem, parse_mode='HTML')
     
-    async def comando_operacoes(self, update, context):
-        """Comando /operacoes"""
-        operacoes = self.estado['historico_operacoes'][-5:]
-        
-        if not operacoes:
-            await update.message.reply_text("📭 Nenhuma operação executada ainda")
-            return
+    def _renderizar_operacoes(self, painel):
+        if not painel['operacoes']:
+            return "📭 Nenhuma operação executada ainda"
         
         mensagem = "📊 <b>ÚLTIMAS OPERAÇÕES</b>\n\n"
         
-        for op in reversed(operacoes):
-            sinal = op['sinal']
-            resultado = op.get('resultado_real', {})
-            
-            emoji = "🟢" if resultado.get('side') == 'buy' else "🔴"
-            mensagem += f"""{emoji} <b>{sinal['par']}</b> {sinal['direcao']}
-Conf: {sinal['confianca']:.1f}% | Preço: ${resultado.get('price', 'N/A')}
-ID: <code>{resultado.get('id', 'N/A')}</code>
+        for op in painel['operacoes']:
+            emoji = "🟢" if op['lado'] == 'buy' else "🔴"
+            mensagem += f"""{emoji} <b>{op['par']}</b> {op['direcao']}
+Conf: {op['confianca']:.1f}% | Preço: ${op['preco'] if op['preco'] is not None else 'N/A'}
+ID: <code>{op['ordem_id'] or 'N/A'}</code>
 {op['timestamp'][11:19]}\n\n"""
         
-        await update.message.reply_text(mensagem, parse_mode='HTML')
+        return mensagem
     
-    async def comando_performance(self, update, context):
-        """Comando /performance"""
-        perf = self.estado['performance']
+    def _renderizar_performance(self, painel):
+        perf = painel['performance']
         
         if perf['operacoes_executadas'] > 0:
             win_rate = (perf['operacoes_lucrativas'] / perf['operacoes_executadas']) * 100
         else:
             win_rate = 0
         
-        mensagem = f"""
+        por_par = ''.join(
+            f"\n• {par}: {dados['operacoes']} ops ({dados['compras']}C/{dados['vendas']}V)"
+            for par, dados in painel['desempenho_pares'].items()
+        )
+        
+        return f"""
 📈 <b>PERFORMANCE TAVARES</b>
 
 <b>Estatísticas:</b>
 • Total Ciclos: {perf['total_ciclos']}
 • Operações: {perf['operacoes_executadas']}
 • Lucrativas: {perf['operacoes_lucrativas']}
-• Win Rate: <b>{win_rate:.1f}%</b>
+• Win Rate: <b>{win_rate:.1f}%</b>{por_par}
 
 <b>Financeiro:</b>
 • Lucro Total: ${perf['lucro_total']:.2f}
@@ -434,12 +668,9 @@ ID: <code>{resultado.get('id', 'N/A')}</code>
 
 🎯 <i>Estratégia em execução</i>
         """
-        
-        await update.message.reply_text(mensagem, parse_mode='HTML')
     
-    async def comando_sentimento(self, update, context):
-        """Comando /sentimento"""
-        sentimento = self.estado['sentimento_mercado']
+    def _renderizar_sentimento(self, painel):
+        sentimento = painel['sentimento']
         
         emoji = {
             'MUITO_POSITIVO': '🚀',
@@ -449,18 +680,27 @@ ID: <code>{resultado.get('id', 'N/A')}</code>
             'MUITO_NEGATIVO': '🔻'
         }.get(sentimento.get('sentimento_geral', 'NEUTRO'), '📊')
         
-        mensagem = f"""
+        if sentimento['idade_min'] is None:
+            idade = ' (aguardando primeira coleta)'
+        else:
+            idade = f" (há {sentimento['idade_min']} min{' ⚠️ OBSOLETO' if sentimento['obsoleto'] else ''})"
+        
+        por_ativo = ''.join(
+            f"\n• {ativo}: {dados['score']:+.3f} ({dados['noticias']} notícias)"
+            for ativo, dados in sorted(sentimento.get('por_ativo', {}).items())
+        )
+        
+        return f"""
 🎭 <b>ANÁLISE DE SENTIMENTOS</b>
 
 <b>Sentimento:</b> {emoji} {sentimento.get('sentimento_geral', 'N/A')}
 <b>Score Médio:</b> {sentimento.get('score_medio', 0):.3f}
 <b>Intensidade:</b> {sentimento.get('intensidade', 0):.3f}
-<b>Notícias:</b> {sentimento.get('total_noticias', 0)}
+<b>Notícias:</b> {sentimento.get('total_noticias', 0)}{por_ativo}
+<b>Cache:</b> {painel['cache_taxa_acerto']*100:.0f}% acertos ({painel['cache_tempo_economizado']:.1f}s economizados)
 
-⏰ <i>Atualizado: {sentimento.get('timestamp', 'N/A')[11:19]}</i>
+⏰ <i>Atualizado: {sentimento.get('timestamp', 'N/A')[11:19]}{idade}</i>
         """
-        
-        await update.message.reply_text(mensagem, parse_mode='HTML')
     
     async def iniciar_telegram_bot(self):
         """Iniciar bot do Telegram"""
@@ -474,11 +714,12 @@ ID: <code>{resultado.get('id', 'N/A')}</code>
             application.add_handler(CommandHandler("performance", self.comando_performance))
             application.add_handler(CommandHandler("sentimento", self.comando_sentimento))
             application.add_handler(CommandHandler("saldo", self.comando_saldo))
+            application.add_handler(CommandHandler("metricas", self.comando_metricas))
             
             # Mensagem de inicialização
             status_bybit = "🟢 CONECTADO" if not self.bybit.modo_offline else "🔴 OFFLINE"
             
-            await self.enviar_mensagem(
+            self.enviar_mensagem(
                 f"🤖 <b>TAVARES A EVOLUÇÃO</b> 🔥\n\n"
                 f"💰 <b>Status:</b> {status_bybit}\n"
                 f"🎯 <b>Modo:</b> OPERAÇÃO REAL\n"
@@ -499,6 +740,15 @@ ID: <code>{resultado.get('id', 'N/A')}</code>
         """Executar sistema continuamente"""
         logger.info("🚀 TAVARES - INICIANDO SISTEMA PRINCIPAL")
         
+        await self.inicializar()
+        self.notificacoes.iniciar()
+        self.sentimento.iniciar()
+        self.painel.iniciar()
+        try:
+            await self.servidor_metricas.iniciar()
+        except OSError as e:
+            logger.warning(f"⚠️ Endpoint de métricas indisponível: {e}")
+        
         # Iniciar bot Telegram
         telegram_app = await self.iniciar_telegram_bot()
         
@@ -507,12 +757,56 @@ ID: <code>{resultado.get('id', 'N/A')}</code>
             await telegram_app.start()
             await telegram_app.updater.start_polling()
         
-        # Loop principal
-        while True:
-            try:
-                await self.executar_ciclo_trading()
-                await asyncio.sleep(self.config.INTERVALO_ANALISE)
-                
-            except Exception as e:
-                logger.error(f"💥 ERRO NO LOOP PRINCIPAL: {e}")
-                await asyncio.sleep(30)  # Espera antes de retry
+        if self.config.MODO_STREAMING:
+            await self._executar_streaming()
+            return
+        
+        # Loop principal: um ciclo na partida, depois um por fechamento de candle
+        protecao = asyncio.create_task(self._executar_protecao())
+        logger.info(f"🕯️ Ciclos alinhados ao fechamento de {', '.join(self.agenda.timeframes)} "
+                    f"(+{self.config.ATRASO_FECHAMENTO}s), proteção a cada {self.config.INTERVALO_PROTECAO}s")
+        try:
+            await self.executar_ciclo_trading()
+            while True:
+                try:
+                    await self.agenda.aguardar()
+                    await self.executar_ciclo_trading()
+                    
+                except Exception as e:
+                    logger.error(f"💥 ERRO NO LOOP PRINCIPAL: {e}")
+                    await asyncio.sleep(30)  # Espera antes de retry
+        finally:
+            protecao.cancel()
+            await self.sentimento.parar()
+            await self.painel.parar()
+            await self.servidor_metricas.parar()
+            await self.notificacoes.parar()
+            await asyncio.to_thread(self.diario.fechar)
+            await self.bybit.fechar()
+    
+    async def _executar_streaming(self):
+        """Modo streaming: ciclos disparados por fechamento de candle ou movimento de preço"""
+        from core.streaming import StreamMercado
+        
+        self.stream = StreamMercado(
+            self.candles,
+            self.config.PARES_MONITORADOS,
+            ao_disparar=self.executar_ciclo_trading,
+            timeframe=self.config.TIMEFRAME_BASE,
+            precos=self.bybit.precos
+        )
+        logger.info("📡 MODO STREAMING ATIVO")
+        
+        # O stream mantém o cache de preços fresco: a proteção não consulta a exchange
+        protecao = asyncio.create_task(self._executar_protecao())
+        try:
+            await self.stream.executar()
+        finally:
+            protecao.cancel()
+            await self.stream.parar()
+            await self.sentimento.parar()
+            await self.painel.parar()
+            await self.servidor_metricas.parar()
+            await self.notificacoes.parar()
+            await asyncio.to_thread(self.diario.fechar)
+            await self.bybit.fechar()
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import logging
+import time
+from aiohttp import web, WSMsgType
+from core.streaming import simbolo_bybit, INTERVALOS_BYBIT
+
+logger = logging.getLogger('WSLocal')
+
+LIMITE_TOPICOS = 10  # Tópicos por mensagem de subscribe na Bybit spot
+
+
+class ServidorWSLocal:
+    """Servidor WebSocket local que imita o stream público da Bybit v5
+
+    Serve para rodar o modo streaming offline: aceita `subscribe`/`ping` e
+    publica mensagens `kline.*` e `tickers.*` no mesmo formato da Bybit.
+    """
+
+    def __init__(self, host='127.0.0.1', porta=0):
+        self.host = host
+        self.porta = porta
+        self._runner = None
+        self._clientes = {}  # ws -> tópicos inscritos
+        self.conexoes = 0
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.porta}/v5/public/spot"
+
+    async def _handler(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._clientes[ws] = set()
+        self.conexoes += 1
+
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                pedido = json.loads(msg.data)
+                op = pedido.get('op')
+                if op == 'subscribe':
+                    args = pedido.get('args', [])
+                    if len(args) > LIMITE_TOPICOS:
+                        # Como a Bybit spot: a mensagem inteira é recusada
+                        await ws.send_json({'success': False, 'op': 'subscribe',
+                                            'ret_msg': f'args size >{LIMITE_TOPICOS}'})
+                        continue
+                    self._clientes[ws].update(args)
+                    await ws.send_json({'success': True, 'ret_msg': '', 'op': 'subscribe'})
+                elif op == 'ping':
+                    await ws.send_json({'success': True, 'ret_msg': 'pong', 'op': 'ping'})
+        finally:
+            self._clientes.pop(ws, None)
+        return ws
+
+    async def iniciar(self):
+        app = web.Application()
+        app.router.add_get('/v5/public/spot', self._handler)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.porta)
+        await site.start()
+        self.porta = site._server.sockets[0].getsockname()[1]
+        logger.info(f"🧪 WS local em {self.url}")
+        return self.url
+
+    async def parar(self):
+        await self.desconectar_todos()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def desconectar_todos(self):
+        """Derrubar os clientes (simula queda da conexão)"""
+        for ws in list(self._clientes):
+            await ws.close()
+
+    def topicos(self):
+        """Todos os tópicos inscritos pelos clientes conectados"""
+        return set().union(*self._clientes.values())
+
+    async def aguardar_inscricoes(self, quantidade=1, timeout=5):
+        """Esperar até haver clientes inscritos (útil antes de publicar)"""
+        limite = time.monotonic() + timeout
+        while time.monotonic() < limite:
+            inscritos = [ws for ws, topicos in self._clientes.items() if topicos]
+            if len(inscritos) >= quantidade:
+                return True
+            await asyncio.sleep(0.01)
+        return False
+
+    async def publicar(self, topico, dados, tipo='snapshot'):
+        mensagem = {'topic': topico, 'type': tipo, 'ts': int(time.time() * 1000), 'data': dados}
+        for ws, topicos in list(self._clientes.items()):
+            if topico in topicos and not ws.closed:
+                await ws.send_json(mensagem)
+
+    async def publicar_kline(self, par, timeframe, candle, confirmado=False):
+        """Publicar um candle [timestamp, open, high, low, close, volume]"""
+        intervalo = INTERVALOS_BYBIT[timeframe]
+        timestamp, abertura, maxima, minima, fechamento, volume = candle
+        await self.publicar(f"kline.{intervalo}.{simbolo_bybit(par)}", [{
+            'start': int(timestamp),
+            'interval': intervalo,
+            'open': str(abertura),
+            'high': str(maxima),
+            'low': str(minima),
+            'close': str(fechamento),
+            'volume': str(volume),
+            'confirm': confirmado,
+            'timestamp': int(time.time() * 1000),
+        }])
+
+    async def publicar_ticker(self, par, preco):
+        simbolo = simbolo_bybit(par)
+        await self.publicar(f"tickers.{simbolo}", {'symbol': simbolo, 'lastPrice': str(preco)})
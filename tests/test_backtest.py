@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+from benchmarks.dados import gerar_ohlcv
+from core.backtest import MotorBacktest
+
+
+@pytest.mark.parametrize('exato', [False, True])
+def test_features_nao_atravessam_lacunas(exato):
+    ohlcv = gerar_ohlcv(1, 300, 2)[0]
+    com_lacuna = np.concatenate([ohlcv[:120], ohlcv[160:]])  # 40 barras faltando
+    motor = MotorBacktest(janela=50, exato=exato)
+    matriz = motor.calcular_features(com_lacuna)
+
+    # Até a janela voltar a ter 50 barras seguidas depois da lacuna, nada é pontuado
+    assert not np.isnan(matriz[119]).all()
+    assert np.isnan(matriz[120:169]).all()
+    assert not np.isnan(matriz[169]).all()
+
+    # Dali em diante, o mesmo que a série só com as barras depois da lacuna
+    depois = motor.calcular_features(com_lacuna[120:])
+    np.testing.assert_allclose(matriz[169:], depois[49:], rtol=1e-9)
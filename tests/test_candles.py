@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from core.candles import ArmazemCandles, agregar_ohlcv
+from benchmarks.dados import gerar_ohlcv
+
+
+def _resample(ohlcv, regra):
+    df = pd.DataFrame(ohlcv, columns=['t', 'o', 'h', 'l', 'c', 'v'])
+    df.index = pd.to_datetime(df['t'], unit='ms')
+    barras = df.resample(regra).agg({'o': 'first', 'h': 'max', 'l': 'min', 'c': 'last', 'v': 'sum'}).dropna()
+    barras.insert(0, 't', barras.index.astype('int64') // 10 ** 6)
+    return barras.to_numpy()
+
+
+def test_agregar_descarta_barra_inicial_truncada():
+    ohlcv = gerar_ohlcv(1, 12, 1)[0]  # Começa no 1º candle de 15m da hora
+    assert len(agregar_ohlcv(ohlcv, '1h')) == 3
+    assert len(agregar_ohlcv(ohlcv[1:], '1h')) == 2
+    assert len(agregar_ohlcv(ohlcv[1:3], '1h')) == 0
+
+
+@pytest.mark.parametrize('timeframe', ['1h', '4h'])
+def test_derivado_incremental_igual_ao_resample(timeframe):
+    ohlcv = gerar_ohlcv(1, 300, 3)[0]
+    armazem = ArmazemCandles(None, capacidade=200, timeframe_base='15m', derivados=('1h', '4h'))
+    base = armazem.buffer('XRP/USDT', '15m')
+    for i, candle in enumerate(ohlcv):
+        # Candle aberto chega primeiro incompleto e é atualizado no lugar, como no stream
+        aberto = candle.copy()
+        aberto[2:5] = aberto[1]
+        aberto[5] *= 0.3
+        base.mesclar([aberto])
+        if i % 7 == 0:
+            armazem.buffer('XRP/USDT', timeframe)
+        base.mesclar([candle])
+        if i % 3 == 0:
+            armazem.buffer('XRP/USDT', timeframe)
+
+    derivado = armazem.buffer('XRP/USDT', timeframe).janela()
+    referencia = _resample(ohlcv, timeframe)
+    np.testing.assert_allclose(derivado, referencia[-len(derivado):])
+    assert derivado[-1, 4] == ohlcv[-1, 4]  # Barra parcial termina no último candle base
+
+
+def test_derivado_invalido_falha_na_criacao():
+    with pytest.raises(ValueError):
+        ArmazemCandles(None, timeframe_base='1h', derivados=('15m',))
+    with pytest.raises(ValueError):
+        ArmazemCandles(None, capacidade=10, timeframe_base='15m', derivados=('4h',))
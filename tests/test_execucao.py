@@ -0,0 +1,57 @@
+import asyncio
+import time
+from core.exchange_simulada import BybitSimulado, ExchangeSimulada
+from core.execucao import PipelineExecucao
+
+
+def test_latencia_conta_do_sinal_e_nao_do_lote():
+    async def cenario():
+        bybit = BybitSimulado(ExchangeSimulada(pares=['XRP/USDT'], saldo={'USDT': 1000},
+                                               latencia=0, taxa_erros=0, semente=1))
+        await bybit.inicializar()
+        pipeline = PipelineExecucao(bybit, exposicao_maxima=1.0)
+        try:
+            # Sinal gerado 0.5s antes do lote (features, regras, fila...)
+            previsao = {'par': 'XRP/USDT', 'direcao': 'BUY', 'confianca': 90.0,
+                        'sinal_em': time.perf_counter() - 0.5}
+            sem_marca = {'par': 'XRP/USDT', 'direcao': 'BUY', 'confianca': 90.0}
+            com, sem = await pipeline.executar_lote([previsao, sem_marca], valor=10)
+            assert com['erro'] is None and sem['erro'] is None
+            assert com['latencia'] >= 0.5
+            assert sem['latencia'] < 0.5
+        finally:
+            await bybit.fechar()
+
+    asyncio.run(cenario())
+
+
+def test_venda_fecha_posicao_que_vale_menos_que_o_valor_do_trade():
+    async def cenario():
+        exchange = ExchangeSimulada(pares=['XRP/USDT'], saldo={'USDT': 1000}, latencia=0,
+                                    taxa_erros=0, volatilidade=0, semente=1)
+        bybit = BybitSimulado(exchange)
+        await bybit.inicializar()
+        pipeline = PipelineExecucao(bybit, exposicao_maxima=1.0)
+        try:
+            compra, = await pipeline.executar_lote([{'par': 'XRP/USDT', 'direcao': 'BUY', 'confianca': 90.0}], valor=10)
+            assert compra['erro'] is None
+
+            # Preço cai 10%: a posição (já sem a taxa) vale bem menos que 10 USDT
+            caminho = exchange._caminho('XRP/USDT')
+            caminho[-1, 1:5] *= 0.9
+            exchange._livros.pop('XRP/USDT', None)
+            bybit.precos.registrar('XRP/USDT', float(caminho[-1, 4]))
+
+            venda, = await pipeline.executar_lote([{'par': 'XRP/USDT', 'direcao': 'SELL', 'confianca': 90.0}], valor=10)
+            assert venda['erro'] is None and not venda['recusada']
+            assert venda['ordem']['cost'] < 9.1
+            assert 'XRP/USDT' not in pipeline.posicoes
+            assert venda['lucro'] < 0
+
+            # Sem nada em carteira a venda nem chega à exchange
+            nada, = await pipeline.executar_lote([{'par': 'XRP/USDT', 'direcao': 'SELL', 'confianca': 90.0}], valor=10)
+            assert nada['recusada']
+        finally:
+            await bybit.fechar()
+
+    asyncio.run(cenario())
@@ -0,0 +1,93 @@
+import asyncio
+import os
+import numpy as np
+import ccxt.async_support as ccxt
+import pytest
+from benchmarks.dados import gerar_ohlcv
+from core.exchange_gravada import ExchangeGravada
+from core.historico import ArmazemHistorico, BaixadorHistorico
+
+PAR, TF, DURACAO = 'XRP/USDT', '15m', 900_000
+
+
+class ExchangeInstavel(ExchangeGravada):
+    """Cai depois de `paginas` respostas e devolve [] nas chamadas listadas em `vazias`"""
+
+    def __init__(self, *args, paginas=None, vazias=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.paginas = paginas
+        self.vazias = set(vazias)
+
+    async def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params={}):
+        if self.paginas is not None:
+            if not self.paginas:
+                raise ccxt.NetworkError('conexão perdida')
+            self.paginas -= 1
+        if self.chamadas in self.vazias:
+            self.chamadas += 1
+            return []
+        return await super().fetch_ohlcv(symbol, timeframe, since, limit, params)
+
+
+@pytest.fixture
+def candles():
+    ohlcv = gerar_ohlcv(1, 500, 11)[0]
+    # Manutenção da exchange: 40 barras que nunca existiram
+    return np.concatenate([ohlcv[:200], ohlcv[240:]])
+
+
+def _baixar(exchange, armazem, candles, **kwargs):
+    baixador = BaixadorHistorico(exchange, armazem, limite=100, tentativas=1, **kwargs)
+    inicio, fim = int(candles[0, 0]) - 50 * DURACAO, int(candles[-1, 0]) + DURACAO
+    return asyncio.run(baixador.baixar(PAR, TF, inicio, fim)), inicio, fim
+
+
+def test_download_interrompido_retoma_e_confirma_buraco_da_exchange(tmp_path, candles):
+    armazem = ArmazemHistorico(str(tmp_path), barras_por_bloco=128)
+
+    with pytest.raises(ccxt.NetworkError):
+        _baixar(ExchangeInstavel({PAR: {TF: candles}}, paginas=3), armazem, candles)
+    assert 0 < len(armazem.ler(PAR, TF)) < len(candles)
+
+    exchange = ExchangeGravada({PAR: {TF: candles}})
+    _, inicio, fim = _baixar(exchange, armazem, candles)
+    np.testing.assert_array_equal(armazem.ler(PAR, TF), candles)
+    # Antes da listagem e a manutenção ficam registrados; nada falta
+    assert armazem.lacunas(PAR, TF, inicio, fim) == []
+    assert (int(candles[199, 0]) + DURACAO, int(candles[200, 0])) in armazem.vazios(PAR, TF)
+
+    chamadas = exchange.chamadas
+    assert _baixar(exchange, armazem, candles)[0] == 0
+    assert exchange.chamadas == chamadas
+
+
+def test_buraco_no_meio_do_armazem_e_preenchido(tmp_path, candles):
+    armazem = ArmazemHistorico(str(tmp_path), barras_por_bloco=128)
+    armazem.gravar(PAR, TF, candles[:100])
+    armazem.gravar(PAR, TF, candles[150:])
+
+    exchange = ExchangeGravada({PAR: {TF: candles}})
+    novos, _, _ = _baixar(exchange, armazem, candles)
+    assert novos == 50
+    np.testing.assert_array_equal(armazem.ler(PAR, TF), candles)
+
+
+def test_resposta_vazia_isolada_nao_vira_lacuna(tmp_path, candles):
+    armazem = ArmazemHistorico(str(tmp_path), barras_por_bloco=128)
+    # A 3ª chamada, no meio dos dados, volta vazia uma vez
+    exchange = ExchangeInstavel({PAR: {TF: candles}}, vazias={2})
+    _baixar(exchange, armazem, candles)
+    np.testing.assert_array_equal(armazem.ler(PAR, TF), candles)
+    assert all(b <= candles[0, 0] or a >= candles[199, 0] for a, b in armazem.vazios(PAR, TF))
+
+
+def test_gravar_em_bloco_existente_escreve_no_lugar(tmp_path, candles):
+    armazem = ArmazemHistorico(str(tmp_path), barras_por_bloco=128)
+    assert armazem.gravar(PAR, TF, candles[:50]) == 50
+    caminho = armazem._arquivo(PAR, TF, int(candles[0, 0]) // DURACAO // 128)
+    inode = os.stat(caminho).st_ino
+
+    assert armazem.gravar(PAR, TF, candles[40:60]) == 10
+    assert os.stat(caminho).st_ino == inode
+    assert np.load(caminho, mmap_mode='r').flags.f_contiguous
+    np.testing.assert_array_equal(armazem.ler(PAR, TF, fim=int(candles[60, 0])), candles[:60])
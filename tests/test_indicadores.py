@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.dados import gerar_ohlcv
+from cerebro.features import MotorFeatures
+from cerebro.indicadores import (
+    ConjuntoIndicadores, DesvioPadraoIncremental, ExtremoIncremental,
+    InclinacaoIncremental, RSIIncremental, SMAIncremental,
+)
+from cerebro.rede_neural_simples import CerebroNeuralSimples
+from core.candles import ArmazemCandles
+
+N = 120
+
+
+def _serie(semente=5):
+    return pd.Series(gerar_ohlcv(1, N, semente)[0, :, 4])
+
+
+def _alimentar(indicador, serie):
+    """Valor do indicador a cada barra; cada barra chega aberta e é corrigida no lugar"""
+    valores = []
+    for valor in serie:
+        indicador.adicionar(valor * 0.99)
+        indicador.substituir(valor)
+        valores.append(indicador.valor)
+    return np.array(valores)
+
+
+@pytest.mark.parametrize('indicador, esperado', [
+    (lambda: SMAIncremental(10), lambda s: s.rolling(10).mean()),
+    (lambda: DesvioPadraoIncremental(10), lambda s: s.rolling(10).std()),
+    (lambda: ExtremoIncremental(10, maximo=True), lambda s: s.rolling(10).max()),
+    (lambda: ExtremoIncremental(10, maximo=False), lambda s: s.rolling(10).min()),
+], ids=['mean', 'std', 'max', 'min'])
+def test_janela_igual_ao_rolling(indicador, esperado):
+    serie = _serie()
+    np.testing.assert_allclose(_alimentar(indicador(), serie), esperado(serie).to_numpy(), rtol=1e-9)
+
+
+def test_inclinacao_igual_ao_polyfit():
+    serie = _serie()
+    valores = _alimentar(InclinacaoIncremental(10), serie)
+    assert np.isnan(valores[:9]).all()
+    esperado = [np.polyfit(np.arange(10), serie[i - 9:i + 1].to_numpy(), 1)[0] for i in range(9, N)]
+    np.testing.assert_allclose(valores[9:], esperado, rtol=1e-9, atol=1e-12)
+
+
+def test_rsi_igual_ao_calculo_manual():
+    serie, cerebro = _serie(), CerebroNeuralSimples()
+    valores = _alimentar(RSIIncremental(14, 'sma'), serie)
+    esperado = [cerebro._calcular_rsi_manual(serie[:i + 1], 14) for i in range(13, N)]
+    np.testing.assert_allclose(valores[13:], esperado, rtol=1e-9)
+
+
+def test_conjunto_igual_ao_motor_features():
+    ohlcv = gerar_ohlcv(1, N, 7)[0]
+    conjunto, motor = ConjuntoIndicadores(), MotorFeatures()
+    for i, candle in enumerate(ohlcv):
+        conjunto.atualizar(candle)
+        if i >= 30:
+            esperado = motor.calcular(ohlcv[None, :i + 1])[0]
+            np.testing.assert_allclose(conjunto.features(), esperado, rtol=1e-8)
+
+
+def test_armazem_features_recomeca_apos_limpar_buffer():
+    ohlcv = gerar_ohlcv(1, N, 9)[0]
+    armazem = ArmazemCandles(None, capacidade=50, timeframe_base='15m', derivados=())
+    buffer, motor = armazem.buffer('XRP/USDT', '15m'), MotorFeatures()
+    for candle in ohlcv[:80]:
+        buffer.mesclar([candle])
+        armazem.features(['XRP/USDT'])
+
+    # Ao reiniciar (reconexão com buffer novo) não pode sobrar estado do histórico anterior
+    buffer.limpar()
+    buffer.mesclar(ohlcv[90:])
+    np.testing.assert_allclose(
+        armazem.features(['XRP/USDT'])[0], motor.calcular(ohlcv[None, 90:])[0], rtol=1e-8
+    )
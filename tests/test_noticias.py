@@ -0,0 +1,60 @@
+import asyncio
+import time
+from cerebro.noticias import ColetorNoticias, normalizar_url
+from cerebro.rss_local import ServidorRSSLocal
+
+
+def _itens(*numeros, host='https://noticias.exemplo'):
+    return [{'titulo': f'Notícia {n}', 'link': f'{host}/artigo/{n}', 'guid': f'guid-{n}', 'texto': 'xrp'}
+            for n in numeros]
+
+
+def test_normalizar_url_remove_so_rastreio():
+    assert normalizar_url('HTTPS://Exemplo.com/a/?utm_source=x&id=7&fbclid=y#topo') == 'https://exemplo.com/a?id=7'
+    assert normalizar_url('https://exemplo.com/a?b=2&a=1') == normalizar_url('https://exemplo.com/a/?a=1&b=2')
+    assert normalizar_url('https://exemplo.com/ler?id=1') != normalizar_url('https://exemplo.com/ler?id=2')
+
+
+def test_coletor_com_servidor_local():
+    async def cenario():
+        servidor = ServidorRSSLocal()
+        await servidor.iniciar()
+        coletor = ColetorNoticias(timeout=0.3)
+        try:
+            rss = servidor.publicar_rss('rss', _itens(1, 2, 3))
+            # Atom repete os artigos 2 e 3 (mesmo GUID) e o 1 com outro GUID e link com rastreio
+            atom_itens = _itens(2, 3) + [{'titulo': 'Notícia 1 (Atom)', 'guid': 'atom-1',
+                                          'link': 'https://noticias.exemplo/artigo/1/?utm_source=atom'}]
+            atom = servidor.publicar_atom('atom', atom_itens)
+            lenta = servidor.publicar_rss('lenta', _itens(9))
+            servidor.atrasos['lenta'] = 2
+            coletor.fontes = [lenta, servidor.url('fora_do_ar'), rss, atom]
+
+            inicio = time.monotonic()
+            novos = await coletor.coletar()
+            # A fonte lenta estoura o timeout sem segurar as demais
+            assert time.monotonic() - inicio < 1.5
+            assert sorted(a['titulo'] for a in novos) == ['Notícia 1', 'Notícia 2', 'Notícia 3']
+            assert coletor.duplicados == 3
+            assert coletor.erros == 2
+            del coletor.fontes[:2]
+
+            # Nada mudou: GET condicional, 304 e nenhum artigo
+            assert await coletor.coletar() == []
+            assert servidor.respostas_304 == {'rss': 1, 'atom': 1}
+
+            # O feed muda: só o artigo inédito volta
+            servidor.publicar_rss('rss', _itens(1, 2, 3, 5))
+            novos = await coletor.coletar()
+            assert [a['titulo'] for a in novos] == ['Notícia 5']
+            assert servidor.respostas_304 == {'rss': 1, 'atom': 2}
+
+            # Sem ETag guardado, o Last-Modified sozinho também dá 304
+            coletor._validadores[atom]['etag'] = None
+            assert await coletor.coletar() == []
+            assert servidor.respostas_304 == {'rss': 2, 'atom': 3}
+        finally:
+            await coletor.fechar()
+            await servidor.parar()
+
+    asyncio.run(cenario())
@@ -0,0 +1,39 @@
+import asyncio
+import re
+from core.notificacoes import LIMITE_TEXTO, FilaTelegram
+
+
+class BotGravado:
+    def __init__(self):
+        self.mensagens = []
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        self.mensagens.append(text)
+
+
+def _html_valido(texto):
+    sem_entidades = re.sub(r'&(amp|lt|gt|quot|#\d+);', '', texto)
+    return texto.count('<b>') == texto.count('</b>') and '&' not in sem_entidades and \
+        not re.search(r'<[^>]*$', texto)
+
+
+def test_mensagem_longa_dividida_sem_quebrar_html():
+    linhas = [f'<b>XRP/USDT</b> BUY &amp; hold {i} &lt;teste&gt;' for i in range(400)]
+    longa = '\n'.join(linhas)
+    enorme = '<i>' + 'R&amp;D ' * 1000 + '</i>'  # Uma linha só, maior que o limite
+    bot = BotGravado()
+
+    async def cenario():
+        fila = FilaTelegram(bot, 1, intervalo_chat=0, janela=0)
+        fila.enviar('curta')
+        fila.enviar(longa)
+        fila.enviar(enorme)
+        await fila.parar()
+        return fila
+
+    fila = asyncio.run(cenario())
+    assert fila.falhas == 0 and len(bot.mensagens) > 3
+    assert all(len(m) <= LIMITE_TEXTO and _html_valido(m) for m in bot.mensagens)
+    enviado = '\n'.join(bot.mensagens)
+    assert all(linha in enviado for linha in linhas)
+    assert enviado.count('R&amp;D') == 1000
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from benchmarks.dados import gerar_ohlcv
+from core.otimizador import Otimizador
+
+ESPACO = {'rsi_compra': [40, 50], 'confianca_minima': [60]}
+
+
+@pytest.fixture
+def dados():
+    return dict(zip(['XRP/USDT', 'ADA/USDT'], gerar_ohlcv(2, 300, 4)))
+
+
+def _pendentes(monkeypatch):
+    """Troca o pool por um registro das avaliações que seriam feitas"""
+    avaliadas = []
+
+    def rodar_pool(otimizador, pendentes):
+        avaliadas.extend(pendentes)
+        for chave, parametros, inicio, fim in pendentes:
+            otimizador.resultados[chave] = {'chave': chave, 'parametros': parametros,
+                                            'inicio': inicio, 'fim': fim, 'estatisticas': {}}
+    monkeypatch.setattr(Otimizador, '_rodar_pool', rodar_pool)
+    return avaliadas
+
+
+def test_checkpoint_so_reaproveita_o_mesmo_contexto(tmp_path, monkeypatch, dados):
+    checkpoint = str(tmp_path / 'resultados.jsonl')
+    primeiro = Otimizador(dados, ESPACO, processos=1, checkpoint=checkpoint, timeframe='15m')
+    assert len(primeiro.avaliar(primeiro.grade())) == 2
+
+    avaliadas = _pendentes(monkeypatch)
+    mesmo = Otimizador(dados, ESPACO, processos=1, checkpoint=checkpoint, timeframe='15m')
+    mesmo.avaliar(mesmo.grade())
+    assert avaliadas == []
+
+    outros = [
+        Otimizador(dados, ESPACO, checkpoint=checkpoint, timeframe='15m', taxa=0.002),
+        Otimizador(dados, ESPACO, checkpoint=checkpoint, timeframe='15m', slippage=0.001),
+        Otimizador(dados, ESPACO, checkpoint=checkpoint, timeframe='15m', capital_inicial=1000),
+        Otimizador(dados, ESPACO, checkpoint=checkpoint, timeframe='1h'),
+        Otimizador({'XRP/USDT': dados['XRP/USDT']}, ESPACO, checkpoint=checkpoint, timeframe='15m'),
+        Otimizador({par: ohlcv * 1.01 for par, ohlcv in dados.items()}, ESPACO,
+                   checkpoint=checkpoint, timeframe='15m'),
+    ]
+    for otimizador in outros:
+        avaliadas.clear()
+        inicio, fim = int(dados['XRP/USDT'][0, 0]), int(dados['XRP/USDT'][-1, 0]) + 1
+        otimizador.avaliar(otimizador.grade(), inicio, fim)
+        assert len(avaliadas) == 2
+
+
+def test_features_seguem_o_modo_exato(dados):
+    from core.backtest import MotorBacktest
+    otimizador = Otimizador(dados, ESPACO, exato=True)
+    assert otimizador.contexto['backtest']['exato'] is True
+    np.testing.assert_array_equal(otimizador._calcular_features()['XRP/USDT'],
+                                  MotorBacktest(exato=True).calcular_features(dados['XRP/USDT']))
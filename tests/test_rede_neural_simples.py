@@ -0,0 +1,33 @@
+import numpy as np
+from cerebro.features import COLUNAS_COM_SENTIMENTO, COLUNAS_FEATURES
+from cerebro.regras import REGRAS_PADRAO, TabelaRegras
+from cerebro.rede_neural_simples import CerebroNeuralSimples
+from core.config import config
+
+# Seis sinais de compra nas regras padrão: confiança no teto
+FEATURES_COMPRA = {'rsi': 20.0, 'price_vs_sma_10': -0.05, 'trend': 0.01, 'dist_low': 0.01, 'vol_10': 0.03}
+
+
+def _matriz(pares):
+    linha = [FEATURES_COMPRA.get(coluna, 0.5) for coluna in COLUNAS_FEATURES]
+    return np.array([linha] * len(pares))
+
+
+def test_sentimento_ausente_nao_derruba_a_confianca():
+    pares = ['XRP/USDT', 'ADA/USDT']
+    sem_coluna = CerebroNeuralSimples(TabelaRegras()).prever_matriz(pares, _matriz(pares))
+    com_coluna = CerebroNeuralSimples(TabelaRegras(colunas=COLUNAS_COM_SENTIMENTO))
+
+    # Snapshot obsoleto (None) e ativo sem notícias (NaN) dão o mesmo resultado
+    for sentimento in (None, lambda pares: np.full(len(pares), np.nan)):
+        previsoes = com_coluna.prever_matriz(pares, _matriz(pares), sentimento=sentimento)
+        assert [p['confianca'] for p in previsoes] == [p['confianca'] for p in sem_coluna]
+        assert all(p['direcao'] == 'BUY' and p['confianca'] >= config.CONFIANCA_MINIMA for p in previsoes)
+
+
+def test_regra_de_sentimento_dispara_com_valor():
+    regras = REGRAS_PADRAO + [{'feature': 'sentimento', 'operador': '<', 'limiar': -0.5, 'lado': 'SELL', 'peso': 9}]
+    cerebro = CerebroNeuralSimples(TabelaRegras(regras, colunas=COLUNAS_COM_SENTIMENTO))
+    pares = ['XRP/USDT', 'ADA/USDT']
+    previsoes = cerebro.prever_matriz(pares, _matriz(pares), sentimento=lambda pares: np.array([-0.9, np.nan]))
+    assert [p['direcao'] for p in previsoes] == ['SELL', 'BUY']
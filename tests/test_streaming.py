@@ -0,0 +1,101 @@
+import asyncio
+import time
+import pytest
+from core.candles import ArmazemCandles
+from core.config import config
+from core.streaming import StreamMercado
+from core.ws_local import ServidorWSLocal
+
+DURACAO = 900_000  # 15m
+PARES = ['XRP/USDT', 'ADA/USDT', 'MATIC/USDT', 'DOGE/USDT', 'SHIB/USDT', 'TRX/USDT']
+
+
+class BybitREST:
+    """Lado REST do backfill: candles de 15m guardados em memória"""
+
+    def __init__(self, pares, n=10):
+        self.inicio = (int(time.time() * 1000) // DURACAO - n) * DURACAO
+        self.candles = {par: [self._candle(i, 1.0) for i in range(n)] for par in pares}
+
+    def _candle(self, i, preco):
+        return [float(self.inicio + i * DURACAO), preco, preco, preco, preco, 100.0]
+
+    def acrescentar(self, par, preco):
+        self.candles[par].append(self._candle(len(self.candles[par]), preco))
+
+    def agora_ms(self):
+        return int(self.candles[PARES[0]][-1][0]) + DURACAO // 2
+
+    async def obter_dados_mercado(self, par, timeframe, limite, since=None, fallback=True):
+        linhas = [c for c in self.candles[par] if since is None or c[0] >= since]
+        return linhas[-limite:]
+
+
+async def _esperar(condicao, timeout=5):
+    limite = time.monotonic() + timeout
+    while not condicao():
+        assert time.monotonic() < limite, 'condição não atingida'
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def configuracao(monkeypatch):
+    monkeypatch.setattr(config, 'WS_JANELA_AGRUPAMENTO', 0.01)
+
+
+def test_stream_reconecta_preenche_lacunas_e_dispara(configuracao):
+    async def cenario():
+        servidor = ServidorWSLocal()
+        await servidor.iniciar()
+        rest = BybitREST(PARES)
+        candles = ArmazemCandles(rest, derivados=())
+        disparos = []
+
+        async def ao_disparar(pares):
+            disparos.append(pares)
+
+        stream = StreamMercado(candles, PARES, ao_disparar, url=servidor.url, limiar=0.01)
+        tarefa = asyncio.create_task(stream.executar())
+        try:
+            # 12 tópicos: só entram todos se a inscrição for dividida em mensagens de até 10
+            assert await servidor.aguardar_inscricoes()
+            await _esperar(lambda: len(servidor.topicos()) == 2 * len(PARES))
+            await _esperar(lambda: disparos)  # Backfill inicial
+            buffer = candles.buffer('XRP/USDT')
+            assert buffer.tamanho == 10
+
+            # Candle fechado no stream dispara o ciclo do par
+            disparos.clear()
+            rest.acrescentar('XRP/USDT', 1.0)
+            await servidor.publicar_kline('XRP/USDT', '15m', rest.candles['XRP/USDT'][-1], confirmado=True)
+            await _esperar(lambda: disparos)
+            assert disparos == [['XRP/USDT']]
+            assert buffer.tamanho == 11
+
+            # Movimento de preço acima do limiar também dispara; abaixo, não
+            disparos.clear()
+            await servidor.publicar_ticker('ADA/USDT', 1.0)
+            await servidor.publicar_ticker('ADA/USDT', 1.005)
+            await servidor.publicar_ticker('ADA/USDT', 1.02)
+            await _esperar(lambda: disparos)
+            assert disparos == [['ADA/USDT']]
+
+            # Queda: candles fechados enquanto o stream está fora voltam pelo REST
+            disparos.clear()
+            for _ in range(3):
+                rest.acrescentar('DOGE/USDT', 2.0)
+            await servidor.desconectar_todos()
+            await _esperar(lambda: stream.reconexoes == 1)
+            assert await servidor.aguardar_inscricoes()
+            await _esperar(lambda: disparos)
+            assert 'DOGE/USDT' in disparos[0]
+            doge = candles.buffer('DOGE/USDT')
+            assert doge.tamanho == 13
+            assert doge.ultimo_timestamp == rest.candles['DOGE/USDT'][-1][0]
+        finally:
+            await stream.parar()
+            tarefa.cancel()
+            await asyncio.gather(tarefa, return_exceptions=True)
+            await servidor.parar()
+
+    asyncio.run(cenario())